@@ -1,134 +1,202 @@
 # ast_nodes.py
 
 class ASTNode:
-    # Base class for all nodes in the Abstract Syntax Tree
-    pass
+    # Base class for all nodes in the Abstract Syntax Tree. Nodes use __slots__ so large
+    # trees carry no per-instance __dict__; lineno/col are the source position when the
+    # producer of the node knows it, else None
+    __slots__ = ('lineno', 'col')
 
 
 class Program(ASTNode):
-    def __init__(self, statements):
+    __slots__ = ('statements',)
+
+    def __init__(self, statements, lineno=None, col=None):
         # Root node containing all program statements
         self.statements = statements
+        self.lineno = lineno
+        self.col = col
 
     def __repr__(self):
         return f"Program({self.statements})"
 
 
 class AssignmentNode(ASTNode):
-    def __init__(self, identifier, expression, comments=None):
+    __slots__ = ('identifier', 'expression', 'comments')
+
+    def __init__(self, identifier, expression, comments=None, lineno=None, col=None):
         # Represents a variable assignment operation
         self.identifier = identifier
         self.expression = expression
         self.comments = comments
+        self.lineno = lineno
+        self.col = col
 
     def __repr__(self):
         return f"AssignmentNode({self.identifier} = {self.expression})"
 
 
 class IfNode(ASTNode):
-    def __init__(self, condition, true_branch, false_branch=None):
+    __slots__ = ('condition', 'true_branch', 'false_branch')
+
+    def __init__(self, condition, true_branch, false_branch=None, lineno=None, col=None):
         # Represents an if-else conditional structure
         self.condition = condition
         self.true_branch = true_branch
         self.false_branch = false_branch
+        self.lineno = lineno
+        self.col = col
 
     def __repr__(self):
         return f"IfNode(condition={self.condition}, true={self.true_branch}, false={self.false_branch})"
 
 
 class WhileNode(ASTNode):
-    def __init__(self, condition, body):
+    __slots__ = ('condition', 'body')
+
+    def __init__(self, condition, body, lineno=None, col=None):
         # Represents a while loop structure
         self.condition = condition
         self.body = body
+        self.lineno = lineno
+        self.col = col
 
     def __repr__(self):
         return f"WhileNode(condition={self.condition}, body={self.body})"
 
 
 class ForNode(ASTNode):
-    def __init__(self, variable, iterable, body):
+    __slots__ = ('variable', 'iterable', 'body')
+
+    def __init__(self, variable, iterable, body, lineno=None, col=None):
         # Represents a for loop iterating over a sequence
         self.variable = variable
         self.iterable = iterable
         self.body = body
+        self.lineno = lineno
+        self.col = col
 
     def __repr__(self):
         return f"ForNode(variable={self.variable}, iterable={self.iterable}, body={self.body})"
 
 
 class PrintNode(ASTNode):
-    def __init__(self, expression):
+    __slots__ = ('expression',)
+
+    def __init__(self, expression, lineno=None, col=None):
         # Represents a print statement
         self.expression = expression
+        self.lineno = lineno
+        self.col = col
 
     def __repr__(self):
         return f"PrintNode({self.expression})"
 
 
 class BinaryOpNode(ASTNode):
-    def __init__(self, left, operator, right):
+    __slots__ = ('left', 'operator', 'right')
+
+    def __init__(self, left, operator, right, lineno=None, col=None):
         # Represents a binary operation (e.g., +, -, *, /, etc.)
         self.left = left
         self.operator = operator
         self.right = right
+        self.lineno = lineno
+        self.col = col
 
     def __repr__(self):
         return f"BinaryOpNode({self.left} {self.operator} {self.right})"
 
 
+class UnaryOpNode(ASTNode):
+    __slots__ = ('operator', 'operand')
+
+    def __init__(self, operator, operand, lineno=None, col=None):
+        # Represents a prefix operation (-, +, ~ or not)
+        self.operator = operator
+        self.operand = operand
+        self.lineno = lineno
+        self.col = col
+
+    def __repr__(self):
+        return f"UnaryOpNode({self.operator} {self.operand})"
+
+
 class IdentifierNode(ASTNode):
-    def __init__(self, name):
+    __slots__ = ('name',)
+
+    def __init__(self, name, lineno=None, col=None):
         # Represents a variable reference
         self.name = name
+        self.lineno = lineno
+        self.col = col
 
     def __repr__(self):
         return f"IdentifierNode({self.name})"
 
 
 class NumberNode(ASTNode):
-    def __init__(self, value):
+    __slots__ = ('value',)
+
+    def __init__(self, value, lineno=None, col=None):
         # Represents a numeric literal (int or float)
         self.value = value
+        self.lineno = lineno
+        self.col = col
 
     def __repr__(self):
         return f"NumberNode({self.value})"
 
 
 class StringNode(ASTNode):
-    def __init__(self, value):
+    __slots__ = ('value',)
+
+    def __init__(self, value, lineno=None, col=None):
         # Represents a string literal
         self.value = value
+        self.lineno = lineno
+        self.col = col
 
     def __repr__(self):
         return f'StringNode("{self.value}")'
 
 
 class FunctionCallNode(ASTNode):
-    def __init__(self, function_name, arguments):
+    __slots__ = ('function_name', 'arguments')
+
+    def __init__(self, function_name, arguments, lineno=None, col=None):
         # Represents a function call with arguments
         self.function_name = function_name
         self.arguments = arguments
+        self.lineno = lineno
+        self.col = col
 
     def __repr__(self):
         return f"FunctionCallNode({self.function_name}, {self.arguments})"
 
 
 class FunctionDefNode(ASTNode):
-    def __init__(self, name, parameters, body):
+    __slots__ = ('name', 'parameters', 'body')
+
+    def __init__(self, name, parameters, body, lineno=None, col=None):
         # Represents a function definition
         self.name = name
         self.parameters = parameters
         self.body = body
+        self.lineno = lineno
+        self.col = col
 
     def __repr__(self):
         return f"FunctionDefNode(name={self.name}, params={self.parameters}, body={self.body})"
 
 
 class ReturnNode(ASTNode):
-    def __init__(self, value):
+    __slots__ = ('value',)
+
+    def __init__(self, value, lineno=None, col=None):
         # Represents a return statement in a function
         self.value = value
+        self.lineno = lineno
+        self.col = col
 
     def __repr__(self):
         return f"ReturnNode({self.value})"
@@ -136,22 +204,66 @@ class ReturnNode(ASTNode):
 
 class ExpressionNode(ASTNode):
     # Base class for all expression nodes
-    pass
+    __slots__ = ()
 
 
 class ListNode(ASTNode):
-    def __init__(self, elements):
+    __slots__ = ('elements',)
+
+    def __init__(self, elements, lineno=None, col=None):
         # Represents a list literal with elements
         self.elements = elements
+        self.lineno = lineno
+        self.col = col
 
     def __repr__(self):
         return f"ListNode({self.elements})"
 
 
 class InputNode(ASTNode):
-    def __init__(self, prompt):
+    __slots__ = ('prompt',)
+
+    def __init__(self, prompt, lineno=None, col=None):
         # Represents an input operation with optional prompt
         self.prompt = prompt
+        self.lineno = lineno
+        self.col = col
 
     def __repr__(self):
         return f"InputNode(prompt={self.prompt})"
+
+
+CHAINED_CALL_ERROR = "Chained comparisons with a call between two operators are not supported"
+
+
+def has_call(root):
+    """Whether an expression calls a function or reads input; list indexing does not count."""
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        node_type = type(node)
+        if node_type is BinaryOpNode:
+            stack.append(node.left)
+            stack.append(node.right)
+        elif node_type is UnaryOpNode:
+            stack.append(node.operand)
+        elif node_type is FunctionCallNode:
+            if node.function_name != "__list_access__":
+                return True
+            stack.extend(node.arguments)
+        elif node_type is ListNode:
+            stack.extend(node.elements)
+        elif node_type is InputNode:
+            return True
+    return False
+
+
+def chain_comparison(chain, middle, operator, right):
+    """Extend a comparison chain ending in middle with `operator right`.
+
+    Like Python, a < b < c means a < b and b < c. middle appears in both comparisons, so it
+    must not call anything that could run twice; raises ValueError if it does.
+    """
+    if has_call(middle):
+        raise ValueError(CHAINED_CALL_ERROR)
+    return BinaryOpNode(chain, 'and', BinaryOpNode(middle, operator, right))
@@ -0,0 +1,251 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from conversion_cache import ConversionCache
+from incremental import IncrementalConverter
+from pass_manager import DEFAULT_OPT_LEVEL, INTERACTIVE_OPT_LEVEL, OPT_LEVELS, PassManager, parse_passes
+from pipeline import CONVERTER_VERSION, DEFAULT_FRONTEND, FRONTENDS, convert_source, convert_to_stream
+from stage_stats import ConversionStats
+
+# Per-process conversion cache, front end, IR passes and stats switch, set up by init_worker
+_worker_cache = None
+_worker_frontend = DEFAULT_FRONTEND
+_worker_passes = OPT_LEVELS[DEFAULT_OPT_LEVEL]
+_worker_stats = False
+
+
+def find_python_files(root):
+    # Collect every .py file under root (or root itself if it is a file), in a stable order
+    if os.path.isfile(root):
+        return [root]
+
+    files = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        # Skip hidden and cache directories
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith('.') and d != '__pycache__')
+        for filename in sorted(filenames):
+            if filename.endswith('.py'):
+                files.append(os.path.join(dirpath, filename))
+    return files
+
+
+def output_path_for(source_path, source_root, output_dir):
+    # Mirror the source tree layout under output_dir, swapping .py for .cpp
+    if os.path.isfile(source_root):
+        relative = os.path.basename(source_path)
+    else:
+        relative = os.path.relpath(source_path, source_root)
+    return os.path.join(output_dir, os.path.splitext(relative)[0] + '.cpp')
+
+
+def init_worker(cache_dir=None, cache_max_bytes=None, frontend=DEFAULT_FRONTEND, collect_stats=False,
+                passes=OPT_LEVELS[DEFAULT_OPT_LEVEL]):
+    # Open the shared on-disk cache once per worker process
+    global _worker_cache, _worker_frontend, _worker_passes, _worker_stats
+    _worker_frontend = frontend
+    _worker_passes = passes
+    _worker_stats = collect_stats
+    if cache_dir:
+        _worker_cache = ConversionCache(cache_dir, cache_max_bytes, version=CONVERTER_VERSION)
+    else:
+        _worker_cache = None
+
+
+def convert_file(job):
+    """Convert one file inside a worker process and report its status and timing."""
+    source_path, output_path = job
+    result = {'source': source_path, 'output': output_path, 'status': 'ok', 'error': None, 'cached': False}
+    stats = ConversionStats() if _worker_stats else None
+    optimizer = PassManager(_worker_passes)
+    start = time.perf_counter()
+    try:
+        with open(source_path, 'r', encoding='utf-8') as file:
+            code = file.read()
+
+        # Stream the program into a temporary file and only move it into place once complete
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        temp_path = output_path + '.tmp'
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                result['cached'] = convert_to_stream(code, file, _worker_cache,
+                                                     progress=stats.track() if stats else None,
+                                                     frontend=_worker_frontend, optimizer=optimizer)
+            os.replace(temp_path, output_path)
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            raise
+    except SyntaxError as e:
+        result['status'] = 'syntax_error'
+        result['error'] = f"Line {e.lineno}: {e.msg}"
+        result['output'] = None
+    except Exception as e:
+        result['status'] = 'error'
+        result['error'] = str(e)
+        result['output'] = None
+    result['seconds'] = time.perf_counter() - start
+    if stats is not None:
+        # Stages up to a failure are kept too
+        result['stats'] = stats.finish().to_dict()
+        result['stats']['passes'] = [pass_stats.to_dict() for pass_stats in optimizer.stats]
+    return result
+
+
+def run_batch(source_root, output_dir, jobs=None, cache_dir=None, cache_max_bytes=256 * 1024 * 1024,
+              frontend=DEFAULT_FRONTEND, collect_stats=False, passes=OPT_LEVELS[DEFAULT_OPT_LEVEL]):
+    """Convert every Python file under source_root in parallel and return the summary dict.
+
+    passes names the IR passes to run, in order. With collect_stats each file result gets a
+    'stats' entry from ConversionStats, with the time and node-count delta of every pass.
+    """
+    files = find_python_files(source_root)
+    work = [(path, output_path_for(path, source_root, output_dir)) for path in files]
+    jobs = jobs or os.cpu_count() or 1
+
+    start = time.perf_counter()
+    if jobs == 1 or len(work) <= 1:
+        init_worker(cache_dir, cache_max_bytes, frontend, collect_stats, passes)
+        results = [convert_file(job) for job in work]
+    else:
+        # Hand out files in chunks so IPC overhead stays small next to the conversions
+        chunksize = max(1, len(work) // (jobs * 4))
+        with ProcessPoolExecutor(max_workers=jobs, initializer=init_worker,
+                                 initargs=(cache_dir, cache_max_bytes, frontend, collect_stats, passes)) as executor:
+            results = list(executor.map(convert_file, work, chunksize=chunksize))
+    elapsed = time.perf_counter() - start
+
+    converted = sum(1 for r in results if r['status'] == 'ok')
+    return {
+        'source_root': source_root,
+        'output_dir': output_dir,
+        'jobs': jobs,
+        'frontend': frontend,
+        'passes': list(passes),
+        'total_files': len(results),
+        'converted': converted,
+        'failed': len(results) - converted,
+        'cache_hits': sum(1 for r in results if r['cached']),
+        'seconds': elapsed,
+        'files': results,
+    }
+
+
+def watch(source_root, output_dir, interval=1.0, frontend=DEFAULT_FRONTEND, passes=OPT_LEVELS[INTERACTIVE_OPT_LEVEL]):
+    """Poll source_root and reconvert files as they change, reusing unchanged statements."""
+    converters = {}
+    mtimes = {}
+    for path in find_python_files(source_root):
+        try:
+            mtimes[path] = os.stat(path).st_mtime_ns
+        except OSError:
+            pass
+
+    print(f"Watching {source_root} for changes (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(interval)
+            for path in find_python_files(source_root):
+                try:
+                    mtime = os.stat(path).st_mtime_ns
+                except OSError:
+                    continue
+                if mtimes.get(path) == mtime:
+                    continue
+                mtimes[path] = mtime
+
+                output_path = output_path_for(path, source_root, output_dir)
+                converter = converters.setdefault(path, IncrementalConverter())
+                start = time.perf_counter()
+                try:
+                    with open(path, 'r', encoding='utf-8') as file:
+                        code = file.read()
+                    cpp_code = convert_source(code, incremental=converter, frontend=frontend,
+                                              optimizer=PassManager(passes))
+                    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+                    with open(output_path, 'w', encoding='utf-8') as file:
+                        file.write(cpp_code)
+                except SyntaxError as e:
+                    print(f"{path}: syntax error at line {e.lineno}: {e.msg}")
+                    continue
+                except Exception as e:
+                    print(f"{path}: error: {e}")
+                    continue
+                elapsed = (time.perf_counter() - start) * 1000
+                if frontend == 'cpython':
+                    print(f"{path} -> {output_path} in {elapsed:.1f}ms "
+                          f"({converter.regenerated} regenerated, {converter.reused} reused statements)")
+                else:
+                    print(f"{path} -> {output_path} in {elapsed:.1f}ms")
+    except KeyboardInterrupt:
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert a tree of Python files to C++ without the GUI.")
+    parser.add_argument('source', help="Python file or directory to convert")
+    parser.add_argument('-o', '--output-dir', default='cpp_out', help="Directory for generated .cpp files")
+    parser.add_argument('-j', '--jobs', type=int, default=None, help="Worker processes (default: number of cores)")
+    parser.add_argument('--summary', default=None, help="Path of the JSON summary (default: <output-dir>/summary.json)")
+    parser.add_argument('--cache-dir', default=None, help="Directory of the on-disk conversion cache (disabled if omitted)")
+    parser.add_argument('--cache-size-mb', type=int, default=256, help="Size cap of the conversion cache in MiB")
+    parser.add_argument('--watch', action='store_true', help="Keep running and reconvert files as they change")
+    parser.add_argument('--interval', type=float, default=1.0, help="Polling interval in seconds for --watch")
+    parser.add_argument('--frontend', choices=FRONTENDS, default=DEFAULT_FRONTEND,
+                        help="Parse with CPython's ast module or the built-in lexer and parser")
+    parser.add_argument('-O', dest='opt_level', type=int, choices=sorted(OPT_LEVELS), default=None,
+                        help="IR optimization level: 0 none, 1 fold constant expressions and infer types, "
+                             "2 also propagate constant variables and remove dead code "
+                             f"(default: {DEFAULT_OPT_LEVEL}, or {INTERACTIVE_OPT_LEVEL} with --watch)")
+    parser.add_argument('--passes', default=None,
+                        help="Comma-separated IR passes to run in order instead of those of -O")
+    parser.add_argument('--stats-jsonl', default=None,
+                        help="Write per-stage wall time, CPU time and memory peak of each file to this JSON lines file")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.source):
+        parser.error(f"Source not found: {args.source}")
+    if args.opt_level is None:
+        # Watch mode reconverts on every save, so it defaults to the cheap level throughout
+        args.opt_level = INTERACTIVE_OPT_LEVEL if args.watch else DEFAULT_OPT_LEVEL
+    passes = OPT_LEVELS[args.opt_level]
+    if args.passes is not None:
+        try:
+            passes = parse_passes(args.passes)
+        except ValueError as e:
+            parser.error(str(e))
+
+    summary = run_batch(args.source, args.output_dir, args.jobs,
+                        cache_dir=args.cache_dir, cache_max_bytes=args.cache_size_mb * 1024 * 1024,
+                        frontend=args.frontend, collect_stats=bool(args.stats_jsonl), passes=passes)
+
+    if args.stats_jsonl:
+        # One JSON object per file; the stats are left out of the summary
+        os.makedirs(os.path.dirname(args.stats_jsonl) or '.', exist_ok=True)
+        with open(args.stats_jsonl, 'w', encoding='utf-8') as file:
+            for result in summary['files']:
+                record = {'source': result['source'], 'status': result['status'], 'cached': result['cached']}
+                record.update(result.pop('stats'))
+                file.write(json.dumps(record) + "\n")
+
+    summary_path = args.summary or os.path.join(args.output_dir, 'summary.json')
+    os.makedirs(os.path.dirname(summary_path) or '.', exist_ok=True)
+    with open(summary_path, 'w', encoding='utf-8') as file:
+        json.dump(summary, file, indent=2)
+
+    print(f"Converted {summary['converted']}/{summary['total_files']} files "
+          f"in {summary['seconds']:.2f}s using {summary['jobs']} workers "
+          f"({summary['cache_hits']} from cache)")
+    print(f"Summary written to {summary_path}")
+
+    if args.watch:
+        watch(args.source, args.output_dir, args.interval, args.frontend, passes)
+    return 0 if summary['failed'] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
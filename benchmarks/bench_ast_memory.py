@@ -0,0 +1,95 @@
+"""Memory used by the custom AST that CustomNodeConverter builds, in bytes per node.
+
+Run from the repository root:
+    python benchmarks/bench_ast_memory.py [--units N] [--baseline GIT_REV]
+
+With --baseline the same measurement is also run against the converter modules of an
+older git revision, so the before/after cost per node can be compared directly.
+"""
+import argparse
+import ast
+import json
+import os
+import sys
+import tracemalloc
+
+from common import measure_revision
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+
+
+def _fields(node):
+    # Attribute values of a node, whether it stores them in __dict__ or in __slots__
+    if hasattr(node, '__dict__'):
+        return list(vars(node).values())
+    values = []
+    for cls in type(node).__mro__:
+        for name in cls.__dict__.get('__slots__', ()):
+            values.append(getattr(node, name, None))
+    return values
+
+
+def count_nodes(tree, node_class):
+    # Count the node_class instances reachable from tree
+    count = 0
+    stack = [tree]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, list):
+            stack.extend(item)
+        elif isinstance(item, node_class):
+            count += 1
+            stack.extend(_fields(item))
+    return count
+
+
+def measure(src_dir, units):
+    # Import the converter from src_dir and measure the memory held by its output tree
+    sys.path.insert(0, src_dir)
+    sys.path.insert(1, BENCH_DIR)
+    from ast_nodes import ASTNode
+    from custom_node_converter import CustomNodeConverter
+    from synthetic import generate_program
+
+    source = generate_program(units)
+    python_ast = ast.parse(source)
+
+    tracemalloc.start()
+    custom_ast = CustomNodeConverter().visit(python_ast)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    nodes = count_nodes(custom_ast, ASTNode)
+    return {
+        'source_lines': source.count('\n'),
+        'custom_nodes': nodes,
+        'retained_bytes_per_node': retained / nodes,
+        'peak_bytes_per_node': peak / nodes,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--units', type=int, default=2000, help="Function/statement units in the synthetic corpus")
+    parser.add_argument('--baseline', default=None, help="Git revision to compare against")
+    parser.add_argument('--src', default=REPO_ROOT, help=argparse.SUPPRESS)
+    parser.add_argument('--json', action='store_true', help="Print raw JSON results")
+    args = parser.parse_args()
+
+    current = measure(args.src, args.units)
+    if args.json:
+        print(json.dumps(current))
+        return
+
+    print(f"Corpus: {current['source_lines']} lines, {current['custom_nodes']} custom AST nodes")
+    rows = [('current', current)]
+    if args.baseline:
+        rows.insert(0, (args.baseline, measure_revision(__file__, args.baseline, ['--units', str(args.units)])))
+    print(f"{'revision':<12} {'retained bytes/node':>20} {'peak bytes/node':>16}")
+    for name, result in rows:
+        print(f"{name:<12} {result['retained_bytes_per_node']:>20.1f} {result['peak_bytes_per_node']:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
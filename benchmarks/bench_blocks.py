@@ -0,0 +1,114 @@
+"""Time and memory of IR and C++ generation on deeply nested blocks.
+
+Run from the repository root:
+    python benchmarks/bench_blocks.py [--depth N] [--units N] [--repeat R] [--baseline GIT_REV]
+
+The corpus is --units top-level statements, each an if/while/for nest --depth levels deep
+with a couple of assignments at every level. ast.parse runs once up front and is not timed;
+"to IR" lowers its tree with IRGenerator and "to C++" runs CodeGenerator on that IR, up to
+its list of lines. Transient memory is the tracemalloc peak of each step less what its
+result still holds when it returns, i.e. the scratch generators, lists and copies made on
+the way. --baseline runs the same measurements against an older revision exported with
+git archive; a revision that cannot lower this corpus, such as one predating direct
+lowering of while loops, is reported as unsupported.
+"""
+import argparse
+import ast
+import json
+import os
+import sys
+import tracemalloc
+
+from common import best_time, measure_revision
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+
+
+def nested_unit(index, depth):
+    # One top-level statement nesting if, while and for blocks depth levels deep
+    lines = []
+    for level in range(depth):
+        indent = "    " * level
+        lines.append(f"{indent}v{level} = {index} + {level}")
+        kind = level % 3
+        if kind == 0:
+            lines.append(f"{indent}if v{level} > {level}:")
+        elif kind == 1:
+            lines.append(f"{indent}while v{level} < {level}:")
+        else:
+            lines.append(f"{indent}for i{level} in range({level}):")
+    indent = "    " * depth
+    lines.append(f"{indent}print(v{depth - 1})")
+    return "\n".join(lines) + "\n"
+
+
+def nested_program(units, depth):
+    return "".join(nested_unit(index, depth) for index in range(units))
+
+
+def transient_memory(run):
+    # tracemalloc peak of one run less what its result still holds at the end
+    tracemalloc.start()
+    result = run()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return peak - retained
+
+
+def measure(src_dir, units, depth, repeat):
+    # Import the generators from src_dir and measure both steps on the nested corpus
+    sys.path.insert(0, src_dir)
+    from code_generator import CodeGenerator
+    from ir_generator import IRGenerator
+
+    def to_ir():
+        ir_generator = IRGenerator()
+        ir_generator.generate(python_ast)
+        return ir_generator.get_instructions()
+
+    def to_cpp():
+        code_generator = CodeGenerator()
+        code_generator.generate(instructions)
+        return code_generator.code, code_generator.functions
+
+    python_ast = ast.parse(nested_program(units, depth))
+    instructions = to_ir()
+    return {
+        'ir_seconds': best_time(to_ir, repeat),
+        'ir_transient_bytes': transient_memory(to_ir),
+        'cpp_seconds': best_time(to_cpp, repeat),
+        'cpp_transient_bytes': transient_memory(to_cpp),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--depth', type=int, default=40, help="Nesting depth of each top-level statement")
+    parser.add_argument('--units', type=int, default=200, help="Top-level statements in the corpus")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per step; the fastest is reported")
+    parser.add_argument('--baseline', default=None, help="Git revision to compare against")
+    parser.add_argument('--src', default=REPO_ROOT, help=argparse.SUPPRESS)
+    parser.add_argument('--json', action='store_true', help="Print raw JSON results")
+    args = parser.parse_args()
+
+    current = measure(args.src, args.units, args.depth, args.repeat)
+    if args.json:
+        print(json.dumps(current))
+        return
+
+    rows = [('current', current)]
+    if args.baseline:
+        baseline = measure_revision(__file__, args.baseline, ['--units', str(args.units), '--depth', str(args.depth),
+                                                              '--repeat', str(args.repeat)])
+        rows.insert(0, (args.baseline, baseline))
+    print(f"Corpus: {args.units} statements nested {args.depth} deep")
+    print(f"{'revision':<12} {'to IR ms':>9} {'IR transient KiB':>17} {'to C++ ms':>10} {'C++ transient KiB':>18}")
+    for revision, result in rows:
+        print(f"{revision:<12} {result['ir_seconds'] * 1000:>9.1f} {result['ir_transient_bytes'] / 1024:>17.0f} "
+              f"{result['cpp_seconds'] * 1000:>10.1f} {result['cpp_transient_bytes'] / 1024:>18.0f}")
+
+
+if __name__ == "__main__":
+    main()
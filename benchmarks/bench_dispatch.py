@@ -0,0 +1,82 @@
+"""Microbenchmark of per-node dispatch cost in IRGenerator.generate and CodeGenerator.generate.
+
+Run from the repository root:
+    python benchmarks/bench_dispatch.py [--units N] [--repeat R] [--baseline GIT_REV]
+
+With --baseline the same measurement is also run against the converter modules of an
+older git revision, so the before/after cost per node can be compared directly.
+"""
+import argparse
+import ast
+import json
+import os
+import sys
+import time
+
+from common import measure_revision
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+
+
+def measure(src_dir, units, repeat):
+    # Import the converter from src_dir and time the two generator stages
+    sys.path.insert(0, src_dir)
+    sys.path.insert(1, BENCH_DIR)
+    from custom_node_converter import CustomNodeConverter
+    from ir_generator import IRGenerator
+    from code_generator import CodeGenerator
+    from synthetic import generate_program
+
+    source = generate_program(units)
+    python_ast = ast.parse(source)
+    # Source AST nodes are a stable unit of work across revisions of the generators
+    nodes = sum(1 for _ in ast.walk(python_ast))
+    custom_ast = CustomNodeConverter().visit(python_ast)
+
+    ir_times, codegen_times = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        ir_generator = IRGenerator()
+        ir_generator.generate(custom_ast)
+        ir_times.append(time.perf_counter() - start)
+        ir = ir_generator.get_instructions()
+
+        start = time.perf_counter()
+        CodeGenerator().generate(ir)
+        codegen_times.append(time.perf_counter() - start)
+
+    return {
+        'source_lines': source.count('\n'),
+        'ast_nodes': nodes,
+        'ir_generator_ns_per_node': min(ir_times) / nodes * 1e9,
+        'code_generator_ns_per_node': min(codegen_times) / nodes * 1e9,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--units', type=int, default=500, help="Function/statement units in the synthetic corpus")
+    parser.add_argument('--repeat', type=int, default=5, help="Runs per stage; the fastest is reported")
+    parser.add_argument('--baseline', default=None, help="Git revision to compare against")
+    parser.add_argument('--src', default=REPO_ROOT, help=argparse.SUPPRESS)
+    parser.add_argument('--json', action='store_true', help="Print raw JSON results")
+    args = parser.parse_args()
+
+    current = measure(args.src, args.units, args.repeat)
+    if args.json:
+        print(json.dumps(current))
+        return
+
+    print(f"Corpus: {current['source_lines']} lines, {current['ast_nodes']} AST nodes")
+    rows = [('current', current)]
+    if args.baseline:
+        baseline = measure_revision(__file__, args.baseline, ['--units', str(args.units), '--repeat', str(args.repeat)])
+        rows.insert(0, (args.baseline, baseline))
+    print(f"{'revision':<12} {'IRGenerator ns/node':>20} {'CodeGenerator ns/node':>22}")
+    for name, result in rows:
+        print(f"{name:<12} {result['ir_generator_ns_per_node']:>20.1f} {result['code_generator_ns_per_node']:>22.1f}")
+
+
+if __name__ == "__main__":
+    main()
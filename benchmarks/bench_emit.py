@@ -0,0 +1,78 @@
+"""Peak memory of generating C++ as one string against streaming it to a file.
+
+Run from the repository root:
+    python benchmarks/bench_emit.py [--units N ...] [--repeat R]
+
+For each corpus size the IR is generated once up front. "string" is CodeGenerator.generate
+plus get_cpp_code followed by a write of the result, as batch conversion used to do;
+"stream" is CodeGenerator.write_cpp into the same kind of file. Peak memory is the
+tracemalloc peak of that step alone, so it leaves out the IR both start from.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(1, BENCH_DIR)
+
+from code_generator import CodeGenerator
+from pipeline import generate_ir
+from synthetic import generate_program
+
+
+def emit_string(ir, path):
+    code_generator = CodeGenerator()
+    code_generator.generate(ir)
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write(code_generator.get_cpp_code())
+
+
+def emit_stream(ir, path):
+    with open(path, 'w', encoding='utf-8') as file:
+        CodeGenerator().write_cpp(ir, file)
+
+
+def measure(emit, ir, path, repeat):
+    # Fastest wall time over repeat runs, then the tracemalloc peak of one more
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        emit(ir, path)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    emit(ir, path)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--units', type=int, nargs='+', default=[250, 1000, 4000],
+                        help="Function/statement units of each synthetic corpus")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per mode; the fastest is reported")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        paths = {name: os.path.join(temp_dir, name + '.cpp') for name in ('string', 'stream')}
+        print(f"{'units':>6} {'output KiB':>11} {'mode':<7} {'ms':>8} {'peak KiB':>10}")
+        for units in args.units:
+            ir = generate_ir(generate_program(units))
+            for name, emit in (('string', emit_string), ('stream', emit_stream)):
+                seconds, peak = measure(emit, ir, paths[name], args.repeat)
+                size = os.path.getsize(paths[name])
+                print(f"{units:>6} {size / 1024:>11.0f} {name:<7} {seconds * 1000:>8.1f} {peak / 1024:>10.0f}")
+            with open(paths['string'], 'rb') as first, open(paths['stream'], 'rb') as second:
+                if first.read() != second.read():
+                    print(f"{units:>6} outputs differ")
+
+
+if __name__ == "__main__":
+    main()
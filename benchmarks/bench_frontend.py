@@ -0,0 +1,65 @@
+"""Throughput and memory of the cpython and native front ends.
+
+Run from the repository root:
+    python benchmarks/bench_frontend.py [--units N | --source FILE] [--repeat R]
+
+The cpython front end is ast.parse, whose tree IRGenerator lowers directly; the native one
+is TokenBuffer, Parser and SemanticAnalyzer, which build the custom AST. "front end" times
+only that step and "to IR" adds IR generation. Peak memory is the tracemalloc peak while
+the source is lowered to IR. The C++ both produce is compared too.
+"""
+import argparse
+import os
+import sys
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(1, BENCH_DIR)
+
+from pipeline import FRONTENDS, convert_source, generate_ir, parse_source
+from common import best_time
+from synthetic import generate_program
+
+
+def measure(frontend, source, repeat):
+    # Time the front end alone and up to IR, then take the memory peak of one more run to IR
+    parse_seconds = best_time(lambda: parse_source(source, frontend=frontend), repeat)
+    ir_seconds = best_time(lambda: generate_ir(source, frontend=frontend), repeat)
+
+    tracemalloc.start()
+    generate_ir(source, frontend=frontend)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {'frontend': frontend, 'parse_seconds': parse_seconds, 'ir_seconds': ir_seconds, 'peak_bytes': peak}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--units', type=int, default=1000, help="Function/statement units in the synthetic corpus")
+    parser.add_argument('--source', default=None, help="Convert this file instead of a synthetic corpus")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per front end; the fastest is reported")
+    args = parser.parse_args()
+
+    if args.source:
+        with open(args.source, 'r', encoding='utf-8') as file:
+            source = file.read()
+    else:
+        source = generate_program(args.units)
+    lines = source.count('\n')
+
+    outputs = {frontend: convert_source(source, frontend=frontend) for frontend in FRONTENDS}
+    results = [measure(frontend, source, args.repeat) for frontend in FRONTENDS]
+
+    print(f"Corpus: {lines} lines, {len(source) / 1e6:.2f} MB")
+    print(f"{'front end':<10} {'front end lines/s':>18} {'to IR lines/s':>14} {'peak KiB':>10}")
+    for result in results:
+        print(f"{result['frontend']:<10} {lines / result['parse_seconds']:>18,.0f} "
+              f"{lines / result['ir_seconds']:>14,.0f} {result['peak_bytes'] / 1024:>10.0f}")
+    same = len(set(outputs.values())) == 1
+    print(f"Generated C++ identical: {'yes' if same else 'no'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Token throughput of lexer.tokenize against the streaming lexer.iter_tokens.
+
+Run from the repository root:
+    python benchmarks/bench_lexer.py [--units N | --source FILE] [--repeat R]
+
+iter_tokens is measured on an in-memory string and on a file read in chunks. Peak memory
+is the tracemalloc peak while every token is consumed; tokenize builds the whole list,
+iter_tokens keeps only the token being handled and TokenBuffer keeps every token in arrays.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(1, BENCH_DIR)
+
+from lexer import TokenBuffer, tokenize, iter_tokens
+from synthetic import generate_program
+
+
+def _consume(tokens):
+    # Walk every token without keeping any of them
+    count = 0
+    for _ in tokens:
+        count += 1
+    return count
+
+
+def measure(name, run, repeat):
+    # Best wall time over repeat runs, then one more run under tracemalloc for the peak
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {'name': name, 'tokens': count, 'seconds': best, 'peak_bytes': peak}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--units', type=int, default=2000, help="Function/statement units in the synthetic corpus")
+    parser.add_argument('--source', default=None, help="Tokenize this file instead of a synthetic corpus")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per tokenizer; the fastest is reported")
+    args = parser.parse_args()
+
+    if args.source:
+        with open(args.source, 'r', encoding='utf-8') as file:
+            source = file.read()
+    else:
+        source = generate_program(args.units)
+    with tempfile.NamedTemporaryFile('w', suffix='.py', delete=False, encoding='utf-8') as file:
+        file.write(source)
+        path = file.name
+
+    def run_stream():
+        with open(path, 'r', encoding='utf-8') as stream:
+            return _consume(iter_tokens(stream))
+
+    try:
+        results = [
+            measure('tokenize', lambda: len(tokenize(source)), args.repeat),
+            measure('iter_tokens(str)', lambda: _consume(iter_tokens(source)), args.repeat),
+            measure('iter_tokens(file)', run_stream, args.repeat),
+            measure('TokenBuffer', lambda: len(TokenBuffer.from_source(source)), args.repeat),
+        ]
+    finally:
+        os.unlink(path)
+
+    print(f"Corpus: {source.count(chr(10))} lines, {len(source) / 1e6:.1f} MB")
+    print(f"{'tokenizer':<20} {'tokens':>9} {'tokens/s':>12} {'MB/s':>7} {'peak KiB':>10}")
+    for result in results:
+        print(f"{result['name']:<20} {result['tokens']:>9} {result['tokens'] / result['seconds']:>12,.0f} "
+              f"{len(source) / result['seconds'] / 1e6:>7.1f} {result['peak_bytes'] / 1024:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
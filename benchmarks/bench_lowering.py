@@ -0,0 +1,80 @@
+"""Cost of lowering a Python AST to IR directly against going through CustomNodeConverter.
+
+Run from the repository root:
+    python benchmarks/bench_lowering.py [--units N] [--repeat R]
+
+"two-pass" is the former pipeline: CustomNodeConverter builds the custom AST and
+IRGenerator lowers that. "direct" hands the ast.parse tree to IRGenerator. ast.parse is
+done once up front and is not timed. Peak memory is the tracemalloc peak above the
+Python AST while lowering, and both paths must produce equal IR.
+"""
+import argparse
+import ast
+import os
+import sys
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(1, BENCH_DIR)
+
+from custom_node_converter import CustomNodeConverter
+from ir_generator import IRGenerator
+from synthetic import generate_program
+
+
+def two_pass(python_ast):
+    ir_generator = IRGenerator()
+    ir_generator.generate(CustomNodeConverter().visit(python_ast))
+    return ir_generator.get_instructions()
+
+
+def direct(python_ast):
+    ir_generator = IRGenerator()
+    ir_generator.generate(python_ast)
+    return ir_generator.get_instructions()
+
+
+def measure(name, lower, python_ast, repeat):
+    # Best wall time over repeat runs, then one more run under tracemalloc for the peak
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        lower(python_ast)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    ir = lower(python_ast)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {'name': name, 'seconds': best, 'peak_bytes': peak, 'ir': ir}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--units', type=int, default=2000, help="Function/statement units in the synthetic corpus")
+    parser.add_argument('--repeat', type=int, default=5, help="Runs per path; the fastest is reported")
+    args = parser.parse_args()
+
+    source = generate_program(args.units)
+    lines = source.count('\n')
+    python_ast = ast.parse(source)
+
+    results = [
+        measure('two-pass', two_pass, python_ast, args.repeat),
+        measure('direct', direct, python_ast, args.repeat),
+    ]
+
+    print(f"Corpus: {lines} lines")
+    print(f"{'path':<10} {'ms':>9} {'lines/s':>12} {'peak KiB':>10}")
+    for result in results:
+        print(f"{result['name']:<10} {result['seconds'] * 1000:>9.1f} {lines / result['seconds']:>12,.0f} "
+              f"{result['peak_bytes'] / 1024:>10.0f}")
+    print(f"IR identical: {'yes' if results[0]['ir'] == results[1]['ir'] else 'no'}")
+
+
+if __name__ == "__main__":
+    main()
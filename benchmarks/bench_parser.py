@@ -0,0 +1,106 @@
+"""Expression parsing speed of parser.Parser on deeply nested and long expressions.
+
+Run from the repository root:
+    python benchmarks/bench_parser.py [--depth N] [--length N] [--repeat R] [--baseline GIT_REV]
+
+Each case is one assignment whose right-hand side is deeply parenthesized, a long flat
+operator chain or a balanced operator tree. Tokens are lexed once up front, so only the
+parser is timed. Only '+', '-', '*', '/' and comparisons are used, so an older parser can
+run the same cases with --baseline.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from common import measure_revision
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+
+
+def nested_parens(depth):
+    # x = (((...(1 + 1)...) + 1) + 1)
+    expr = "1"
+    for _ in range(depth):
+        expr = f"({expr} + 1)"
+    return expr
+
+
+def flat_chain(length):
+    # x = a + b * c - d / e < ... over length operands
+    operators = ['+', '*', '-', '/', '<', '+', '*', '==']
+    parts = ["a0"]
+    for i in range(1, length):
+        parts.append(operators[i % len(operators)])
+        parts.append(f"a{i}")
+    return " ".join(parts)
+
+
+def balanced_tree(depth):
+    # Operands alternate between parenthesized halves, giving a full binary tree
+    if depth == 0:
+        return "v"
+    half = balanced_tree(depth - 1)
+    return f"({half}) * ({half}) - {half}"
+
+
+def cases(depth, length):
+    return [
+        ('nested parens', f"x = {nested_parens(depth)}\n", 20),
+        ('flat chain', f"x = {flat_chain(length)}\n", 20),
+        ('balanced tree', f"x = {balanced_tree(6)}\n", 20),
+    ]
+
+
+def measure(src_dir, depth, length, repeat):
+    # Import the lexer and parser from src_dir and time parsing each case
+    sys.path.insert(0, src_dir)
+    from lexer import tokenize
+    from parser import Parser
+
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), depth * 10 + 1000))
+    results = []
+    for name, source, loops in cases(depth, length):
+        tokens = tokenize(source)
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(loops):
+                Parser(tokens).parse()
+            elapsed = (time.perf_counter() - start) / loops
+            best = elapsed if best is None else min(best, elapsed)
+        results.append({'name': name, 'tokens': len(tokens), 'seconds': best})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--depth', type=int, default=200, help="Nesting depth of the parenthesized case")
+    parser.add_argument('--length', type=int, default=5000, help="Operands in the flat chain case")
+    parser.add_argument('--repeat', type=int, default=5, help="Runs per case; the fastest is reported")
+    parser.add_argument('--baseline', default=None, help="Git revision to compare against")
+    parser.add_argument('--src', default=REPO_ROOT, help=argparse.SUPPRESS)
+    parser.add_argument('--json', action='store_true', help="Print raw JSON results")
+    args = parser.parse_args()
+
+    current = measure(args.src, args.depth, args.length, args.repeat)
+    if args.json:
+        print(json.dumps(current))
+        return
+
+    rows = [('current', current)]
+    if args.baseline:
+        baseline = measure_revision(__file__, args.baseline, ['--depth', str(args.depth), '--length', str(args.length),
+                                                              '--repeat', str(args.repeat)])
+        rows.insert(0, (args.baseline, baseline))
+    print(f"{'revision':<12} {'case':<14} {'tokens':>7} {'ms/parse':>9} {'tokens/s':>12}")
+    for revision, results in rows:
+        for result in results:
+            print(f"{revision:<12} {result['name']:<14} {result['tokens']:>7} {result['seconds'] * 1000:>9.2f} "
+                  f"{result['tokens'] / result['seconds']:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""End-to-end conversion throughput, per-stage times and peak RSS over corpus sizes.
+
+Run from the repository root:
+    python benchmarks/bench_pipeline.py [--lines N ...] [--frontend NAME ...] [-O LEVEL]
+                                        [--repeat R] [--save FILE] [--compare FILE] [--threshold 0.10]
+
+For each size a synthetic corpus of exactly that many lines (synthetic.generate_corpus) is
+written to a temporary file and converted by the full pipeline, parse to IR, the IR passes
+of -O and C++, in a fresh interpreter per run, so the peak RSS of one run is not inflated by an earlier one.
+The fastest of --repeat runs is reported, with its per-stage wall times from
+ConversionStats (memory is not traced, so the times are not skewed by tracemalloc).
+
+--save writes the results as a JSON baseline. --compare reads one and flags every size and
+front end whose lines/s dropped, whose peak RSS grew, or whose stage got slower by more
+than --threshold; times under --min-seconds in the baseline are too noisy to judge and are
+only shown. The exit status is 1 if anything regressed.
+
+The default sizes stop at 100k lines; 1M lines (--lines 1000000) needs several GiB of RAM
+with the cpython front end.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(1, BENCH_DIR)
+
+from pass_manager import DEFAULT_OPT_LEVEL, OPT_LEVELS, PassManager
+from pipeline import FRONTENDS, generate_cpp, generate_ir, optimize_ir
+from stage_stats import ConversionStats
+from synthetic import generate_corpus
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows; peak RSS is then left out
+    resource = None
+
+
+def peak_rss_bytes():
+    # High-water mark of this process's resident set
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def run_once(path, frontend, opt_level):
+    # Convert one corpus file in this process and return its measurements
+    with open(path, 'r', encoding='utf-8') as file:
+        source = file.read()
+    stats = ConversionStats(trace_memory=False)
+    start = time.perf_counter()
+    progress = stats.track()
+    optimizer = PassManager.for_level(opt_level)
+    generate_cpp(optimize_ir(generate_ir(source, progress, frontend), progress, optimizer), progress)
+    seconds = time.perf_counter() - start
+    stats.finish()
+    return {
+        'seconds': seconds,
+        'cpu_seconds': stats.cpu_seconds,
+        'peak_rss_bytes': peak_rss_bytes(),
+        'stages': {stage.name: stage.wall_seconds for stage in stats.stages},
+        'node_deltas': {pass_stats.name: pass_stats.node_delta for pass_stats in optimizer.stats},
+    }
+
+
+def measure(path, lines, frontend, opt_level, repeat):
+    # Best of repeat runs, each in a fresh interpreter
+    best = None
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--run', path, '--frontend', frontend, f'-O{opt_level}'],
+            check=True, capture_output=True, text=True).stdout
+        result = json.loads(output)
+        if best is None or result['seconds'] < best['seconds']:
+            best = result
+    best.update({'lines': lines, 'frontend': frontend, 'opt_level': opt_level,
+                 'lines_per_second': lines / best['seconds']})
+    return best
+
+
+def print_results(results):
+    print(f"{'lines':>9} {'front end':<9} {'-O':>2} {'ms':>10} {'lines/s':>11} {'peak RSS MiB':>13}  stages (ms)")
+    for result in results:
+        rss = result['peak_rss_bytes']
+        rss_text = f"{rss / (1024 * 1024):>13.1f}" if rss is not None else f"{'-':>13}"
+        stages = ", ".join(f"{name} {seconds * 1000:.1f}" for name, seconds in result['stages'].items())
+        print(f"{result['lines']:>9} {result['frontend']:<9} {result['opt_level']:>2} {result['seconds'] * 1000:>10.1f} "
+              f"{result['lines_per_second']:>11,.0f} {rss_text}  {stages}")
+
+
+def compare(results, baseline, threshold, min_seconds):
+    # Print how each result moved against the baseline and return the regressions found
+    previous = {(entry['lines'], entry['frontend'], entry.get('opt_level', DEFAULT_OPT_LEVEL)): entry
+                for entry in baseline['results']}
+    regressions = []
+    print(f"\nAgainst baseline (threshold {threshold:.0%}):")
+    for result in results:
+        key = (result['lines'], result['frontend'], result['opt_level'])
+        old = previous.get(key)
+        if old is None:
+            print(f"{key[0]:>9} {key[1]:<9} {key[2]:>2} not in baseline")
+            continue
+
+        checks = []
+        if old['seconds'] >= min_seconds:
+            checks.append(('lines/s', old['lines_per_second'], result['lines_per_second'], True))
+        if old.get('peak_rss_bytes') and result['peak_rss_bytes']:
+            checks.append(('peak RSS', old['peak_rss_bytes'], result['peak_rss_bytes'], False))
+        for name, seconds in result['stages'].items():
+            if old['stages'].get(name, 0) >= min_seconds:
+                checks.append((name, old['stages'][name], seconds, False))
+
+        notes = []
+        for name, before, after, higher_is_better in checks:
+            change = after / before - 1
+            worse = -change if higher_is_better else change
+            flag = ""
+            if worse > threshold:
+                flag = " REGRESSION"
+                regressions.append((key, name, change))
+            notes.append(f"{name} {change:+.1%}{flag}")
+        print(f"{key[0]:>9} {key[1]:<9} {key[2]:>2} " + (", ".join(notes) if notes else "too fast to compare"))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lines', type=int, nargs='+', default=[10, 100, 1000, 10000, 100000],
+                        help="Corpus sizes in lines")
+    parser.add_argument('--frontend', choices=FRONTENDS, nargs='+', default=list(FRONTENDS),
+                        help="Front ends to measure")
+    parser.add_argument('-O', dest='opt_level', type=int, choices=sorted(OPT_LEVELS), default=DEFAULT_OPT_LEVEL,
+                        help="IR optimization level of the conversions")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per size; the fastest is reported")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the synthetic corpus")
+    parser.add_argument('--save', default=None, help="Write the results to this JSON baseline")
+    parser.add_argument('--compare', default=None, help="Compare against this JSON baseline")
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help="Relative slowdown or growth counted as a regression")
+    parser.add_argument('--min-seconds', type=float, default=0.05,
+                        help="Baseline times below this are not judged")
+    parser.add_argument('--run', default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        print(json.dumps(run_once(args.run, args.frontend[0], args.opt_level)))
+        return 0
+
+    results = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for lines in args.lines:
+            path = os.path.join(temp_dir, f"corpus_{lines}.py")
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write(generate_corpus(lines, args.seed))
+            for frontend in args.frontend:
+                results.append(measure(path, lines, frontend, args.opt_level, args.repeat))
+    print_results(results)
+
+    if args.save:
+        baseline = {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'results': results,
+        }
+        with open(args.save, 'w', encoding='utf-8') as file:
+            json.dump(baseline, file, indent=2)
+        print(f"\nBaseline written to {args.save}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.threshold, args.min_seconds)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+            return 1
+        print("\nNo regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
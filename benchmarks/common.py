@@ -0,0 +1,42 @@
+"""Helpers shared by the benchmark scripts."""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+
+
+def measure_revision(script, rev, arguments):
+    """Run a benchmark script against the converter modules of git revision rev.
+
+    The revision's sources are exported with git archive and script is run on them in a
+    fresh interpreter with --src and --json added to arguments; its JSON results are
+    returned. A revision whose modules fail on the benchmark's input, e.g. one older than a
+    construct the input uses, exits with the error it raised.
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        archive = subprocess.run(['git', 'archive', rev], cwd=REPO_ROOT, check=True, capture_output=True).stdout
+        subprocess.run(['tar', '-x', '-C', temp_dir], input=archive, check=True)
+        result = subprocess.run(
+            [sys.executable, os.path.abspath(script), '--src', temp_dir, *arguments, '--json'],
+            capture_output=True, text=True)
+    if result.returncode != 0:
+        lines = result.stderr.strip().splitlines()
+        error = lines[-1] if lines else f"exit status {result.returncode}"
+        raise SystemExit(f"Revision {rev} is not supported by {os.path.basename(script)}: {error}")
+    return json.loads(result.stdout)
+
+
+def best_time(run, repeat):
+    # Fastest wall time over repeat runs
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
@@ -0,0 +1,123 @@
+import random
+
+# Building blocks for synthetic programs in the subset the converter supports
+
+
+def _function(index, rng):
+    # A small function mixing arithmetic, branches, loops and string formatting
+    a, b = rng.randint(1, 9), rng.randint(10, 99)
+    return (
+        f"def compute_{index}(x, y):\n"
+        f"    total = x * {a} + y - {b}\n"
+        f"    if total > {b}:\n"
+        f"        total = total - x\n"
+        f"    elif total < {a}:\n"
+        f"        total = total + y\n"
+        f"    else:\n"
+        f"        total = total * 2\n"
+        f"    for i in range({a}, {b}):\n"
+        f"        total = total + i % {a + 1}\n"
+        f"    while total > {b * 10}:\n"
+        f"        total = total / 2\n"
+        f"    message = f\"compute_{index}: {{total}}\"\n"
+        f"    print(message)\n"
+        f"    return total\n"
+        f"\n"
+    )
+
+
+def _statements(index, rng):
+    # Top-level code calling the functions and using lists and input
+    a = rng.randint(1, 100)
+    return (
+        f"value_{index} = compute_{index}({a}, {a * 2})\n"
+        f"items_{index} = [{a}, {a + 1}, {a + 2}, {a + 3}]\n"
+        f"for item in items_{index}:\n"
+        f"    print(item)\n"
+        f"label_{index} = \"run \" + str(value_{index})\n"
+        f"print(label_{index})\n"
+        f"print(items_{index}[0] ** 2)\n"
+        f"\n"
+    )
+
+
+def generate_program(units, seed=0, with_input=True):
+    """Return Python source with the given number of function/statement units."""
+    rng = random.Random(seed)
+    parts = []
+    if with_input:
+        parts.append("count = int(input(\"How many? \"))\nname = input(\"Name: \")\n\n")
+    for index in range(units):
+        parts.append(_function(index, rng))
+        parts.append(_statements(index, rng))
+    return "".join(parts)
+
+
+def _unit(index, rng):
+    # A function followed by the top-level code that calls it
+    return _function(index, rng) + _statements(index, rng)
+
+
+def _nested_ifs(index, rng):
+    # Two levels of if/elif/else on the count read at the top
+    a = rng.randint(1, 50)
+    return (
+        f"level_{index} = count + {a}\n"
+        f"if level_{index} > {a}:\n"
+        f"    if level_{index} % 2 == 0:\n"
+        f"        print(f\"{{name}} even {{level_{index}}}\")\n"
+        f"    elif level_{index} % 3 == 0:\n"
+        f"        print(\"divisible by three\")\n"
+        f"    else:\n"
+        f"        level_{index} = level_{index} - 1\n"
+        f"else:\n"
+        f"    level_{index} = 0\n"
+        f"\n"
+    )
+
+
+def _list_loop(index, rng):
+    # A list literal scanned for its largest element
+    values = ", ".join(str(rng.randint(0, 999)) for _ in range(rng.randint(3, 8)))
+    return (
+        f"scores_{index} = [{values}]\n"
+        f"best_{index} = 0\n"
+        f"for score in scores_{index}:\n"
+        f"    if score > best_{index}:\n"
+        f"        best_{index} = score\n"
+        f"print(f\"best of block {index}: {{best_{index}}}\")\n"
+        f"\n"
+    )
+
+
+def _question(index, rng):
+    # input() with a prompt, echoed back
+    return (
+        f"answer_{index} = input(\"Question {index}? \")\n"
+        f"print(\"You said \" + answer_{index})\n"
+    )
+
+
+_BLOCKS = [_unit, _nested_ifs, _list_loop, _question]
+
+
+def generate_corpus(lines, seed=0):
+    """Return Python source of exactly max(lines, 3) lines mixing every block kind.
+
+    Blocks are picked at random; when the next one would overshoot, one-line
+    assignments fill up the rest, so any size from ten lines up can be asked for.
+    """
+    rng = random.Random(seed)
+    parts = ["count = int(input(\"How many? \"))\nname = input(\"Name: \")\n\n"]
+    total = 3
+    index = 0
+    while total < lines:
+        block = rng.choice(_BLOCKS)(index, rng)
+        block_lines = block.count("\n")
+        if total + block_lines > lines:
+            block = f"step_{index} = {index} * 2\n"
+            block_lines = 1
+        parts.append(block)
+        total += block_lines
+        index += 1
+    return "".join(parts)
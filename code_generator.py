@@ -1,3 +1,39 @@
+import shutil
+import tempfile
+from ir_nodes import *
+from type_inference import param_is_read_only
+
+
+class CodeGenerationError(Exception):
+    # Raised when C++ generation fails, with the IR node being processed in the message
+    pass
+
+
+def code_text(code):
+    """Text of generated code held as a string or nested lists of string fragments."""
+    if isinstance(code, str):
+        return code
+    pieces = []
+    stack = [code]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            pieces.append(item)
+        else:
+            stack.extend(reversed(item))
+    return ''.join(pieces)
+
+
+def _code_start(code, operand):
+    # First fragment of an operation's code, which starts with that of the operand value
+    # (code, numeric, C++ type, start) when it does not start with a fragment of its own
+    while not isinstance(code, str):
+        if code is operand[0]:
+            return operand[3]
+        code = code[0]
+    return code
+
+
 class CodeGenerator:
     def __init__(self):
         # Initialize the code generator with empty state
@@ -5,393 +41,354 @@ class CodeGenerator:
         self.functions = []  # Function definitions to be placed outside main()
         self.declared_vars = {}
         self.indentation_level = 1  # Main function indentation level
-        self.error_context = ""
+        self._context = []  # (kind, IR node) pairs being generated, innermost last
+        self.line_offset = 0  # added to IR line numbers in errors, for IR of part of a file
+
+    @property
+    def error_context(self):
+        # Describe the innermost node being generated; only formatted when needed
+        if not self._context:
+            return ""
+        kind, node = self._context[-1]
+        try:
+            text = repr(node)
+        except RecursionError:
+            text = f"{type(node).__name__}(...)"
+        if len(text) > 200:
+            text = text[:197] + "..."
+        context = f"{kind} {text}"
+        line = getattr(node, 'lineno', None)
+        if line is not None:
+            context += f" at line {line + self.line_offset}"
+        return context
 
     def generate(self, ir):
         try:
             # Process list of instructions
             if isinstance(ir, list):
                 for stmt in ir:
+                    self._context.append(('statement', stmt))
                     self.generate(stmt)
+                    self._context.pop()
 
-            # Process tuple instruction
-            elif isinstance(ir, tuple):
-                instruction_type = ir[0]
+            # Process IR node through the opcode dispatch table
+            elif isinstance(ir, IRNode):
+                handler = self._HANDLERS[ir.opcode]
+                if handler is not None:
+                    return handler(self, ir)
 
-                # Variable assignment
-                if instruction_type == 'assign':
-                    var_name = ir[1]
-                    expr = self.generate_expr(ir[2])
-                    
-                    # Special handling for boolean values
-                    if isinstance(ir[2], tuple) and ir[2][0] == 'const' and isinstance(ir[2][1], bool):
-                        var_type = 'bool'
-                    else:
-                        var_type = self.infer_var_type(ir[2])
-                    
-                    # Check if expression is from an input operation
-                    if isinstance(ir[2], tuple) and ir[2][0] == 'input':
-                        prompt = self.generate_expr(ir[2][1])
-                        if prompt and prompt != '""':
-                            self.code.append(self._indent(f"cout << {prompt};"))
-                        
-                        # If variable is already declared, read directly into it
-                        if var_name in self.declared_vars:
-                            if self.declared_vars[var_name] == 'int':
-                                self.code.append(self._indent(f"cin >> {var_name};"))
-                            elif self.declared_vars[var_name] == 'double':
-                                self.code.append(self._indent(f"cin >> {var_name};"))
-                            else:  # string or other types
-                                self.code.append(self._indent(f"cin >> {var_name};"))
-                        else:
-                            # If variable not declared, create with appropriate type
-                            self.code.append(self._indent(f"string {var_name};"))
-                            self.code.append(self._indent(f"cin >> {var_name};"))
-                            self.declared_vars[var_name] = 'string'
-                        return
-                    
-                    # For int(input()) pattern
-                    if isinstance(ir[2], tuple) and ir[2][0] == 'function_call' and ir[2][1] == 'int' and \
-                       len(ir[2][2]) == 1 and isinstance(ir[2][2][0], tuple) and ir[2][2][0][0] == 'input':
-                        prompt = self.generate_expr(ir[2][2][0][1]) if len(ir[2][2][0]) > 1 else '""'
-                        if prompt and prompt != '""':
-                            self.code.append(self._indent(f"cout << {prompt};"))
-                        
-                        # Declare variable if not already declared
-                        if var_name not in self.declared_vars:
-                            self.code.append(self._indent(f"int {var_name};"))
-                            self.declared_vars[var_name] = 'int'
-                        # Read directly into the variable
-                        self.code.append(self._indent(f"cin >> {var_name};"))
-                        return
-
-                    # Normal variable assignment
-                    if var_name not in self.declared_vars:
-                        self.code.append(self._indent(f"{var_type} {var_name} = {expr};"))
-                        self.declared_vars[var_name] = var_type
-                    else:
-                        self.code.append(self._indent(f"{var_name} = {expr};"))
+            else:
+                raise Exception(f"Unknown IR format: {ir}")
+                
+        except CodeGenerationError:
+            raise
+        except Exception as e:
+            # The context stack still holds the path to the failing node at this point
+            raise CodeGenerationError(f"Code generation error: {str(e)} in {self.error_context}") from e
 
-                # Print statement
-                elif instruction_type == 'print':
-                    expr = self.generate_expr(ir[1])
-                    
-                    # Handle cases where expression is already a string conversion
-                    if isinstance(expr, tuple) and expr[0] == 'already_string':
-                        expr = expr[1]  # Extract the actual string expression
-                    
-                    # We want to use the simplest possible print statement
-                    self.code.append(self._indent(f"cout << {expr} << endl;"))
-
-                # If-else statement
-                elif instruction_type == 'if':
-                    condition = self.generate_expr(ir[1])
-                    true_branch = self.generate_block(ir[2])
-                    false_branch = self.generate_block(ir[3]) if ir[3] else []
-
-                    self.code.append(self._indent(f"if ({condition}) {{"))
-                    self.indentation_level += 1
-                    self.code.extend(true_branch)
-                    self.indentation_level -= 1
-                    self.code.append(self._indent("}"))
-
-                    if false_branch:
-                        # Check if false branch starts with another if statement
-                        # This indicates an elif in Python
-                        if len(ir[3]) > 0 and isinstance(ir[3][0], tuple) and ir[3][0][0] == 'if':
-                            # This is an "elif" in Python, which becomes "else if" in C++
-                            nested_if = ir[3][0]
-                            nested_condition = self.generate_expr(nested_if[1])
-                            nested_true = self.generate_block(nested_if[2])
-                            nested_false = self.generate_block(nested_if[3]) if len(nested_if) > 3 and nested_if[3] else []
-                            
-                            self.code.append(self._indent(f"else if ({nested_condition}) {{"))
-                            self.indentation_level += 1
-                            self.code.extend(nested_true)
-                            self.indentation_level -= 1
-                            self.code.append(self._indent("}"))
-                            
-                            if nested_false:
-                                self.code.append(self._indent("else {"))
-                                self.indentation_level += 1
-                                self.code.extend(nested_false)
-                                self.indentation_level -= 1
-                                self.code.append(self._indent("}"))
-                        else:
-                            # Regular else block
-                            self.code.append(self._indent("else {"))
-                            self.indentation_level += 1
-                            self.code.extend(false_branch)
-                            self.indentation_level -= 1
-                            self.code.append(self._indent("}"))
-
-                # While loop
-                elif instruction_type == 'while':
-                    condition = self.generate_expr(ir[1])
-                    body = self.generate_block(ir[2])
-
-                    self.code.append(self._indent(f"while ({condition}) {{"))
-                    self.indentation_level += 1
-                    self.code.extend(body)
-                    self.indentation_level -= 1
-                    self.code.append(self._indent("}"))
-
-                # For loop (with special handling for range)
-                elif instruction_type == 'for':
-                    var_name = ir[1]
-                    iterable = self.generate_expr(ir[2])
-                    body = self.generate_block(ir[3])
-
-                    if self.is_range_call(ir[2]):
-                        range_info = self.extract_range_info(ir[2])
-                        if len(range_info) == 1:
-                            # range(stop)
-                            self.code.append(self._indent(f"for (int {var_name} = 0; {var_name} < {range_info[0]}; ++{var_name}) {{"))
-                        elif len(range_info) == 2:
-                            # range(start, stop)
-                            self.code.append(self._indent(f"for (int {var_name} = {range_info[0]}; {var_name} < {range_info[1]}; ++{var_name}) {{"))
-                        elif len(range_info) == 3:
-                            # range(start, stop, step)
-                            step = range_info[2]
-                            if step.startswith('-'):
-                                self.code.append(self._indent(f"for (int {var_name} = {range_info[0]}; {var_name} > {range_info[1]}; {var_name} -= {step[1:]}) {{"))
-                            else:
-                                self.code.append(self._indent(f"for (int {var_name} = {range_info[0]}; {var_name} < {range_info[1]}; {var_name} += {step}) {{"))
-                    else:
-                        # For non-range iterables
-                        self.code.append(self._indent(f"for (auto& {var_name} : {iterable}) {{"))
-                        
-                    self.indentation_level += 1
-                    self.code.extend(body)
-                    self.indentation_level -= 1
-                    self.code.append(self._indent("}"))
-
-                # Binary operation
-                elif instruction_type == 'binop':
-                    left = self.generate_expr(ir[2])
-                    right = self.generate_expr(ir[3])
-                    operator = ir[1]
-                    
-                    # Special handling for string concatenation
-                    if operator == '+':
-                        # Determine if left and right are strings or need conversion
-                        left_is_string = self._is_string_literal_or_var(ir[2])
-                        right_is_string = self._is_string_literal_or_var(ir[3])
-                        
-                        # Generate appropriate concatenation expressions
-                        if left_is_string and right_is_string:
-                            # Both are strings, direct concatenation
-                            return f"{left} + {right}"
-                        elif left_is_string:
-                            # Right needs conversion (if not already a string)
-                            if isinstance(ir[3], tuple) and ir[3][0] == 'function_call' and ir[3][1] == 'str':
-                                # This is str() call - use the argument directly with to_string if needed
-                                if len(ir[3][2]) == 1:
-                                    arg = ir[3][2][0]
-                                    if isinstance(arg, tuple) and arg[0] == 'const' and isinstance(arg[1], str):
-                                        # String constant inside str() - no need for to_string
-                                        return f"{left} + {self.generate_expr(arg)}"
-                                    else:
-                                        # Non-string inside str() - apply to_string once
-                                        inner_expr = self.generate_expr(arg)
-                                        return f"{left} + to_string({inner_expr})"
-                            elif not self._is_already_string(right):
-                                right = f"to_string({right})"
-                            return f"{left} + {right}"
-                        elif right_is_string:
-                            # Left needs conversion (if not already a string)
-                            if isinstance(ir[2], tuple) and ir[2][0] == 'function_call' and ir[2][1] == 'str':
-                                # This is str() call - use the argument directly with to_string if needed
-                                if len(ir[2][2]) == 1:
-                                    arg = ir[2][2][0]
-                                    if isinstance(arg, tuple) and arg[0] == 'const' and isinstance(arg[1], str):
-                                        # String constant inside str() - no need for to_string
-                                        return f"{self.generate_expr(arg)} + {right}"
-                                    else:
-                                        # Non-string inside str() - apply to_string once
-                                        inner_expr = self.generate_expr(arg)
-                                        return f"to_string({inner_expr}) + {right}"
-                            elif not self._is_already_string(left):
-                                left = f"to_string({left})"
-                            return f"{left} + {right}"
-                        else:
-                            # Both need conversion
-                            if not self._is_already_string(left):
-                                left = f"to_string({left})"
-                            if not self._is_already_string(right):
-                                right = f"to_string({right})"
-                            return f"{left} + {right}"
-                    
-                    # Simple expressions don't need extra parentheses
-                    if operator == '**':
-                        return f"pow({left}, {right})"
-                    elif self._is_simple_expr(left) and self._is_simple_expr(right):
-                        return f"{left} {operator} {right}"
-                    else:
-                        return f"({left} {operator} {right})"
-
-                # Input operation
-                elif instruction_type == 'input':
-                    prompt = self.generate_expr(ir[1])
-                    # Return a placeholder that will be handled in the assignment
-                    return ('input', prompt)
-
-                # Variable reference
-                elif instruction_type == 'var':
-                    return ir[1]
-
-                # Constant value
-                elif instruction_type == 'const':
-                    if isinstance(ir[1], str):
-                        # Escape string literals
-                        escaped = ir[1].replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
-                        return f'"{escaped}"'
-                    elif isinstance(ir[1], bool):
-                        # Convert bool to C++ true/false and make sure it's typed correctly
-                        if ir[1] not in self.declared_vars or self.declared_vars[ir[1]] != 'bool':
-                            # Only add a declaration if not already declared
-                            return "true" if ir[1] else "false"
-                    return str(ir[1])
-
-                # List/vector
-                elif instruction_type == 'list':
-                    elements = [self.generate_expr(elem) for elem in ir[1]]
-                    # Try to determine the element type
-                    if elements:
-                        if all(self.is_numeric(elem) for elem in ir[1]):
-                            if any(isinstance(elem[1], float) for elem in ir[1] if isinstance(elem, tuple) and elem[0] == 'const'):
-                                return f"vector<double>{{{', '.join(elements)}}}"
-                            else:
-                                return f"vector<int>{{{', '.join(elements)}}}"
-                        elif all(self.is_string(elem) for elem in ir[1]):
-                            # Ensure all string elements have quotes
-                            return f"vector<string>{{{', '.join(elements)}}}"
-                        else:
-                            # Mixed type or complex types
-                            return f"vector<auto>{{{', '.join(elements)}}}"
-                    else:
-                        # Empty list
-                        return "vector<auto>{}"
-
-                # Function call
-                elif instruction_type == 'function_call':
-                    func_name = ir[1]
-                    # Make sure arguments are converted to strings before joining
-                    arguments = []
-                    for arg in ir[2]:
-                        arg_expr = self.generate_expr(arg)
-                        # Make sure we have a string
-                        if isinstance(arg_expr, tuple):
-                            arg_expr = str(arg_expr)
-                        arguments.append(str(arg_expr))
-                    
-                    # Special handling for list access
-                    if func_name == "__list_access__" and len(arguments) == 2:
-                        # This is our special marker for list indexing
-                        container = arguments[0]
-                        index = arguments[1]
-                        return f"{container}[{index}]"
-                        
-                    arguments_str = ", ".join(arguments)
-                    
-                    # Handle special function translations
-                    if func_name == 'len':
-                        return f"{arguments_str}.size()"
-                    elif func_name == 'print':
-                        self.code.append(self._indent(f"cout << {arguments_str} << endl;"))
-                        return ""
-                    elif func_name == 'type':
-                        # Special handling for Python's type() function
-                        return f"typeid({arguments_str}).name()"
-                    elif func_name == 'int':
-                        # Handle int conversion with negative number support
-                        return f"stoi({arguments_str})"
-                    elif func_name == 'float':
-                        # Handle float conversion
-                        return f"stod({arguments_str})"
-                    elif func_name == 'str':
-                        # Handle string conversion for C++
-                        # Check the argument type to determine the best way to convert
-                        if len(ir[2]) == 1:
-                            arg = ir[2][0]
-                            if isinstance(arg, tuple):
-                                if arg[0] == 'const':
-                                    # For constants, we can simplify
-                                    if isinstance(arg[1], (int, float)):
-                                        return f"to_string({arguments_str})"
-                                    elif isinstance(arg[1], str):
-                                        # String constants don't need conversion
-                                        return arguments_str
-                                    elif isinstance(arg[1], bool):
-                                        # Convert boolean to string
-                                        return f"({arguments_str} ? \"true\" : \"false\")"
-                                elif arg[0] == 'var':
-                                    var_name = arg[1]
-                                    if var_name in self.declared_vars:
-                                        if self.declared_vars[var_name] in ['int', 'double', 'float']:
-                                            return f"to_string({arguments_str})"
-                                        elif self.declared_vars[var_name] == 'bool':
-                                            return f"({arguments_str} ? \"true\" : \"false\")"
-                                        elif self.declared_vars[var_name] == 'string':
-                                            # No need to convert strings
-                                            return arguments_str
-                                
-                        # Default case: apply to_string
-                        return f"to_string({arguments_str})"
-                    elif func_name == 'bool':
-                        # For 'bool()', create proper C++ boolean casting
-                        if len(ir[2]) == 1 and isinstance(ir[2][0], tuple) and ir[2][0][0] == 'var':
-                            # If it's a variable reference, just cast it directly without to_string
-                            var_name = ir[2][0][1]
-                            return f"bool({var_name})"
-                        else:
-                            # For all other cases use standard bool conversion
-                            return f"bool({arguments_str})"
-                    else:
-                        return f"{func_name}({arguments_str})"
+    def _gen_assign(self, ir):
+        # Variable assignment
+        var_name = ir.target
+        value = ir.value
+        value_op = getattr(value, 'opcode', None)
+        expr = self.generate_expr(value)
+        
+        # Special handling for boolean values
+        if ir.var_type is not None:
+            # The type inferred for the variable over its whole scope
+            var_type = ir.var_type
+        elif value_op == CONST and isinstance(value.value, bool):
+            var_type = 'bool'
+        else:
+            var_type = self.infer_var_type(value)
+        
+        # Check if expression is from an input operation
+        if value_op == INPUT:
+            prompt = self.generate_expr(value.prompt)
+            if prompt and prompt != '""':
+                self.code.append(self._indent(f"cout << {prompt};"))
+            
+            # If variable is already declared, read directly into it
+            if var_name in self.declared_vars:
+                if self.declared_vars[var_name] == 'int':
+                    self.code.append(self._indent(f"cin >> {var_name};"))
+                elif self.declared_vars[var_name] == 'double':
+                    self.code.append(self._indent(f"cin >> {var_name};"))
+                else:  # string or other types
+                    self.code.append(self._indent(f"cin >> {var_name};"))
+            else:
+                # If variable not declared, create with appropriate type
+                self.code.append(self._indent(f"string {var_name};"))
+                self.code.append(self._indent(f"cin >> {var_name};"))
+                self.declared_vars[var_name] = 'string'
+            return
+        
+        # For int(input()) pattern
+        if value_op == CALL and value.func == 'int' and \
+           len(value.args) == 1 and getattr(value.args[0], 'opcode', None) == INPUT:
+            prompt = self.generate_expr(value.args[0].prompt)
+            if prompt and prompt != '""':
+                self.code.append(self._indent(f"cout << {prompt};"))
+            
+            # Declare variable if not already declared
+            if var_name not in self.declared_vars:
+                self.code.append(self._indent(f"int {var_name};"))
+                self.declared_vars[var_name] = 'int'
+            # Read directly into the variable
+            self.code.append(self._indent(f"cin >> {var_name};"))
+            return
 
-                # Function definition
-                elif instruction_type == 'function_def':
-                    name = ir[1]
-                    params = ir[2]
-                    body = self.generate_block(ir[3])
-                    
-                    param_str = ", ".join([f"auto {p}" for p in params])
-                    # Store function definitions separately (outside main)
-                    saved_indent = self.indentation_level
-                    self.indentation_level = 0  # No indentation for functions outside main
-                    
-                    function_code = []
-                    function_code.append(self._indent(f"auto {name}({param_str}) {{"))
-                    self.indentation_level = 1  # Indent function body
-                    function_code.extend(body)
-                    self.indentation_level = 0  # Reset for closing brace
-                    function_code.append(self._indent("}"))
-                    
-                    self.functions.append("\n".join(function_code))
-                    self.indentation_level = saved_indent  # Restore indentation level
+        # Normal variable assignment
+        if var_name not in self.declared_vars:
+            self.code.append(self._indent(f"{var_type} {var_name} = {expr};"))
+            self.declared_vars[var_name] = var_type
+        else:
+            self.code.append(self._indent(f"{var_name} = {expr};"))
+
+    def _gen_print(self, ir):
+        # Print statement; operators binding looser than << are parenthesized
+        expr = self.generate_expr(ir.value)
+        expr = code_text(self._group_operand(expr, ir.value, self._CPP_PRECEDENCE['<<'], right=True))
+        
+        # We want to use the simplest possible print statement
+        self.code.append(self._indent(f"cout << {expr} << endl;"))
+
+    def _gen_if(self, ir):
+        # If-else statement; an else holding a single if is a Python elif and becomes "else if"
+        keyword = "if"
+        while True:
+            condition = self.generate_expr(ir.condition)
+            self.code.append(self._indent(f"{keyword} ({condition}) {{"))
+            self.generate_block(ir.body)
+            self.code.append(self._indent("}"))
+
+            orelse = ir.orelse
+            if orelse and len(orelse) == 1 and getattr(orelse[0], 'opcode', None) == IF:
+                ir = orelse[0]
+                keyword = "else if"
+                continue
+            if orelse:
+                self.code.append(self._indent("else {"))
+                self.generate_block(orelse)
+                self.code.append(self._indent("}"))
+            return
+
+    def _gen_while(self, ir):
+        # While loop
+        condition = self.generate_expr(ir.condition)
+        self.code.append(self._indent(f"while ({condition}) {{"))
+        self.generate_block(ir.body)
+        self.code.append(self._indent("}"))
+
+    def _gen_for(self, ir):
+        # For loop (with special handling for range)
+        var_name = ir.var
+        iterable = self.generate_expr(ir.iterable)
+        # The loop variable is declared by the loop and only exists inside it
+        previous_type = self.declared_vars.get(var_name)
 
-                # Return statement
-                elif instruction_type == 'return':
-                    value = self.generate_expr(ir[1]) if ir[1] else ""
-                    self.code.append(self._indent(f"return {value};"))
+        if self.is_range_call(ir.iterable):
+            self.declared_vars[var_name] = 'int'
+            range_info = self.extract_range_info(ir.iterable)
+            if len(range_info) == 1:
+                # range(stop)
+                self.code.append(self._indent(f"for (int {var_name} = 0; {var_name} < {range_info[0]}; ++{var_name}) {{"))
+            elif len(range_info) == 2:
+                # range(start, stop)
+                self.code.append(self._indent(f"for (int {var_name} = {range_info[0]}; {var_name} < {range_info[1]}; ++{var_name}) {{"))
+            elif len(range_info) == 3:
+                # range(start, stop, step)
+                step = range_info[2]
+                if step.startswith('-'):
+                    self.code.append(self._indent(f"for (int {var_name} = {range_info[0]}; {var_name} > {range_info[1]}; {var_name} -= {step[1:]}) {{"))
+                else:
+                    self.code.append(self._indent(f"for (int {var_name} = {range_info[0]}; {var_name} < {range_info[1]}; {var_name} += {step}) {{"))
+        else:
+            # For non-range iterables
+            self.code.append(self._indent(f"for (auto& {var_name} : {iterable}) {{"))
+            iterable_type = self.infer_var_type(ir.iterable)
+            if iterable_type.startswith('vector<'):
+                self.declared_vars[var_name] = iterable_type[7:-1]
+            
+        self.generate_block(ir.body)
+        self.code.append(self._indent("}"))
+        if previous_type is None:
+            self.declared_vars.pop(var_name, None)
+        else:
+            self.declared_vars[var_name] = previous_type
+
+    def _gen_input(self, ir):
+        # Input operation
+        prompt = self.generate_expr(ir.prompt)
+        # Return a placeholder that will be handled in the assignment
+        return ('input', prompt)
+
+    def _gen_var(self, ir):
+        # Variable reference
+        return ir.name
+
+    def _gen_const(self, ir):
+        # Constant value
+        value = ir.value
+        if isinstance(value, str):
+            # Escape string literals
+            escaped = value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+            return f'"{escaped}"'
+        elif isinstance(value, bool):
+            # Convert bool to C++ true/false and make sure it's typed correctly
+            if value not in self.declared_vars or self.declared_vars[value] != 'bool':
+                # Only add a declaration if not already declared
+                return "true" if value else "false"
+        return str(value)
 
+    def _gen_list(self, ir):
+        # List/vector
+        elements = [self.generate_expr(elem) for elem in ir.elements]
+        if ir.element_type is not None:
+            # Inferred from the whole program; numbers in a list of strings are converted
+            if ir.element_type == 'string':
+                elements = [code if self.infer_var_type(elem) == 'string' else f"to_string({code})"
+                            for code, elem in zip(elements, ir.elements)]
+            return f"vector<{ir.element_type}>{{{', '.join(elements)}}}"
+        # Try to determine the element type
+        if elements:
+            if all(self.is_numeric(elem) for elem in ir.elements):
+                if any(isinstance(elem.value, float) for elem in ir.elements if elem.opcode == CONST):
+                    return f"vector<double>{{{', '.join(elements)}}}"
+                else:
+                    return f"vector<int>{{{', '.join(elements)}}}"
+            elif all(self.is_string(elem) for elem in ir.elements):
+                # Ensure all string elements have quotes
+                return f"vector<string>{{{', '.join(elements)}}}"
             else:
-                raise Exception(f"Unknown IR format: {ir}")
-                
-        except Exception as e:
-            raise Exception(f"Code generation error: {str(e)} in {self.error_context}")
+                # Mixed type or complex types
+                return f"vector<auto>{{{', '.join(elements)}}}"
+        else:
+            # Empty list
+            return "vector<auto>{}"
+
+    def _gen_function_call(self, ir):
+        # Function call
+        func_name = ir.func
+        # Make sure arguments are converted to strings before joining
+        arguments = []
+        for arg in ir.args:
+            arg_expr = self.generate_expr(arg)
+            # Make sure we have a string
+            if isinstance(arg_expr, tuple):
+                arg_expr = str(arg_expr)
+            arguments.append(str(arg_expr))
+        
+        # Special handling for list access
+        if func_name == "__list_access__" and len(arguments) == 2:
+            # This is our special marker for list indexing
+            container = arguments[0]
+            index = arguments[1]
+            return f"{container}[{index}]"
+            
+        arguments_str = ", ".join(arguments)
+        
+        # Handle special function translations
+        if func_name == 'len':
+            return f"{arguments_str}.size()"
+        elif func_name == 'print':
+            self.code.append(self._indent(f"cout << {arguments_str} << endl;"))
+            return ""
+        elif func_name == 'type':
+            # Special handling for Python's type() function
+            return f"typeid({arguments_str}).name()"
+        elif func_name == 'int':
+            # Handle int conversion with negative number support
+            return f"stoi({arguments_str})"
+        elif func_name == 'float':
+            # Handle float conversion
+            return f"stod({arguments_str})"
+        elif func_name == 'str':
+            # Handle string conversion for C++
+            # Check the argument type to determine the best way to convert
+            if len(ir.args) == 1:
+                arg = ir.args[0]
+                arg_op = getattr(arg, 'opcode', None)
+                if arg_op == CONST:
+                    # For constants, we can simplify
+                    if isinstance(arg.value, (int, float)):
+                        return f"to_string({arguments_str})"
+                    elif isinstance(arg.value, str):
+                        # String constants don't need conversion
+                        return arguments_str
+                    elif isinstance(arg.value, bool):
+                        # Convert boolean to string
+                        return f"({arguments_str} ? \"true\" : \"false\")"
+                elif arg_op == VAR:
+                    var_name = arg.name
+                    if var_name in self.declared_vars:
+                        if self.declared_vars[var_name] in ['int', 'double', 'float']:
+                            return f"to_string({arguments_str})"
+                        elif self.declared_vars[var_name] == 'bool':
+                            return f"({arguments_str} ? \"true\" : \"false\")"
+                        elif self.declared_vars[var_name] == 'string':
+                            # No need to convert strings
+                            return arguments_str
+                    
+            # Default case: apply to_string
+            return f"to_string({arguments_str})"
+        elif func_name == 'bool':
+            # For 'bool()', create proper C++ boolean casting
+            if len(ir.args) == 1 and getattr(ir.args[0], 'opcode', None) == VAR:
+                # If it's a variable reference, just cast it directly without to_string
+                var_name = ir.args[0].name
+                return f"bool({var_name})"
+            else:
+                # For all other cases use standard bool conversion
+                return f"bool({arguments_str})"
+        else:
+            return f"{func_name}({arguments_str})"
+
+    def _gen_function_def(self, ir):
+        # Function definition; without inferred types every parameter and the result are auto
+        name = ir.name
+        params = ir.params
+        param_types = ir.param_types or ['auto'] * len(params)
+        declarations = []
+        for param, param_type in zip(params, param_types):
+            if (param_type == 'string' or param_type.startswith('vector<')) and param_is_read_only(ir, param):
+                # Strings and vectors the body does not assign are passed without a copy
+                declarations.append(f"const {param_type}& {param}")
+            else:
+                declarations.append(f"{param_type} {param}")
+        param_str = ", ".join(declarations)
+
+        # Emit the function at the end of the code list, then move it out (functions go outside main)
+        start = len(self.code)
+        saved_indent = self.indentation_level
+        saved_vars = self.declared_vars
+        self.indentation_level = 0  # No indentation for functions outside main
+        # The body is a scope of its own, starting with the parameters declared
+        self.declared_vars = dict(zip(params, param_types))
+        self.code.append(self._indent(f"{ir.return_type or 'auto'} {name}({param_str}) {{"))
+        self.generate_block(ir.body)
+        self.code.append(self._indent("}"))
+
+        self.functions.append("\n".join(self.code[start:]))
+        del self.code[start:]
+        self.indentation_level = saved_indent  # Restore indentation level
+        self.declared_vars = saved_vars
+
+    def _gen_return(self, ir):
+        # Return statement
+        value = self.generate_expr(ir.value) if ir.value else ""
+        self.code.append(self._indent(f"return {value};"))
 
     def is_range_call(self, ir):
         # Check if IR node is a call to range()
-        if isinstance(ir, tuple) and ir[0] == 'function_call' and ir[1] == 'range':
+        if getattr(ir, 'opcode', None) == CALL and ir.func == 'range':
             return True
         return False
         
     def extract_range_info(self, ir):
         # Extract start, stop, step from range function call
-        if ir[0] == 'function_call' and ir[1] == 'range':
-            args = ir[2]
+        if ir.opcode == CALL and ir.func == 'range':
+            args = ir.args
             return [self.generate_expr(arg) for arg in args]
         return []
 
@@ -400,100 +397,170 @@ class CodeGenerator:
         if ir is None:
             return ""
 
-        self.error_context = f"expression {ir}"
-        if isinstance(ir, tuple):
-            instruction_type = ir[0]
-            
-            # Check for already converted string marker
-            if instruction_type == 'already_string':
-                return ir[1]  # Return the string expression without additional conversion
-            
-            if instruction_type == 'binop':
-                left = self.generate_expr(ir[2])
-                right = self.generate_expr(ir[3])
-                operator = ir[1]
-                
-                # Special handling for string concatenation
-                if operator == '+':
-                    # Determine if left and right are strings or need conversion
-                    left_is_string = self._is_string_literal_or_var(ir[2])
-                    right_is_string = self._is_string_literal_or_var(ir[3])
-                    
-                    # Generate appropriate concatenation expressions
-                    if left_is_string and right_is_string:
-                        # Both are strings, direct concatenation
-                        return f"{left} + {right}"
-                    elif left_is_string:
-                        # Right needs conversion (if not already a string)
-                        if isinstance(ir[3], tuple) and ir[3][0] == 'function_call' and ir[3][1] == 'str':
-                            # This is str() call - use the argument directly with to_string if needed
-                            if len(ir[3][2]) == 1:
-                                arg = ir[3][2][0]
-                                if isinstance(arg, tuple) and arg[0] == 'const' and isinstance(arg[1], str):
-                                    # String constant inside str() - no need for to_string
-                                    return f"{left} + {self.generate_expr(arg)}"
-                                else:
-                                    # Non-string inside str() - apply to_string once
-                                    inner_expr = self.generate_expr(arg)
-                                    return f"{left} + to_string({inner_expr})"
-                        elif not self._is_already_string(right):
-                            right = f"to_string({right})"
-                        return f"{left} + {right}"
-                    elif right_is_string:
-                        # Left needs conversion (if not already a string)
-                        if isinstance(ir[2], tuple) and ir[2][0] == 'function_call' and ir[2][1] == 'str':
-                            # This is str() call - use the argument directly with to_string if needed
-                            if len(ir[2][2]) == 1:
-                                arg = ir[2][2][0]
-                                if isinstance(arg, tuple) and arg[0] == 'const' and isinstance(arg[1], str):
-                                    # String constant inside str() - no need for to_string
-                                    return f"{self.generate_expr(arg)} + {right}"
-                                else:
-                                    # Non-string inside str() - apply to_string once
-                                    inner_expr = self.generate_expr(arg)
-                                    return f"to_string({inner_expr}) + {right}"
-                        elif not self._is_already_string(left):
-                            left = f"to_string({left})"
-                        return f"{left} + {right}"
-                    else:
-                        # Both need conversion
-                        if not self._is_already_string(left):
-                            left = f"to_string({left})"
-                        if not self._is_already_string(right):
-                            right = f"to_string({right})"
-                        return f"{left} + {right}"
-                
-                # Simple expressions don't need extra parentheses
-                if operator == '**':
-                    return f"pow({left}, {right})"
-                elif self._is_simple_expr(left) and self._is_simple_expr(right):
-                    return f"{left} {operator} {right}"
-                else:
-                    return f"({left} {operator} {right})"
-            
-            elif instruction_type == 'compare':
-                left = self.generate_expr(ir[2])
-                right = self.generate_expr(ir[3])
-                operator = ir[1]
-                
-                # Simple expressions don't need extra parentheses
-                if self._is_simple_expr(left) and self._is_simple_expr(right):
-                    return f"{left} {operator} {right}"
-                else:
-                    return f"({left} {operator} {right})"
-                
-            else:
-                try:
-                    result = self.generate(ir)
-                    return result if result is not None else ""
-                except Exception as e:
-                    # If we get an error, convert to string as a fallback
-                    return str(ir)
+        # Entries are left in place if an exception escapes, so the handler in generate
+        # can report the innermost node
+        self._context.append(('expression', ir))
+        result = self._generate_expr(ir)
+        self._context.pop()
+        return result
+
+    def _generate_expr(self, ir):
+        if isinstance(ir, IRNode):
+            handler = self._EXPR_HANDLERS[ir.opcode]
+            if handler is not None:
+                return handler(self, ir)
+
+            depth = len(self._context)
+            try:
+                result = self.generate(ir)
+                return result if result is not None else ""
+            except Exception as e:
+                # If we get an error, convert to string as a fallback
+                del self._context[depth:]
+                return str(ir)
+
         # Handle non-string values
         if ir is not None and not isinstance(ir, str):
             return str(ir)
         return ir if ir is not None else ""
 
+    def _gen_operator(self, ir):
+        # Binary, comparison and unary operations, generated bottom-up without recursion.
+        # Operations build their code as nested lists of fragments, joined once here, so a
+        # chain thousands of operators long is not copied again at every level
+        return code_text(self._fold_operators(ir, self._operand_value, self._operator_value)[0])
+
+    def _fold_operators(self, root, leaf, combine):
+        # Evaluate a tree of operator nodes bottom-up with an explicit stack, so chains
+        # thousands of operators deep run in linear time without touching the recursion
+        # limit. leaf(node) gives the value of any other node; combine(node, *operands)
+        # that of an operator node from the values of its operands.
+        values = []
+        stack = [(root, False)]
+        while stack:
+            node, operands_done = stack.pop()
+            opcode = getattr(node, 'opcode', None)
+            if opcode not in self._OPERATOR_OPCODES:
+                values.append(leaf(node))
+            elif opcode == UNARYOP:
+                if operands_done:
+                    values[-1] = combine(node, values[-1])
+                else:
+                    stack.append((node, True))
+                    stack.append((node.operand, False))
+            elif operands_done:
+                right = values.pop()
+                values[-1] = combine(node, values[-1], right)
+            else:
+                stack.append((node, True))
+                stack.append((node.right, False))
+                stack.append((node.left, False))
+        return values[0]
+
+    def _operand_value(self, ir):
+        # (code, numeric, C++ type, start of the code) of an operand that is not itself an operation
+        code = self.generate_expr(ir)
+        return code, self.is_numeric(ir), self.infer_var_type(ir), code
+
+    def _operator_value(self, ir, left, right=None):
+        # (code, numeric, C++ type, start of the code) of an operation from those of its operands
+        if right is None:
+            code = self._unaryop_code(ir, left[0])
+            return (code, self._operator_numeric(ir, left[1]), self._operator_type(ir, left[2]),
+                    _code_start(code, left))
+        numeric = self._operator_numeric(ir, left[1], right[1])
+        result_type = self._operator_type(ir, left[2], right[2])
+        code = self._binop_code(ir, left, right, left[1] and right[1], result_type)
+        return code, numeric, result_type, _code_start(code, left)
+
+    def _binop_code(self, ir, left, right, numeric_operands, result_type):
+        # Binary operation, given the (code, numeric, C++ type, start) of its operands; like
+        # the other *_code methods it returns fragments for code_text
+        operator = ir.op
+        left_type, right_type = left[2], right[2]
+        left_start, right_start = left[3], right[3]
+        left, right = left[0], right[0]
+        
+        # Special handling for string concatenation; numeric '+' stays arithmetic
+        if operator == '+' and not numeric_operands:
+            # Determine if left and right are strings or need conversion
+            left_is_string = left_type == 'string' or self._is_string_literal_or_var(ir.left)
+            right_is_string = right_type == 'string' or self._is_string_literal_or_var(ir.right)
+            
+            # Generate appropriate concatenation expressions
+            if left_is_string and right_is_string:
+                # Both are strings, direct concatenation
+                return [left, " + ", right]
+            elif left_is_string:
+                # Right needs conversion (if not already a string)
+                if getattr(ir.right, 'opcode', None) == CALL and ir.right.func == 'str':
+                    # This is str() call - use the argument directly with to_string if needed
+                    if len(ir.right.args) == 1:
+                        arg = ir.right.args[0]
+                        if getattr(arg, 'opcode', None) == CONST and isinstance(arg.value, str):
+                            # String constant inside str() - no need for to_string
+                            return [left, " + ", self.generate_expr(arg)]
+                        else:
+                            # Non-string inside str() - apply to_string once
+                            inner_expr = self.generate_expr(arg)
+                            return [left, " + to_string(", inner_expr, ")"]
+                elif not self._is_already_string(right_start):
+                    right = ["to_string(", right, ")"]
+                return [left, " + ", right]
+            elif right_is_string:
+                # Left needs conversion (if not already a string)
+                if getattr(ir.left, 'opcode', None) == CALL and ir.left.func == 'str':
+                    # This is str() call - use the argument directly with to_string if needed
+                    if len(ir.left.args) == 1:
+                        arg = ir.left.args[0]
+                        if getattr(arg, 'opcode', None) == CONST and isinstance(arg.value, str):
+                            # String constant inside str() - no need for to_string
+                            return [self.generate_expr(arg), " + ", right]
+                        else:
+                            # Non-string inside str() - apply to_string once
+                            inner_expr = self.generate_expr(arg)
+                            return ["to_string(", inner_expr, ") + ", right]
+                elif not self._is_already_string(left_start):
+                    left = ["to_string(", left, ")"]
+                return [left, " + ", right]
+            else:
+                # Both need conversion
+                if not self._is_already_string(left_start):
+                    left = ["to_string(", left, ")"]
+                if not self._is_already_string(right_start):
+                    right = ["to_string(", right, ")"]
+                return [left, " + ", right]
+        
+        if operator == '**':
+            return ["pow(", left, ", ", right, ")"]
+        elif operator == '//':
+            # Python floors the quotient; only a float operand makes the result a double
+            if left_type == 'double' or right_type == 'double':
+                return ["floor((", left, ") / (", right, "))"]
+            return ["(int)floor((double)(", left, ") / (", right, "))"]
+
+        # Parenthesize only the operands C++ would otherwise group differently
+        operator = self._CPP_OPERATORS.get(operator, operator)
+        precedence = self._CPP_PRECEDENCE.get(operator, 0)
+        left = self._group_operand(left, ir.left, precedence)
+        right = self._group_operand(right, ir.right, precedence, right=True)
+        return [left, f" {operator} ", right]
+
+    def _unaryop_code(self, ir, operand):
+        # Prefix operation, given the code of its operand
+        if getattr(ir.operand, 'opcode', None) in (BINOP, UNARYOP):
+            operand = ["(", operand, ")"]
+        return [self._CPP_OPERATORS.get(ir.op, ir.op), operand]
+
+    def _group_operand(self, code, ir, precedence, right=False):
+        # Wrap an operand in parentheses if it binds looser than the operator applied to it
+        # (or as loosely, on the right of a left-associative operator)
+        if getattr(ir, 'opcode', None) == BINOP and ir.op != '**' and ir.op != '//':
+            inner = self._CPP_PRECEDENCE.get(self._CPP_OPERATORS.get(ir.op, ir.op), 0)
+            if inner < precedence or (right and inner == precedence):
+                return ["(", code, ")"]
+        return code
+
     def _is_simple_expr(self, expr):
         """Check if an expression is simple enough to not need parentheses"""
         # If it's a variable name, constant, or simple function call
@@ -511,38 +578,36 @@ class CodeGenerator:
 
     def _is_string_expr(self, ir):
         # Check if an expression is a string type
-        if isinstance(ir, tuple):
-            if ir[0] == 'const' and isinstance(ir[1], str):
+        if isinstance(ir, IRNode):
+            if ir.opcode == CONST and isinstance(ir.value, str):
                 return True
-            elif ir[0] == 'var':
-                var_name = ir[1]
+            elif ir.opcode == VAR:
+                var_name = ir.name
                 return var_name in self.declared_vars and self.declared_vars[var_name] == 'string'
-            elif ir[0] == 'function_call' and ir[1] in ['str', 'to_string']:
-                return True
-            elif ir[0] == 'already_string':
+            elif ir.opcode == CALL and ir.func in ['str', 'to_string']:
                 return True
         return False
         
     def _is_string_literal_or_var(self, ir):
-        # Check if an expression is a string literal or a variable
-        if isinstance(ir, tuple):
-            if ir[0] == 'const' and isinstance(ir[1], str):
+        # Check if an expression is a string literal, a string variable or a call returning a string
+        if isinstance(ir, IRNode):
+            if ir.opcode == CONST and isinstance(ir.value, str):
                 return True
-            elif ir[0] == 'var':
-                var_name = ir[1]
+            elif ir.opcode == VAR:
+                var_name = ir.name
                 return var_name in self.declared_vars and self.declared_vars[var_name] == 'string'
+            elif ir.opcode == CALL:
+                return ir.result_type == 'string'
         return False
  
     def _is_already_string(self, ir):
         # Check if an expression is already a string
-        if isinstance(ir, tuple):
-            if ir[0] == 'already_string':
-                return True
-            elif ir[0] == 'const' and isinstance(ir[1], str):
+        if isinstance(ir, IRNode):
+            if ir.opcode == CONST and isinstance(ir.value, str):
                 return True
-            elif ir[0] == 'var' and ir[1] in self.declared_vars and self.declared_vars[ir[1]] == 'string':
+            elif ir.opcode == VAR and ir.name in self.declared_vars and self.declared_vars[ir.name] == 'string':
                 return True
-            elif ir[0] == 'function_call' and ir[1] == 'str':
+            elif ir.opcode == CALL and ir.func == 'str':
                 return True
         elif isinstance(ir, str) and (ir.startswith('"') or ir.startswith("'")):
             return True
@@ -553,73 +618,56 @@ class CodeGenerator:
         return var_name in self.declared_vars and self.declared_vars[var_name] == 'string'
     
     def generate_block(self, ir_block):
-        # Generate a block of code while preserving the outer context
-        saved_code = self.code
-        saved_context = self.error_context
-        self.code = []
-        self.error_context = f"block {ir_block}"
-        
+        # Emit a block straight into self.code, one indentation level deeper than its header
+        self._context.append(('block', ir_block))
+        self.indentation_level += 1
         if ir_block:
             self.generate(ir_block)
-            
-        block_code = self.code
-        self.code = saved_code
-        self.error_context = saved_context
-        return block_code
+        self.indentation_level -= 1
+        self._context.pop()
 
     def infer_var_type(self, expr):
         # Determine the C++ type for a given expression
+        if getattr(expr, 'opcode', None) in self._OPERATOR_OPCODES:
+            return self._fold_operators(expr, self.infer_var_type, self._operator_type)
         try:
-            if isinstance(expr, tuple):
-                if expr[0] == 'const':
-                    if isinstance(expr[1], int):
+            if isinstance(expr, IRNode):
+                if expr.opcode == CONST:
+                    if isinstance(expr.value, int):
                         return 'int'
-                    elif isinstance(expr[1], float):
+                    elif isinstance(expr.value, float):
                         return 'double'
-                    elif isinstance(expr[1], str):
+                    elif isinstance(expr.value, str):
                         return 'string'
-                    elif isinstance(expr[1], bool):
+                    elif isinstance(expr.value, bool):
                         return 'bool'  # Use bool type for boolean values
-                    elif expr[1] is None:
+                    elif expr.value is None:
                         return 'void*'
                     else:
                         return 'auto'
-                elif expr[0] == 'function_call':
+                elif expr.opcode == CALL:
                     # Better inference for common function calls
-                    if expr[1] == 'bool':
+                    if expr.func == 'bool':
                         return 'bool'
-                    elif expr[1] == 'int':
+                    elif expr.func == 'int' or expr.func == 'len':
                         return 'int'
-                    elif expr[1] == 'float':
+                    elif expr.func == 'float':
                         return 'double'
-                    elif expr[1] == 'str':
+                    elif expr.func == 'str':
                         return 'string'
-                    # Cannot infer other function return types without context
-                    return 'auto'
-                elif expr[0] == 'binop':
-                    left_type = self.infer_var_type(expr[2])
-                    right_type = self.infer_var_type(expr[3])
-                    
-                    # Comparison operators yield boolean
-                    if expr[1] in ['>', '<', '>=', '<=', '==', '!=']:
-                        return 'bool'
-                    
-                    # Type promotion rules
-                    if left_type == 'double' or right_type == 'double':
-                        return 'double'
-                    elif left_type == 'int' and right_type == 'int':
-                        return 'int'
-                    elif left_type == 'string' or right_type == 'string':
-                        return 'string'
-                    elif left_type == 'bool' and right_type == 'bool':
-                        return 'bool'
-                    else:
-                        return 'auto'
-                elif expr[0] == 'var':
-                    var_name = expr[1]
+                    elif expr.func == '__list_access__' and len(expr.args) == 2:
+                        container = self.infer_var_type(expr.args[0])
+                        if container.startswith('vector<'):
+                            return container[7:-1]
+                    # Other functions only have the result type type inference found
+                    return expr.result_type or 'auto'
+                elif expr.opcode == VAR:
+                    var_name = expr.name
                     if var_name in self.declared_vars:
                         return self.declared_vars[var_name]
                     return 'auto'
+                elif expr.opcode == LIST and expr.element_type is not None:
+                    return f"vector<{expr.element_type}>"
             elif isinstance(expr, str):
                 return 'string'
             elif isinstance(expr, int):
@@ -634,13 +682,38 @@ class CodeGenerator:
             # Fallback to auto
             return 'auto'
 
+    def _operator_type(self, expr, left_type, right_type=None):
+        # C++ type of an operation from the types of its operands
+        if expr.opcode == UNARYOP:
+            return 'bool' if expr.op == 'not' else left_type
+
+        # Comparison and logical operators yield boolean
+        if expr.op in ['>', '<', '>=', '<=', '==', '!=', 'and', 'or']:
+            return 'bool'
+
+        # Type promotion rules; a string on either side of + is a concatenation
+        if expr.op == '+' and (left_type == 'string' or right_type == 'string'):
+            return 'string'
+        elif left_type == 'double' or right_type == 'double':
+            return 'double'
+        elif left_type == 'int' and right_type == 'int':
+            return 'int'
+        elif expr.op == '//' and left_type in ('int', 'bool') and right_type in ('int', 'bool'):
+            return 'int'
+        elif left_type == 'string' or right_type == 'string':
+            return 'string'
+        elif left_type == 'bool' and right_type == 'bool':
+            return 'bool'
+        else:
+            return 'auto'
+
     def _indent(self, code):
         # Add proper indentation to code line
         return '    ' * self.indentation_level + code
 
     def get_cpp_code(self):
         # Generate the complete C++ program with includes and main function
-        header_code = "#include <bits/stdc++.h>\n#include <vector>\n#include <string>\nusing namespace std;\n\n"
+        header_code = self._CPP_HEADER
         
         # Add function declarations before main
         functions_code = ""
@@ -651,35 +724,120 @@ class CodeGenerator:
         main_code = "int main() {\n"
         if self.code:
             main_code += "\n".join(filter(None, self.code))
-        main_code += "\n    return 0;\n}"
+        main_code += "\n" + self._CPP_FOOTER
         
         # Combine all parts
         cpp_code = header_code + functions_code + main_code
         return cpp_code
 
+    def write_cpp(self, ir, out, spool_max_bytes=1024 * 1024):
+        """Generate the C++ program for an IR instruction list straight into the text stream out.
+
+        The output is the same text get_cpp_code returns, but only one top-level statement's
+        lines are held at a time. Functions go before main, so they are written as soon as
+        their statement is done; the lines of main are spooled to a temporary file, kept in
+        memory up to spool_max_bytes, and copied to out at the end.
+        """
+        statements = ir if isinstance(ir, list) else [ir]
+        out.write(self._CPP_HEADER)
+        wrote_functions = False
+        wrote_main = False
+        with tempfile.SpooledTemporaryFile(max_size=spool_max_bytes, mode='w+', encoding='utf-8', newline='') as main_body:
+            for statement in statements:
+                self._context.append(('statement', statement))
+                self.generate(statement)
+                self._context.pop()
+
+                # Hand this statement's output on and start the next one with empty lists
+                for function in self.functions:
+                    out.write(function)
+                    out.write("\n")
+                    wrote_functions = True
+                for line in self.code:
+                    if line:
+                        main_body.write(line)
+                        main_body.write("\n")
+                        wrote_main = True
+                self.functions = []
+                self.code = []
+
+            if wrote_functions:
+                out.write("\n")
+            out.write("int main() {\n")
+            main_body.seek(0)
+            shutil.copyfileobj(main_body, out)
+        if not wrote_main:
+            out.write("\n")
+        out.write(self._CPP_FOOTER)
+
     def is_numeric(self, expr):
         """Check if an expression is numeric (int or float)."""
-        if isinstance(expr, tuple):
-            if expr[0] == 'const':
-                return isinstance(expr[1], (int, float))
-            elif expr[0] == 'var':
-                var_name = expr[1]
+        if isinstance(expr, IRNode):
+            if expr.opcode == CONST:
+                return isinstance(expr.value, (int, float))
+            elif expr.opcode == VAR:
+                var_name = expr.name
                 if var_name in self.declared_vars:
                     return self.declared_vars[var_name] in ['int', 'double']
-            elif expr[0] == 'binop':
-                # Numeric operations typically yield numeric results
-                return self.is_numeric(expr[2]) and self.is_numeric(expr[3])
+            elif expr.opcode in self._OPERATOR_OPCODES:
+                return self._fold_operators(expr, self.is_numeric, self._operator_numeric)
+            elif expr.opcode == CALL:
+                return self.infer_var_type(expr) in ('int', 'double')
         return False
+
+    def _operator_numeric(self, expr, left, right=True):
+        # Numeric operations typically yield numeric results
+        if expr.opcode == BINOP:
+            return left and right
+        return expr.opcode == UNARYOP and expr.op != 'not' and left
         
     def is_string(self, expr):
         """Check if an expression is a string."""
-        if isinstance(expr, tuple):
-            if expr[0] == 'const':
-                return isinstance(expr[1], str)
-            elif expr[0] == 'var':
-                var_name = expr[1]
+        if isinstance(expr, IRNode):
+            if expr.opcode == CONST:
+                return isinstance(expr.value, str)
+            elif expr.opcode == VAR:
+                var_name = expr.name
                 if var_name in self.declared_vars:
                     return self.declared_vars[var_name] == 'string'
-            elif expr[0] == 'already_string':
-                return True
         return False
+
+    # Opcode dispatch tables, indexed by IR opcode: statements and values handled by
+    # generate, and the expression forms generate_expr handles itself before falling
+    # back to generate
+    _HANDLERS = [None] * OPCODE_COUNT
+    _HANDLERS[ASSIGN] = _gen_assign
+    _HANDLERS[PRINT] = _gen_print
+    _HANDLERS[IF] = _gen_if
+    _HANDLERS[WHILE] = _gen_while
+    _HANDLERS[FOR] = _gen_for
+    _HANDLERS[BINOP] = _gen_operator
+    _HANDLERS[INPUT] = _gen_input
+    _HANDLERS[VAR] = _gen_var
+    _HANDLERS[CONST] = _gen_const
+    _HANDLERS[LIST] = _gen_list
+    _HANDLERS[CALL] = _gen_function_call
+    _HANDLERS[FUNCTION_DEF] = _gen_function_def
+    _HANDLERS[RETURN] = _gen_return
+    _HANDLERS[UNARYOP] = _gen_operator
+
+    _EXPR_HANDLERS = [None] * OPCODE_COUNT
+    _EXPR_HANDLERS[BINOP] = _gen_operator
+    _EXPR_HANDLERS[UNARYOP] = _gen_operator
+
+    # Operations whose operand trees _fold_operators walks with an explicit stack
+    _OPERATOR_OPCODES = frozenset((BINOP, UNARYOP))
+
+    # Text around the functions and the body of main in every generated program
+    _CPP_HEADER = "#include <bits/stdc++.h>\n#include <vector>\n#include <string>\nusing namespace std;\n\n"
+    _CPP_FOOTER = "    return 0;\n}"
+
+    # C++ spelling of Python's word operators
+    _CPP_OPERATORS = {'and': '&&', 'or': '||', 'not': '!'}
+
+    # C++ binding strength of each binary operator; higher binds tighter
+    _CPP_PRECEDENCE = {
+        '||': 1, '&&': 2, '|': 3, '^': 4, '&': 5,
+        '==': 6, '!=': 6, '<': 7, '>': 7, '<=': 7, '>=': 7,
+        '<<': 8, '>>': 8, '+': 9, '-': 9, '*': 10, '/': 10, '%': 10,
+    }
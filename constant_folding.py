@@ -0,0 +1,335 @@
+import math
+import operator
+from ir_nodes import *
+
+# Folded integers have to fit the C++ int the generated code computes them in
+_INT_MIN = -2 ** 31
+_INT_MAX = 2 ** 31 - 1
+
+_COMPARISONS = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+}
+
+_INT_OPERATORS = {
+    '&': operator.and_,
+    '|': operator.or_,
+    '^': operator.xor,
+}
+
+_UNKNOWN = object()
+
+
+def _is_number(value):
+    # int or float, but not bool, which C++ would promote differently
+    return type(value) is int or type(value) is float
+
+
+def _checked(result):
+    # The folded value, or None when C++ would overflow or produce inf/nan instead
+    if type(result) is int:
+        return result if _INT_MIN <= result <= _INT_MAX else None
+    if type(result) is float:
+        return result if math.isfinite(result) else None
+    return result
+
+
+def fold_binary(op, left, right):
+    """Value of `left op right` as the generated C++ computes it, or None if it is not folded."""
+    left_type, right_type = type(left), type(right)
+    if op == '+' and (left_type is str or right_type is str):
+        # Concatenation; ints are converted with to_string, which matches str()
+        if left_type is str and right_type is str:
+            return left + right
+        if left_type is str and right_type is int:
+            return left + str(right)
+        if left_type is int and right_type is str:
+            return str(left) + right
+        return None
+    if op == 'and' or op == 'or':
+        if left_type is bool and right_type is bool:
+            return (left and right) if op == 'and' else (left or right)
+        return None
+    if not (_is_number(left) and _is_number(right)):
+        return None
+    if op in _COMPARISONS:
+        return _COMPARISONS[op](left, right)
+
+    ints = left_type is int and right_type is int
+    if op == '+':
+        result = left + right
+    elif op == '-':
+        result = left - right
+    elif op == '*':
+        result = left * right
+    elif op == '/':
+        # int / int is integer division in the generated C++, unlike Python
+        if ints or right == 0:
+            return None
+        result = left / right
+    elif op == '//':
+        if not ints or right == 0:
+            return None
+        result = left // right
+    elif op == '%':
+        # C++ truncates where Python floors, so only non-negative operands agree
+        if not ints or left < 0 or right <= 0:
+            return None
+        result = left % right
+    elif op == '**':
+        if not ints or right < 0 or right > 64:
+            return None
+        result = left ** right
+    elif op in _INT_OPERATORS:
+        if not ints:
+            return None
+        result = _INT_OPERATORS[op](left, right)
+    elif op == '<<' or op == '>>':
+        if not ints or left < 0 or not 0 <= right < 31:
+            return None
+        result = left << right if op == '<<' else left >> right
+    else:
+        return None
+    return _checked(result)
+
+
+def fold_unary(op, value):
+    """Value of the prefix operation op on value, or None if it is not folded."""
+    value_type = type(value)
+    if op == 'not':
+        # !"" is false in C++ (a pointer), so strings are left alone
+        return (not value) if value_type in (bool, int, float) else None
+    if not _is_number(value):
+        return None
+    if op == '-':
+        return _checked(-value)
+    if op == '+':
+        return value
+    if op == '~' and value_type is int:
+        return ~value
+    return None
+
+
+def same_constants(first, second):
+    """Whether two constants environments bind the same names to the same typed values."""
+    if first.keys() != second.keys():
+        return False
+    return all(_same_value(value, second[name]) for name, value in first.items())
+
+
+def _same_value(first, second):
+    return type(first) is type(second) and first == second
+
+
+def constants_key(constants):
+    # Hashable form of a constants environment, exact about bool against int
+    return frozenset((name, type(value), value) for name, value in constants.items())
+
+
+def assigned_names(statements):
+    """Names assigned anywhere in statements, including nested blocks and loop variables."""
+    names = set()
+    stack = list(statements)
+    while stack:
+        statement = stack.pop()
+        opcode = statement.opcode
+        if opcode == ASSIGN:
+            names.add(statement.target)
+        elif opcode == FOR:
+            names.add(statement.var)
+            stack.extend(statement.body)
+        elif opcode == WHILE:
+            stack.extend(statement.body)
+        elif opcode == IF:
+            stack.extend(statement.body)
+            stack.extend(statement.orelse or ())
+        elif opcode == FUNCTION_DEF:
+            names.add(statement.name)
+    return names
+
+
+class ConstantFolder:
+    """Folds constant expressions in an IR instruction list and propagates constant variables.
+
+    Variables are tracked forward through straight-line code: an assignment of a constant
+    binds the name until the next assignment of it, branches keep only the bindings both
+    sides agree on, loops forget every name their body assigns and function bodies start
+    with no bindings. With propagate=False only expressions that are constant as written
+    are folded. Only folds that give the same result as the generated C++ are made,
+    so int / int, negative modulo and overflowing ints stay as written. String constants
+    are substituted only where they fold into a larger constant or are printed or assigned,
+    since elsewhere a literal would change the C++ type from string to const char*.
+
+    The input is never modified: changed statements and expressions are rebuilt, so IR
+    shared with a cache stays valid.
+    """
+
+    def __init__(self, constants=None, propagate=True):
+        # variable name -> constant value known at the current point
+        self.constants = dict(constants) if constants else {}
+        self.propagate = propagate
+        self.folded = 0
+        self.propagated = 0
+
+    def fold(self, instructions):
+        """Return the instruction list with constants folded and propagated."""
+        return self.fold_block(instructions)
+
+    def fold_block(self, statements):
+        if statements is None:
+            return None
+        return [self._fold_statement(statement) for statement in statements]
+
+    def _fold_statement(self, statement):
+        opcode = statement.opcode
+        constants = self.constants
+        if opcode == ASSIGN:
+            value = self._materialize(self.fold_expression(statement.value))
+            if self.propagate and getattr(value, 'opcode', None) == CONST and not isinstance(value.value, list):
+                constants[statement.target] = value.value
+            else:
+                constants.pop(statement.target, None)
+            return Assign(statement.target, value, statement.lineno, statement.var_type)
+        if opcode == PRINT:
+            return Print(self._materialize(self.fold_expression(statement.value)), statement.lineno)
+        if opcode == IF:
+            condition = self.fold_expression(statement.condition)
+            before = dict(constants)
+            body = self.fold_block(statement.body)
+            after_body = self.constants
+            self.constants = before
+            orelse = self.fold_block(statement.orelse)
+            # Keep what holds whichever branch ran
+            after_orelse = self.constants
+            self.constants = {name: value for name, value in after_body.items()
+                              if name in after_orelse and _same_value(value, after_orelse[name])}
+            return If(condition, body, orelse, statement.lineno)
+        if opcode == WHILE or opcode == FOR:
+            # The body may run any number of times, so nothing it assigns is constant in it or after it
+            killed = assigned_names(statement.body)
+            if opcode == FOR:
+                killed.add(statement.var)
+                iterable = self.fold_expression(statement.iterable)
+            for name in killed:
+                constants.pop(name, None)
+            before = dict(constants)
+            if opcode == WHILE:
+                condition = self.fold_expression(statement.condition)
+            body = self.fold_block(statement.body)
+            self.constants = before
+            if opcode == WHILE:
+                return While(condition, body, statement.lineno)
+            return For(statement.var, iterable, body, statement.lineno)
+        if opcode == FUNCTION_DEF:
+            # Globals can change between calls, so the body starts from nothing
+            self.constants = {}
+            body = self.fold_block(statement.body)
+            constants.pop(statement.name, None)
+            self.constants = constants
+            return FunctionDef(statement.name, statement.params, body, statement.lineno,
+                               statement.param_types, statement.return_type)
+        if opcode == RETURN:
+            value = statement.value
+            if value is not None:
+                value = self.fold_expression(value)
+            return Return(value, statement.lineno)
+        return statement
+
+    def fold_expression(self, root):
+        """Fold an expression tree bottom-up, with an explicit stack so long chains do not recurse."""
+        values = []
+        stack = [(root, False)]
+        while stack:
+            node, operands_done = stack.pop()
+            opcode = getattr(node, 'opcode', None)
+            if opcode == BINOP:
+                if not operands_done:
+                    stack.append((node, True))
+                    stack.append((node.right, False))
+                    stack.append((node.left, False))
+                    continue
+                right = values.pop()
+                left = values.pop()
+                values.append(self._fold_binop(node, left, right))
+            elif opcode == UNARYOP:
+                if not operands_done:
+                    stack.append((node, True))
+                    stack.append((node.operand, False))
+                    continue
+                values.append(self._fold_unaryop(node, values.pop()))
+            else:
+                values.append(self._fold_leaf(node, opcode))
+        return values[0]
+
+    def _fold_leaf(self, node, opcode):
+        if opcode == VAR:
+            value = self.constants.get(node.name, _UNKNOWN)
+            if value is _UNKNOWN or type(value) is str:
+                # String constants stay variables unless they fold into something larger
+                return node
+            self.propagated += 1
+            return Const(value)
+        if opcode == CALL:
+            args = [self.fold_expression(arg) for arg in node.args]
+            if all(new is old for new, old in zip(args, node.args)):
+                return node
+            return Call(node.func, args, node.result_type)
+        if opcode == LIST:
+            elements = [self.fold_expression(element) for element in node.elements]
+            if all(new is old for new, old in zip(elements, node.elements)):
+                return node
+            return ListLiteral(elements, node.element_type)
+        if opcode == INPUT and node.prompt is not None:
+            prompt = self.fold_expression(node.prompt)
+            return node if prompt is node.prompt else Input(prompt)
+        return node
+
+    def _value(self, node):
+        # Constant value of an operand, looking through variables bound to strings
+        opcode = getattr(node, 'opcode', None)
+        if opcode == CONST:
+            return node.value
+        if opcode == VAR:
+            return self.constants.get(node.name, _UNKNOWN)
+        return _UNKNOWN
+
+    def _fold_binop(self, node, left, right):
+        left_value = self._value(left)
+        right_value = self._value(right)
+        if left_value is not _UNKNOWN and right_value is not _UNKNOWN:
+            result = fold_binary(node.op, left_value, right_value)
+            if result is not None:
+                self.folded += 1
+                return Const(result)
+
+        # (x + "a") + "b" becomes x + "ab", so f-string pieces around a variable merge
+        if node.op == '+' and type(right_value) is str and getattr(left, 'opcode', None) == BINOP \
+                and left.op == '+' and type(self._value(left.right)) is str:
+            self.folded += 1
+            return BinOp('+', left.left, Const(self._value(left.right) + right_value))
+
+        if left is node.left and right is node.right:
+            return node
+        return BinOp(node.op, left, right)
+
+    def _fold_unaryop(self, node, operand):
+        value = self._value(operand)
+        if value is not _UNKNOWN:
+            result = fold_unary(node.op, value)
+            if result is not None:
+                self.folded += 1
+                return Const(result)
+        if operand is node.operand:
+            return node
+        return UnaryOp(node.op, operand)
+
+    def _materialize(self, node):
+        # A whole printed or assigned value can be a string literal
+        if getattr(node, 'opcode', None) == VAR and type(self.constants.get(node.name)) is str:
+            self.propagated += 1
+            return Const(self.constants[node.name])
+        return node
@@ -0,0 +1,574 @@
+from ir_nodes import *
+
+# Lowering of the tree-shaped IR to a control-flow graph of basic blocks, conversion to and
+# from SSA form, and raising of the graph back to the tree CodeGenerator consumes.
+#
+# Terminators keep the structure they were lowered from (the join block of an if, the
+# header and exit of a loop, the statements after a return), so raising gives back exactly
+# the statements that were lowered. Passes that rewrite the graph must keep those links.
+
+
+class BasicBlock:
+    """Straight-line statements ending in one terminator; phis come first in SSA form."""
+    __slots__ = ('id', 'phis', 'statements', 'terminator')
+
+    def __init__(self, block_id):
+        self.id = block_id
+        self.phis = []
+        self.statements = []
+        self.terminator = None  # None for the end of the scope
+
+    def __repr__(self):
+        return f"BasicBlock({self.id}, {self.phis!r}, {self.statements!r}, {self.terminator!r})"
+
+
+class ControlFlowGraph:
+    """The blocks of one scope, the top level or a function body, entered at blocks[entry]."""
+    __slots__ = ('blocks', 'entry', 'params')
+
+    def __init__(self, blocks, entry=0, params=()):
+        self.blocks = blocks
+        self.entry = entry
+        self.params = params
+
+
+class _CFGNode:
+    # Base class for phis, pseudo-statements and terminators
+    __slots__ = ()
+
+    def __repr__(self):
+        fields = ", ".join(repr(getattr(self, name)) for name in self.__slots__ if name != 'lineno')
+        return f"{type(self).__name__}({fields})"
+
+    def successors(self):
+        return ()
+
+
+class Phi(_CFGNode):
+    __slots__ = ('target', 'sources')
+
+    def __init__(self, target, sources=None):
+        self.target = target
+        self.sources = sources if sources is not None else {}  # predecessor block id -> name
+
+
+class LoopTarget(_CFGNode):
+    # Assignment of the next element to a for loop's variable, first in the loop body
+    __slots__ = ('var',)
+
+    def __init__(self, var):
+        self.var = var
+
+
+class FunctionGraph(_CFGNode):
+    # A function definition, with its body lowered to a graph of its own
+    __slots__ = ('name', 'params', 'graph', 'lineno', 'param_types', 'return_type')
+
+    def __init__(self, name, params, graph, lineno=None, param_types=None, return_type=None):
+        self.name = name
+        self.params = params
+        self.graph = graph
+        self.lineno = lineno
+        self.param_types = param_types
+        self.return_type = return_type
+
+
+class Jump(_CFGNode):
+    __slots__ = ('target',)
+
+    def __init__(self, target):
+        self.target = target
+
+    def successors(self):
+        return (self.target,)
+
+
+class Branch(_CFGNode):
+    # An if; false_target is join itself when there is no else branch
+    __slots__ = ('condition', 'true_target', 'false_target', 'join', 'lineno')
+
+    def __init__(self, condition, true_target, false_target, join, lineno=None):
+        self.condition = condition
+        self.true_target = true_target
+        self.false_target = false_target
+        self.join = join
+        self.lineno = lineno
+
+    def successors(self):
+        return (self.true_target, self.false_target)
+
+
+class Loop(_CFGNode):
+    # The header of a while loop, which tests the condition before every iteration
+    __slots__ = ('condition', 'body', 'exit', 'lineno')
+
+    def __init__(self, condition, body, exit, lineno=None):
+        self.condition = condition
+        self.body = body
+        self.exit = exit
+        self.lineno = lineno
+
+    def successors(self):
+        return (self.body, self.exit)
+
+
+class ForStart(_CFGNode):
+    # Evaluates a for loop's iterable once, then enters the loop header
+    __slots__ = ('var', 'iterable', 'header', 'lineno')
+
+    def __init__(self, var, iterable, header, lineno=None):
+        self.var = var
+        self.iterable = iterable
+        self.header = header
+        self.lineno = lineno
+
+    def successors(self):
+        return (self.header,)
+
+
+class ForNext(_CFGNode):
+    # The header of a for loop: into the body while elements remain, else to the exit
+    __slots__ = ('body', 'exit')
+
+    def __init__(self, body, exit):
+        self.body = body
+        self.exit = exit
+
+    def successors(self):
+        return (self.body, self.exit)
+
+
+class Exit(_CFGNode):
+    # A return; after is the unreachable block holding the statements that followed it
+    __slots__ = ('value', 'after', 'lineno')
+
+    def __init__(self, value, after=None, lineno=None):
+        self.value = value
+        self.after = after
+        self.lineno = lineno
+
+
+def map_vars(root, rename):
+    """Copy of an expression with every Var name passed through rename; unchanged parts are shared."""
+    values = []
+    stack = [(root, False)]
+    while stack:
+        node, operands_done = stack.pop()
+        opcode = getattr(node, 'opcode', None)
+        if opcode == VAR:
+            name = rename(node.name)
+            values.append(node if name == node.name else Var(name, node.from_fstring))
+        elif opcode in (BINOP, UNARYOP, CALL, LIST, INPUT):
+            children = operands(node)
+            if not operands_done:
+                stack.append((node, True))
+                stack.extend((child, False) for child in reversed(children))
+                continue
+            count = len(children)
+            new = values[len(values) - count:] if count else []
+            del values[len(values) - count:]
+            if all(a is b for a, b in zip(new, children)):
+                values.append(node)
+            else:
+                values.append(with_operands(node, new))
+        else:
+            values.append(node)
+    return values[0]
+
+
+def operands(node):
+    """The expressions an operation, call, list or input node applies to, in order."""
+    opcode = node.opcode
+    if opcode == BINOP:
+        return [node.left, node.right]
+    if opcode == UNARYOP:
+        return [node.operand]
+    if opcode == CALL:
+        return node.args
+    if opcode == LIST:
+        return node.elements
+    return [node.prompt]
+
+
+def with_operands(node, children):
+    """Copy of an operation, call, list or input node applied to other operands."""
+    opcode = node.opcode
+    if opcode == BINOP:
+        return BinOp(node.op, children[0], children[1])
+    if opcode == UNARYOP:
+        return UnaryOp(node.op, children[0])
+    if opcode == CALL:
+        return Call(node.func, children, node.result_type)
+    if opcode == LIST:
+        return ListLiteral(children, node.element_type)
+    return Input(children[0])
+
+
+class _Lowering:
+    # Builds the blocks of one scope
+    def __init__(self):
+        self.blocks = []
+
+    def new_block(self):
+        block = BasicBlock(len(self.blocks))
+        self.blocks.append(block)
+        return block
+
+    def lower_block(self, statements, current):
+        # Append statements to the current block, opening new ones at control flow; returns
+        # the block control leaves from, or None after a return
+        for index, statement in enumerate(statements):
+            opcode = statement.opcode
+            if opcode == ASSIGN or opcode == PRINT:
+                current.statements.append(statement)
+            elif opcode == IF:
+                true_block = self.new_block()
+                false_block = self.new_block() if statement.orelse is not None else None
+                join = self.new_block()
+                current.terminator = Branch(statement.condition, true_block.id,
+                                            (false_block or join).id, join.id, statement.lineno)
+                self._lower_arm(statement.body, true_block, join)
+                if false_block is not None:
+                    self._lower_arm(statement.orelse, false_block, join)
+                current = join
+            elif opcode == WHILE:
+                header = self.new_block()
+                body = self.new_block()
+                exit_block = self.new_block()
+                current.terminator = Jump(header.id)
+                header.terminator = Loop(statement.condition, body.id, exit_block.id, statement.lineno)
+                self._lower_arm(statement.body, body, header)
+                current = exit_block
+            elif opcode == FOR:
+                header = self.new_block()
+                body = self.new_block()
+                exit_block = self.new_block()
+                current.terminator = ForStart(statement.var, statement.iterable, header.id, statement.lineno)
+                header.terminator = ForNext(body.id, exit_block.id)
+                body.statements.append(LoopTarget(statement.var))
+                self._lower_arm(statement.body, body, header)
+                current = exit_block
+            elif opcode == FUNCTION_DEF:
+                current.statements.append(FunctionGraph(statement.name, statement.params,
+                                                        build_cfg(statement.body, statement.params),
+                                                        statement.lineno, statement.param_types,
+                                                        statement.return_type))
+            elif opcode == RETURN:
+                after = None
+                if index + 1 < len(statements):
+                    # Keep what follows a return, unreachable, so raising gives it back
+                    after = self.new_block()
+                current.terminator = Exit(statement.value, after and after.id, statement.lineno)
+                if after is None:
+                    return None
+                current = after
+            else:
+                raise ValueError(f"Cannot lower IR statement: {statement!r}")
+        return current
+
+    def _lower_arm(self, statements, block, target):
+        end = self.lower_block(statements, block)
+        if end is not None:
+            end.terminator = Jump(target.id)
+
+
+def build_cfg(instructions, params=()):
+    """Lower a scope's instruction list to a ControlFlowGraph; function bodies get graphs of their own."""
+    lowering = _Lowering()
+    entry = lowering.new_block()
+    lowering.lower_block(instructions, entry)
+    return ControlFlowGraph(lowering.blocks, entry.id, tuple(params))
+
+
+def reachable_order(graph):
+    """Ids of the blocks reachable from the entry, in reverse postorder."""
+    blocks = graph.blocks
+    order = []
+    visited = {graph.entry}
+    stack = [(graph.entry, iter(_successors(blocks[graph.entry])))]
+    while stack:
+        block_id, successors = stack[-1]
+        for successor in successors:
+            if successor not in visited:
+                visited.add(successor)
+                stack.append((successor, iter(_successors(blocks[successor]))))
+                break
+        else:
+            stack.pop()
+            order.append(block_id)
+    order.reverse()
+    return order
+
+
+def _successors(block):
+    return block.terminator.successors() if block.terminator is not None else ()
+
+
+def predecessors(graph, order):
+    """Block id -> ids of its predecessors among the reachable blocks in order."""
+    preds = {block_id: [] for block_id in order}
+    for block_id in order:
+        for successor in _successors(graph.blocks[block_id]):
+            preds[successor].append(block_id)
+    return preds
+
+
+def dominators(graph, order, preds):
+    """Block id -> id of its immediate dominator (the entry's is itself), by Cooper, Harvey and Kennedy."""
+    position = {block_id: index for index, block_id in enumerate(order)}
+    idom = {graph.entry: graph.entry}
+    changed = True
+    while changed:
+        changed = False
+        for block_id in order[1:]:
+            new_idom = None
+            for pred in preds[block_id]:
+                if pred not in idom:
+                    continue
+                if new_idom is None:
+                    new_idom = pred
+                    continue
+                # Walk both fingers up the dominator tree until they meet
+                first, second = pred, new_idom
+                while first != second:
+                    while position[first] > position[second]:
+                        first = idom[first]
+                    while position[second] > position[first]:
+                        second = idom[second]
+                new_idom = first
+            if idom.get(block_id) != new_idom:
+                idom[block_id] = new_idom
+                changed = True
+    return idom
+
+
+def dominance_frontiers(order, preds, idom):
+    """Block id -> set of ids in its dominance frontier."""
+    frontiers = {block_id: set() for block_id in order}
+    for block_id in order:
+        if len(preds[block_id]) < 2:
+            continue
+        for pred in preds[block_id]:
+            runner = pred
+            while runner != idom[block_id]:
+                frontiers[runner].add(block_id)
+                runner = idom[runner]
+    return frontiers
+
+
+def ssa_name(name, version):
+    # Versions are joined with a dot, which no Python identifier contains
+    return f"{name}.{version}"
+
+
+def base_name(name):
+    return name.rsplit('.', 1)[0] if '.' in name else name
+
+
+def _block_definitions(block):
+    # Variables a block's statements assign, in order
+    for statement in block.statements:
+        if isinstance(statement, LoopTarget):
+            yield statement.var
+        elif getattr(statement, 'opcode', None) == ASSIGN:
+            yield statement.target
+
+
+def to_ssa(graph):
+    """Rewrite a graph into SSA form in place and return it.
+
+    Every assignment gets a new version of its variable (x.1, x.2, ...); version 0 is the
+    value on entry, a parameter's argument or undefined. Phis are placed at the iterated
+    dominance frontiers of the assignments, and uses are renamed along the dominator tree.
+    Unreachable blocks, such as code after a return, keep their names. Function bodies
+    are converted too, each as its own scope.
+    """
+    blocks = graph.blocks
+    order = reachable_order(graph)
+    preds = predecessors(graph, order)
+    idom = dominators(graph, order, preds)
+    frontiers = dominance_frontiers(order, preds, idom)
+
+    # Place phis for every variable at the iterated dominance frontier of its assignments
+    definitions = {}
+    for block_id in order:
+        for name in _block_definitions(blocks[block_id]):
+            definitions.setdefault(name, set()).add(block_id)
+    for name, defining in definitions.items():
+        has_phi = set()
+        worklist = list(defining)
+        while worklist:
+            block_id = worklist.pop()
+            for frontier in frontiers[block_id]:
+                if frontier not in has_phi:
+                    has_phi.add(frontier)
+                    blocks[frontier].phis.append(Phi(name))
+                    if frontier not in defining:
+                        worklist.append(frontier)
+
+    # Rename along the dominator tree, with an explicit stack of blocks to enter and leave
+    children = {block_id: [] for block_id in order}
+    for block_id in order[1:]:
+        children[idom[block_id]].append(block_id)
+    versions = {name: 0 for name in definitions}
+    versions.update((name, 0) for name in graph.params)
+    current = {}  # variable -> stack of its visible versions
+
+    def use(name):
+        stack = current.get(name)
+        if stack:
+            return ssa_name(name, stack[-1])
+        return ssa_name(name, 0) if name in versions else name
+
+    def define(name, pushed):
+        versions[name] = versions.get(name, 0) + 1
+        current.setdefault(name, []).append(versions[name])
+        pushed.append(name)
+        return ssa_name(name, versions[name])
+
+    work = [(graph.entry, False, None)]
+    while work:
+        block_id, leaving, pushed = work.pop()
+        if leaving:
+            for name in pushed:
+                current[name].pop()
+            continue
+        block = blocks[block_id]
+        pushed = []
+        for phi in block.phis:
+            phi.target = define(phi.target, pushed)
+        statements = []
+        for statement in block.statements:
+            if isinstance(statement, LoopTarget):
+                statement = LoopTarget(define(statement.var, pushed))
+            elif isinstance(statement, FunctionGraph):
+                to_ssa(statement.graph)
+            elif statement.opcode == ASSIGN:
+                value = map_vars(statement.value, use)
+                statement = Assign(define(statement.target, pushed), value, statement.lineno, statement.var_type)
+            else:
+                statement = Print(map_vars(statement.value, use), statement.lineno)
+            statements.append(statement)
+        block.statements = statements
+        block.terminator = _map_terminator(block.terminator, use)
+        for successor in _successors(block):
+            for phi in blocks[successor].phis:
+                phi.sources[block_id] = use(base_name(phi.target))
+        work.append((block_id, True, pushed))
+        work.extend((child, False, None) for child in reversed(children[block_id]))
+
+    # Function bodies in unreachable blocks are still their own scopes
+    reachable = set(order)
+    for block in blocks:
+        if block.id not in reachable:
+            for statement in block.statements:
+                if isinstance(statement, FunctionGraph):
+                    to_ssa(statement.graph)
+    return graph
+
+
+def _map_terminator(terminator, rename):
+    # Copy of a terminator with the variables it reads renamed
+    if isinstance(terminator, Branch):
+        return Branch(map_vars(terminator.condition, rename), terminator.true_target,
+                      terminator.false_target, terminator.join, terminator.lineno)
+    if isinstance(terminator, Loop):
+        return Loop(map_vars(terminator.condition, rename), terminator.body, terminator.exit, terminator.lineno)
+    if isinstance(terminator, ForStart):
+        return ForStart(terminator.var, map_vars(terminator.iterable, rename), terminator.header, terminator.lineno)
+    if isinstance(terminator, Exit) and terminator.value is not None:
+        return Exit(map_vars(terminator.value, rename), terminator.after, terminator.lineno)
+    return terminator
+
+
+def check_ssa(graph):
+    """Problems with a graph's SSA form: names assigned more than once. Empty when valid."""
+    problems = []
+    seen = set()
+    for block in graph.blocks:
+        targets = [phi.target for phi in block.phis]
+        for statement in block.statements:
+            if isinstance(statement, LoopTarget):
+                targets.append(statement.var)
+            elif isinstance(statement, FunctionGraph):
+                problems.extend(f"{statement.name}: {problem}" for problem in check_ssa(statement.graph))
+            elif statement.opcode == ASSIGN:
+                targets.append(statement.target)
+        for target in targets:
+            if '.' not in target:
+                continue  # unreachable code is not renamed
+            if target in seen:
+                problems.append(f"{target} is assigned more than once")
+            seen.add(target)
+    return problems
+
+
+def from_ssa(graph):
+    """Leave SSA form in place: drop the phis and the versions of every name; returns the graph.
+
+    This is only valid while no two versions of a variable are live at once, which holds
+    as long as passes over the SSA form do not move assignments past each other.
+    """
+    for block in graph.blocks:
+        block.phis = []
+        statements = []
+        for statement in block.statements:
+            if isinstance(statement, LoopTarget):
+                statement = LoopTarget(base_name(statement.var))
+            elif isinstance(statement, FunctionGraph):
+                from_ssa(statement.graph)
+            elif statement.opcode == ASSIGN:
+                statement = Assign(base_name(statement.target), map_vars(statement.value, base_name),
+                                   statement.lineno, statement.var_type)
+            else:
+                statement = Print(map_vars(statement.value, base_name), statement.lineno)
+            statements.append(statement)
+        block.statements = statements
+        block.terminator = _map_terminator(block.terminator, base_name)
+    return graph
+
+
+def raise_cfg(graph):
+    """Rebuild the tree-shaped instruction list of a graph that is not in SSA form."""
+    return _raise_region(graph.blocks, graph.entry, None)
+
+
+def _raise_region(blocks, block_id, stop):
+    # Statements from block_id up to the block stop, following the recorded structure
+    result = []
+    while block_id is not None and block_id != stop:
+        block = blocks[block_id]
+        for statement in block.statements:
+            if isinstance(statement, FunctionGraph):
+                result.append(FunctionDef(statement.name, list(statement.params),
+                                          raise_cfg(statement.graph), statement.lineno,
+                                          statement.param_types, statement.return_type))
+            elif not isinstance(statement, LoopTarget):
+                result.append(statement)
+        terminator = block.terminator
+        if terminator is None:
+            block_id = None
+        elif isinstance(terminator, Jump):
+            block_id = terminator.target
+        elif isinstance(terminator, Branch):
+            body = _raise_region(blocks, terminator.true_target, terminator.join)
+            orelse = None
+            if terminator.false_target != terminator.join:
+                orelse = _raise_region(blocks, terminator.false_target, terminator.join)
+            result.append(If(terminator.condition, body, orelse, terminator.lineno))
+            block_id = terminator.join
+        elif isinstance(terminator, Loop):
+            result.append(While(terminator.condition, _raise_region(blocks, terminator.body, block_id),
+                                terminator.lineno))
+            block_id = terminator.exit
+        elif isinstance(terminator, ForStart):
+            header = blocks[terminator.header].terminator
+            result.append(For(terminator.var, terminator.iterable,
+                              _raise_region(blocks, header.body, terminator.header), terminator.lineno))
+            block_id = header.exit
+        elif isinstance(terminator, Exit):
+            result.append(Return(terminator.value, terminator.lineno))
+            block_id = terminator.after
+        else:
+            raise ValueError(f"Cannot raise terminator: {terminator!r}")
+    return result
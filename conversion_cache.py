@@ -0,0 +1,173 @@
+import hashlib
+import os
+import pickle
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+
+class ConversionCache:
+    """Content-addressed on-disk cache of generated C++ code, shared safely between processes."""
+
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024, version="", store_ir=False):
+        # Cache entries live under directory/<2 hex chars>/<sha256>.cpp (and .ir when store_ir is set)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.version = version
+        self.store_ir = store_ir
+        os.makedirs(self.directory, exist_ok=True)
+        self._size = self._scan_size()
+
+    def key(self, source, **options):
+        # Hash the converter version, the conversion options and the source text together
+        digest = hashlib.sha256()
+        digest.update(self.version.encode('utf-8'))
+        for name in sorted(options):
+            digest.update(f"\0{name}={options[name]!r}".encode('utf-8'))
+        digest.update(b"\0\0")
+        digest.update(source.encode('utf-8'))
+        return digest.hexdigest()
+
+    def _path(self, key, suffix):
+        return os.path.join(self.directory, key[:2], key + suffix)
+
+    def get(self, key):
+        # Return the cached C++ code for key, or None on a miss
+        path = self._path(key, '.cpp')
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                cpp_code = file.read()
+        except FileNotFoundError:
+            return None
+        self._touch(path)
+        return cpp_code
+
+    def copy_to(self, key, out):
+        # Copy the cached C++ code for key into the text stream out; False on a miss
+        path = self._path(key, '.cpp')
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                shutil.copyfileobj(file, out)
+        except FileNotFoundError:
+            return False
+        self._touch(path)
+        return True
+
+    def get_ir(self, key):
+        # Return the cached IR list for key, or None if it was not stored
+        path = self._path(key, '.ir')
+        try:
+            with open(path, 'rb') as file:
+                ir = pickle.load(file)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError, RecursionError):
+            return None
+        self._touch(path)
+        return ir
+
+    def put(self, key, cpp_code, ir=None):
+        # Store an entry atomically, then evict old entries if the cache grew past its cap
+        self._size += self._write_atomic(self._path(key, '.cpp'), cpp_code.encode('utf-8'))
+        self._put_ir(key, ir)
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def _put_ir(self, key, ir):
+        # Store the IR next to the C++ code when the cache keeps IR and it can be pickled
+        if ir is not None and self.store_ir:
+            try:
+                data = pickle.dumps(ir, protocol=pickle.HIGHEST_PROTOCOL)
+            except (pickle.PicklingError, TypeError, AttributeError, RecursionError):
+                data = None
+            if data is not None:
+                self._size += self._write_atomic(self._path(key, '.ir'), data)
+
+    @contextmanager
+    def open_entry(self, key, ir=None):
+        # Yield a text file to write the C++ code for key into; like put, the entry only
+        # appears once the block finishes without an exception
+        path = self._path(key, '.cpp')
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8', newline='') as file:
+                yield file
+            self._size += os.path.getsize(temp_path)
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            raise
+        self._put_ir(key, ir)
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def _write_atomic(self, path, data):
+        # Write to a temp file in the same directory and rename it into place, so readers
+        # in other processes only ever see complete entries
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                file.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            raise
+        return len(data)
+
+    def _touch(self, path):
+        # Mark an entry as recently used; eviction removes the least recently touched first
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+    def _entries(self):
+        # List (mtime, size, path) for every cache file
+        entries = []
+        for dirpath, dirnames, filenames in os.walk(self.directory):
+            for filename in filenames:
+                if filename.endswith('.tmp'):
+                    continue
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _scan_size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self):
+        # Drop least recently used entries until the cache is back under 90% of its cap
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                # Another process already removed it
+                pass
+            total -= size
+        self._size = total
+
+    def clear(self):
+        # Remove every entry from the cache
+        for _, _, path in self._entries():
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+        self._size = 0
@@ -10,33 +10,33 @@ class CustomNodeConverter(ast.NodeVisitor):
         if isinstance(node.value, ast.Call) and isinstance(node.value.func, ast.Name) and node.value.func.id == 'print':
             args = node.value.args
             if args:
-                return PrintNode(self.visit(args[0]))
+                return PrintNode(self.visit(args[0]), lineno=node.lineno, col=node.col_offset)
             else:
-                return PrintNode(StringNode(""))
+                return PrintNode(StringNode(""), lineno=node.lineno, col=node.col_offset)
         return self.visit(node.value)
 
     def visit_Assign(self, node):
         target = self.visit(node.targets[0])
         value = self.visit(node.value)
-        return AssignmentNode(target.name, value)
+        return AssignmentNode(target.name, value, lineno=node.lineno, col=node.col_offset)
 
     def visit_Name(self, node):
-        return IdentifierNode(node.id)
+        return IdentifierNode(node.id, lineno=node.lineno, col=node.col_offset)
 
     def visit_Constant(self, node):
         if isinstance(node.value, str):
-            return StringNode(node.value)
+            return StringNode(node.value, lineno=node.lineno, col=node.col_offset)
         elif isinstance(node.value, (int, float)):
-            return NumberNode(node.value)
+            return NumberNode(node.value, lineno=node.lineno, col=node.col_offset)
         elif node.value is None:
-            return StringNode("nullptr")
+            return StringNode("nullptr", lineno=node.lineno, col=node.col_offset)
         else:
             raise Exception(f"Unsupported constant type: {type(node.value)}")
 
     def visit_List(self, node):
         # Handle Python list literals like [1, 2, 3]
         elements = [self.visit(elt) for elt in node.elts]
-        return ListNode(elements)
+        return ListNode(elements, lineno=node.lineno, col=node.col_offset)
 
     def visit_Compare(self, node):
         # Handle comparison operations
@@ -52,16 +52,18 @@ class CustomNodeConverter(ast.NodeVisitor):
         # Get the left part of the comparison
         left = self.visit(node.left)
         
-        # We only handle the first comparison operation for now
-        if len(node.ops) > 0 and len(node.comparators) > 0:
-            op_type = type(node.ops[0])
-            right = self.visit(node.comparators[0])
-            
-            if op_type in op_map:
-                operator = op_map[op_type]
-                return BinaryOpNode(left, operator, right)
-        
-        raise Exception(f"Unsupported comparison operation")
+        # A chain a < b < c becomes a < b and b < c
+        result = None
+        for op, comparator in zip(node.ops, node.comparators):
+            if type(op) not in op_map:
+                raise Exception(f"Unsupported comparison operation")
+            right = self.visit(comparator)
+            if result is None:
+                result = BinaryOpNode(left, op_map[type(op)], right, lineno=node.lineno, col=node.col_offset)
+            else:
+                result = chain_comparison(result, left, op_map[type(op)], right)
+            left = right
+        return result
 
     def visit_Call(self, node):
         func_name = node.func.id if isinstance(node.func, ast.Name) else "<unknown_func>"
@@ -72,9 +74,9 @@ class CustomNodeConverter(ast.NodeVisitor):
             # Create a special InputNode to represent getting input from the user
             # If there's a prompt string, we'll use it
             prompt = args[0] if args else StringNode("")
-            return InputNode(prompt)
+            return InputNode(prompt, lineno=node.lineno, col=node.col_offset)
             
-        return FunctionCallNode(func_name, args)
+        return FunctionCallNode(func_name, args, lineno=node.lineno, col=node.col_offset)
 
     def visit_BinOp(self, node):
         op_map = {
@@ -85,13 +87,20 @@ class CustomNodeConverter(ast.NodeVisitor):
             ast.Mod: '%',
             ast.Pow: '**'
         }
-        left = self.visit(node.left)
-        right = self.visit(node.right)
-        operator = op_map.get(type(node.op), None)
-        if operator is None:
-            raise Exception(f"Unsupported binary operator: {type(node.op)}")
-        # Fix: Correctly pass parameters in the right order: left, operator, right
-        return BinaryOpNode(left, operator, right)
+        # Walk down the left operands of a chain like a + b + c iteratively, so long
+        # concatenations do not recurse once per operator
+        chain = [node]
+        while isinstance(chain[-1].left, ast.BinOp):
+            chain.append(chain[-1].left)
+        result = self.visit(chain[-1].left)
+        for binop in reversed(chain):
+            right = self.visit(binop.right)
+            operator = op_map.get(type(binop.op), None)
+            if operator is None:
+                raise Exception(f"Unsupported binary operator: {type(binop.op)}")
+            # Fix: Correctly pass parameters in the right order: left, operator, right
+            result = BinaryOpNode(result, operator, right, lineno=binop.lineno, col=binop.col_offset)
+        return result
 
     def visit_JoinedStr(self, node):
         # Handle f-strings
@@ -119,35 +128,35 @@ class CustomNodeConverter(ast.NodeVisitor):
         value = self.visit(node.value)
         # In C++, we'll need to convert the value to string
         # We'll represent this as a function call to str() for now
-        return FunctionCallNode("str", [value])
+        return FunctionCallNode("str", [value], lineno=node.lineno, col=node.col_offset)
 
     def visit_If(self, node):
         condition = self.visit(node.test)
         true_branch = [self.visit(stmt) for stmt in node.body]
         false_branch = [self.visit(stmt) for stmt in node.orelse] if node.orelse else None
-        return IfNode(condition, true_branch, false_branch)
+        return IfNode(condition, true_branch, false_branch, lineno=node.lineno, col=node.col_offset)
 
     def visit_While(self, node):
         condition = self.visit(node.test)
         body = [self.visit(stmt) for stmt in node.body]
-        return WhileNode(condition, body)
+        return WhileNode(condition, body, lineno=node.lineno, col=node.col_offset)
         
     def visit_For(self, node):
         # Add support for For loops
         target = self.visit(node.target)
         iter_expr = self.visit(node.iter)
         body = [self.visit(stmt) for stmt in node.body]
-        return ForNode(target.name, iter_expr, body)
+        return ForNode(target.name, iter_expr, body, lineno=node.lineno, col=node.col_offset)
 
     def visit_Return(self, node):
         value = self.visit(node.value) if node.value else None
-        return ReturnNode(value)
+        return ReturnNode(value, lineno=node.lineno, col=node.col_offset)
 
     def visit_FunctionDef(self, node):
         name = node.name
         parameters = [arg.arg for arg in node.args.args]
         body = [self.visit(stmt) for stmt in node.body]
-        return FunctionDefNode(name, parameters, body)
+        return FunctionDefNode(name, parameters, body, lineno=node.lineno, col=node.col_offset)
 
     # Handle list indexing (Subscript nodes)
     def visit_Subscript(self, node):
@@ -164,7 +173,7 @@ class CustomNodeConverter(ast.NodeVisitor):
             
         # Return a function call node representing list access
         # This will be processed in the code generator to proper C++ syntax
-        return FunctionCallNode("__list_access__", [container, index])
+        return FunctionCallNode("__list_access__", [container, index], lineno=node.lineno, col=node.col_offset)
     
     def generic_visit(self, node):
         raise Exception(f"Unsupported AST node: {type(node).__name__}")
@@ -0,0 +1,246 @@
+from ir_nodes import *
+
+_CONSTANT_TRUTH_TYPES = (bool, int, float)
+
+
+def expression_reads(root, names=None):
+    """Names of the variables an expression reads, added to names if given."""
+    names = set() if names is None else names
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        opcode = getattr(node, 'opcode', None)
+        if opcode == VAR:
+            names.add(node.name)
+        elif opcode == BINOP:
+            stack.append(node.left)
+            stack.append(node.right)
+        elif opcode == UNARYOP:
+            stack.append(node.operand)
+        elif opcode == CALL:
+            stack.extend(node.args)
+        elif opcode == LIST:
+            stack.extend(node.elements)
+        elif opcode == INPUT:
+            stack.append(node.prompt)
+    return names
+
+
+def is_pure(root):
+    """Whether evaluating an expression has no effect besides its value: no calls or input."""
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        opcode = getattr(node, 'opcode', None)
+        if opcode == CALL or opcode == INPUT:
+            return False
+        if opcode == BINOP:
+            stack.append(node.left)
+            stack.append(node.right)
+        elif opcode == UNARYOP:
+            stack.append(node.operand)
+        elif opcode == LIST:
+            stack.extend(node.elements)
+    return True
+
+
+def _expressions(statement):
+    # Expressions a statement evaluates itself, not counting nested blocks
+    opcode = statement.opcode
+    if opcode == ASSIGN or opcode == PRINT:
+        return (statement.value,)
+    if opcode == IF or opcode == WHILE:
+        return (statement.condition,)
+    if opcode == FOR:
+        return (statement.iterable,)
+    if opcode == RETURN and statement.value is not None:
+        return (statement.value,)
+    return ()
+
+
+def _blocks(statement):
+    # Nested statement blocks, function bodies excluded
+    opcode = statement.opcode
+    if opcode == IF:
+        return (statement.body, statement.orelse or ())
+    if opcode == WHILE or opcode == FOR:
+        return (statement.body,)
+    return ()
+
+
+def scope_summary(statements):
+    """Variables read and assigned in a scope, and those read inside the functions it defines.
+
+    Returns (reads, assigned, function_reads); function bodies count towards function_reads
+    only, at any depth.
+    """
+    reads, assigned, function_reads = set(), set(), set()
+    stack = [(statement, False) for statement in statements]
+    while stack:
+        statement, in_function = stack.pop()
+        if statement.opcode == FUNCTION_DEF:
+            stack.extend((nested, True) for nested in statement.body)
+            continue
+        for expression in _expressions(statement):
+            expression_reads(expression, function_reads if in_function else reads)
+        if statement.opcode == ASSIGN and not in_function:
+            assigned.add(statement.target)
+        for block in _blocks(statement):
+            stack.extend((nested, in_function) for nested in block)
+    return reads, assigned, function_reads
+
+
+def _constant_truth(condition):
+    # Truth of a constant condition, or None; strings are pointers in the generated C++
+    if getattr(condition, 'opcode', None) == CONST and type(condition.value) in _CONSTANT_TRUTH_TYPES:
+        return bool(condition.value)
+    return None
+
+
+class DeadCodeEliminator:
+    """Removes unreachable statements, branches on constant conditions and unused assignments.
+
+    A scope (the top level or a function body) is simplified in three steps. Statements
+    after a return are dropped, an if on a constant condition is replaced by the branch it
+    takes and a while on a false one by nothing. Then liveness runs backwards over the
+    scope: an assignment of a side-effect-free value to a variable no later statement reads
+    is removed, and so is an if left with two empty branches. Loops keep every variable
+    their body reads live throughout. The generated C++ declares a variable at its first
+    assignment, so that one is only removed when the variable is never read in the scope.
+    Assignments to variables read inside a function defined in the scope are always kept,
+    since a call can read them at any point.
+
+    Removed statements are counted per reason in counts and described by notes().
+    """
+
+    def __init__(self):
+        self.counts = {'unreachable': 0, 'constant_branches': 0, 'unused_assignments': 0, 'empty_ifs': 0}
+        self.removed = []  # (line number or None, description)
+
+    def eliminate(self, instructions):
+        """Return the whole program's instruction list with dead code removed."""
+        return self._eliminate_body(instructions, ())
+
+    def eliminate_scope(self, statements, live_out, assigned_before, scope_reads, keep):
+        """Eliminate dead code in part of a scope; returns (statements, variables live before them).
+
+        live_out holds the variables read after the statements, assigned_before those
+        assigned before them, scope_reads every variable read anywhere in the scope and keep
+        those read by functions defined in it.
+        """
+        statements = self.simplify(statements)
+        first = self._first_assignments(statements, assigned_before)
+        return self._live_block(statements, set(live_out), first, scope_reads, keep)
+
+    def _eliminate_body(self, statements, params):
+        # A whole scope; parameters are declared by the function signature
+        reads, _, function_reads = scope_summary(statements)
+        return self.eliminate_scope(statements, (), params, reads | function_reads, function_reads)[0]
+
+    def _note(self, statement, reason, text):
+        self.counts[reason] += 1
+        self.removed.append((getattr(statement, 'lineno', None), text))
+
+    def notes(self, line_offset=0):
+        # What was removed, in source order; line_offset is added to the IR's line numbers
+        ordered = sorted(self.removed, key=lambda item: -1 if item[0] is None else item[0])
+        return [f"line {lineno + line_offset}: {text}" if lineno is not None else text for lineno, text in ordered]
+
+    def simplify(self, statements):
+        """Drop unreachable statements and resolve branches on constant conditions."""
+        result = []
+        pending = list(reversed(statements))
+        while pending:
+            statement = pending.pop()
+            opcode = statement.opcode
+            if opcode == IF:
+                truth = _constant_truth(statement.condition)
+                if truth is not None:
+                    self._note(statement, 'constant_branches', f"if on constant {truth}")
+                    taken = statement.body if truth else (statement.orelse or [])
+                    pending.extend(reversed(taken))
+                    continue
+                statement = If(statement.condition, self.simplify(statement.body),
+                               None if statement.orelse is None else self.simplify(statement.orelse),
+                               statement.lineno)
+            elif opcode == WHILE:
+                if _constant_truth(statement.condition) is False:
+                    self._note(statement, 'constant_branches', "while on constant False")
+                    continue
+                statement = While(statement.condition, self.simplify(statement.body), statement.lineno)
+            elif opcode == FOR:
+                statement = For(statement.var, statement.iterable, self.simplify(statement.body), statement.lineno)
+            elif opcode == FUNCTION_DEF:
+                statement = self._eliminate_function(statement)
+            result.append(statement)
+            if opcode == RETURN:
+                for unreachable in reversed(pending):
+                    self._note(unreachable, 'unreachable', "unreachable after return")
+                break
+        return result
+
+    def _eliminate_function(self, function):
+        body = self._eliminate_body(function.body, function.params)
+        return FunctionDef(function.name, function.params, body, function.lineno,
+                           function.param_types, function.return_type)
+
+    @staticmethod
+    def _first_assignments(statements, assigned_before):
+        # ids of the assignments that declare their variable in the generated C++
+        assigned = set(assigned_before)
+        first = set()
+        stack = list(reversed(statements))
+        while stack:
+            statement = stack.pop()
+            if statement.opcode == ASSIGN and statement.target not in assigned:
+                assigned.add(statement.target)
+                first.add(id(statement))
+            for block in reversed(_blocks(statement)):
+                stack.extend(reversed(block))
+        return first
+
+    def _live_block(self, statements, live, first, scope_reads, keep):
+        # Backward liveness over a block; live is the set live after it and is updated in place
+        result = []
+        for statement in reversed(statements):
+            opcode = statement.opcode
+            if opcode == ASSIGN:
+                target = statement.target
+                if target not in live and target not in keep and is_pure(statement.value) \
+                        and (id(statement) not in first or target not in scope_reads):
+                    self._note(statement, 'unused_assignments', f"unused assignment to {target}")
+                    continue
+                live.discard(target)
+                expression_reads(statement.value, live)
+            elif opcode == PRINT:
+                expression_reads(statement.value, live)
+            elif opcode == RETURN:
+                live.clear()
+                if statement.value is not None:
+                    expression_reads(statement.value, live)
+            elif opcode == IF:
+                orelse_live = set(live)
+                body = self._live_block(statement.body, live, first, scope_reads, keep)[0]
+                orelse = None
+                if statement.orelse is not None:
+                    orelse = self._live_block(statement.orelse, orelse_live, first, scope_reads, keep)[0]
+                live |= orelse_live
+                if not body and not orelse and is_pure(statement.condition):
+                    self._note(statement, 'empty_ifs', "if with nothing left in its branches")
+                    continue
+                expression_reads(statement.condition, live)
+                statement = If(statement.condition, body, orelse, statement.lineno)
+            elif opcode == WHILE or opcode == FOR:
+                # Whatever the body reads may be read on a later iteration
+                live |= scope_summary(statement.body)[0]
+                if opcode == WHILE:
+                    expression_reads(statement.condition, live)
+                body = self._live_block(statement.body, set(live), first, scope_reads, keep)[0]
+                if opcode == WHILE:
+                    statement = While(statement.condition, body, statement.lineno)
+                else:
+                    expression_reads(statement.iterable, live)
+                    statement = For(statement.var, statement.iterable, body, statement.lineno)
+            result.append(statement)
+        result.reverse()
+        return result, live
@@ -0,0 +1,237 @@
+import ast
+import re
+from ir_generator import IRGenerator
+from ir_nodes import shift_lines
+from code_generator import CodeGenerator
+from pass_manager import INTERACTIVE_OPT_LEVEL, PassManager
+
+# A top-level statement starts at column 0 with anything but whitespace, a comment, a closing
+# bracket or a clause keyword that continues the previous compound statement
+_STATEMENT_START = re.compile(r'^(?![ \t\r\n#)\]}]|(?:else|elif|except|finally)\b)', re.MULTILINE)
+
+
+class _PassEntry:
+    # Output of one IR pass on one top-level statement, valid for one incoming pass state
+    # and context
+    __slots__ = ('ir', 'result', 'state', 'state_key')
+
+    def __init__(self, ir, result, state, state_key):
+        self.ir = ir
+        self.result = result
+        self.state = state
+        self.state_key = state_key
+
+
+class _CodegenEntry:
+    # Emitted C++ for one top-level statement, valid for one incoming set of declared variables
+    __slots__ = ('ir', 'lines', 'functions', 'declared_vars', 'state_key')
+
+    def __init__(self, ir, lines, functions, declared_vars, state_key):
+        self.ir = ir
+        self.lines = lines
+        self.functions = functions
+        self.declared_vars = declared_vars
+        self.state_key = state_key
+
+
+class IncrementalConverter:
+    """Reconverts a module by top-level statement, reusing IR and C++ for unchanged statements."""
+
+    def __init__(self):
+        # segment text -> IR instructions produced by that segment, with line numbers counted
+        # from its first line, so the IR and everything cached for it stays valid wherever
+        # the segment moves; the segment's position is added back where lines are reported
+        self._ir_cache = {}
+        # (pass name, id of the input IR, pass-state key, context) -> _PassEntry; entries
+        # hold their input, so ids stay unique while cached
+        self._pass_cache = {}
+        # pass name -> memo its segment_contexts returned last time
+        self._context_memos = {}
+        # (id of the optimized IR, declared-vars key before it) -> _CodegenEntry
+        self._codegen_cache = {}
+        # (id of the optimized IR, first line) -> (IR, the IR with the file's line numbers)
+        self._placed_cache = {}
+        self._placed = []  # (optimized IR, first line) per segment of the last conversion
+        self.reused = 0
+        self.regenerated = 0
+
+    def split_statements(self, code):
+        # Split the source into top-level statement texts without parsing it
+        starts = [m.start() for m in _STATEMENT_START.finditer(code)]
+        segments = []
+        pending = None
+        for index, start in enumerate(starts):
+            if start >= len(code):
+                break
+            end = starts[index + 1] if index + 1 < len(starts) else len(code)
+            if pending is not None:
+                start = pending
+                pending = None
+            # Decorators belong to the definition that follows them
+            if code.startswith('@', start) and end < len(code):
+                pending = start
+                continue
+            segments.append((start, code[start:end]))
+        return segments
+
+    def _lower(self, text, lineno):
+        # Parse and lower one segment to IR, reporting errors at their position in the full source
+        try:
+            python_ast = ast.parse(text)
+        except SyntaxError as e:
+            if e.lineno is not None:
+                e.lineno += lineno - 1
+            raise
+        ast.increment_lineno(python_ast, lineno - 1)
+        ir_generator = IRGenerator()
+        ir_generator.generate(python_ast)
+        return shift_lines(ir_generator.get_instructions(), 1 - lineno)
+
+    def _segment_ir(self, code):
+        # Return [(segment text, IR, first line)] reusing the IR of every unchanged segment
+        ir_cache = {}
+        result = []
+        try:
+            line = 1
+            position = 0
+            for start, text in self.split_statements(code):
+                line += code.count('\n', position, start)
+                position = start
+                ir = self._ir_cache.get(text)
+                if ir is None:
+                    ir = ir_cache.get(text)
+                if ir is None:
+                    ir = self._lower(text, line)
+                ir_cache[text] = ir
+                result.append((text, ir, line))
+        except SyntaxError:
+            # The text split was fooled (e.g. a multi-line string starting at column 0);
+            # split again on the real statement boundaries, or surface the real syntax error
+            return self._segment_ir_from_ast(code)
+        self._ir_cache = ir_cache
+        return result
+
+    def _segment_ir_from_ast(self, code):
+        python_ast = ast.parse(code)
+        lines = code.splitlines(keepends=True)
+        ir_cache = {}
+        result = []
+        for stmt in python_ast.body:
+            first = stmt.decorator_list[0].lineno if getattr(stmt, 'decorator_list', None) else stmt.lineno
+            text = ''.join(lines[first - 1:stmt.end_lineno])
+            ir = self._ir_cache.get(text)
+            if ir is None:
+                ir = ir_cache.get(text)
+            if ir is None:
+                ir_generator = IRGenerator()
+                ir_generator.generate(stmt)
+                ir = shift_lines(ir_generator.get_instructions(), 1 - first)
+            ir_cache[text] = ir
+            result.append((text, ir, first))
+        self._ir_cache = ir_cache
+        return result
+
+    def convert(self, code, progress=None, optimizer=None):
+        """Convert code to a C++ program, regenerating only the statements that changed.
+
+        The optimizer's passes run over one top-level statement at a time and only where its
+        input, incoming state or context changed, so its stats only cover those runs.
+        """
+        if optimizer is None:
+            optimizer = PassManager.for_level(INTERACTIVE_OPT_LEVEL)
+        if progress is not None:
+            progress("Parsing changed statements")
+        segment_ir = self._segment_ir(code)
+        segments = [ir for _, ir, _ in segment_ir]
+        first_lines = [line for _, _, line in segment_ir]
+
+        pass_cache = {}
+        context_memos = {}
+        for index, ir_pass in enumerate(optimizer.passes):
+            if progress is not None:
+                progress(ir_pass.stage)
+            contexts, context_memos[ir_pass.name] = ir_pass.segment_contexts(
+                segments, self._context_memos.get(ir_pass.name, {}))
+            state = {}
+            state_key = ir_pass.state_key(state)
+            optimized = []
+            for ir, context, line in zip(segments, contexts, first_lines):
+                cache_key = (ir_pass.name, id(ir), state_key, context)
+                entry = self._pass_cache.get(cache_key) or pass_cache.get(cache_key)
+                if entry is None or entry.ir is not ir:
+                    new_state = dict(state)
+                    result = optimizer.run_pass(index, ir, new_state, context, line_offset=line - 1)[0]
+                    entry = _PassEntry(ir, result, new_state, ir_pass.state_key(new_state))
+                pass_cache[cache_key] = entry
+                optimized.append(entry.result)
+                state = entry.state
+                state_key = entry.state_key
+            segments = optimized
+        self._pass_cache = pass_cache
+        self._context_memos = context_memos
+
+        if progress is not None:
+            progress("Generating C++")
+
+        codegen_cache = {}
+        code_lines = []
+        functions = []
+        declared_vars = {}
+        state_key = frozenset()
+        self.reused = 0
+        self.regenerated = 0
+
+        for ir, line in zip(segments, first_lines):
+            cache_key = (id(ir), state_key)
+            entry = self._codegen_cache.get(cache_key) or codegen_cache.get(cache_key)
+            if entry is None or entry.ir is not ir:
+                # Generate this statement starting from the variables declared before it
+                code_generator = CodeGenerator()
+                code_generator.line_offset = line - 1
+                code_generator.declared_vars = dict(declared_vars)
+                code_generator.generate(ir)
+                new_vars = code_generator.declared_vars
+                new_key = state_key if new_vars == declared_vars else frozenset(new_vars.items())
+                entry = _CodegenEntry(ir, code_generator.code, code_generator.functions, new_vars, new_key)
+                self.regenerated += 1
+            else:
+                self.reused += 1
+            codegen_cache[cache_key] = entry
+
+            code_lines.extend(entry.lines)
+            functions.extend(entry.functions)
+            declared_vars = entry.declared_vars
+            state_key = entry.state_key
+
+        # Only keep entries the current source still uses
+        self._codegen_cache = codegen_cache
+        self._placed = list(zip(segments, first_lines))
+
+        code_generator = CodeGenerator()
+        code_generator.code = code_lines
+        code_generator.functions = functions
+        return code_generator.get_cpp_code()
+
+    @property
+    def instructions(self):
+        """IR of the last conversion, optimized, with the line numbers of the file."""
+        placed_cache = {}
+        instructions = []
+        for ir, line in self._placed:
+            key = (id(ir), line)
+            entry = self._placed_cache.get(key)
+            if entry is None or entry[0] is not ir:
+                entry = (ir, shift_lines(ir, line - 1))
+            placed_cache[key] = entry
+            instructions.extend(entry[1])
+        self._placed_cache = placed_cache
+        return instructions
+
+    def reset(self):
+        # Forget every cached statement
+        self._ir_cache = {}
+        self._pass_cache = {}
+        self._context_memos = {}
+        self._codegen_cache = {}
+        self._placed = []
+        self._placed_cache = {}
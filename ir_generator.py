@@ -1,6 +1,72 @@
 from ast_nodes import *
+from ir_nodes import *
 import ast
 
+
+class IRGenerationError(Exception):
+    # Raised when lowering to IR fails, with the node being processed in the message
+    pass
+
+
+# Python AST operator type -> IR operator, for everything the code generator can emit
+_AST_BINARY_OPERATORS = {
+    ast.Add: '+',
+    ast.Sub: '-',
+    ast.Mult: '*',
+    ast.Div: '/',
+    ast.FloorDiv: '//',
+    ast.Mod: '%',
+    ast.Pow: '**',
+    ast.BitOr: '|',
+    ast.BitXor: '^',
+    ast.BitAnd: '&',
+    ast.LShift: '<<',
+    ast.RShift: '>>',
+}
+
+_AST_COMPARE_OPERATORS = {
+    ast.Eq: '==',
+    ast.NotEq: '!=',
+    ast.Lt: '<',
+    ast.LtE: '<=',
+    ast.Gt: '>',
+    ast.GtE: '>=',
+}
+
+_AST_UNARY_OPERATORS = {
+    ast.Not: 'not',
+    ast.USub: '-',
+    ast.UAdd: '+',
+    ast.Invert: '~',
+}
+
+_AST_BOOL_OPERATORS = {
+    ast.And: 'and',
+    ast.Or: 'or',
+}
+
+def _has_call(root):
+    # Whether an IR expression calls a function or reads input, like ast_nodes.has_call
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        opcode = getattr(node, 'opcode', None)
+        if opcode == BINOP:
+            stack.append(node.left)
+            stack.append(node.right)
+        elif opcode == UNARYOP:
+            stack.append(node.operand)
+        elif opcode == CALL:
+            if node.func != "__list_access__":
+                return True
+            stack.extend(node.args)
+        elif opcode == LIST:
+            stack.extend(node.elements)
+        elif opcode == INPUT:
+            return True
+    return False
+
+
 class IRGenerator:
     def __init__(self):
         # Initialize IR generator state
@@ -14,298 +80,357 @@ class IRGenerator:
 
     def generate(self, node):
         try:
-            # Process list of statements
-            if isinstance(node, list):
-                for stmt in node:
-                    self.generate(stmt)
-                    
-            # Process Python AST Module
-            elif isinstance(node, ast.Module):
-                for stmt in node.body:
-                    self.generate(stmt)
-            
-            # Process Python AST expressions
-            elif isinstance(node, ast.Expr):
-                result = self.generate(node.value)
-                if result:  # Only add if the expression returns a value
-                    self.instructions.append(result)
-                    
-            # Process Python AST assignments
-            elif isinstance(node, ast.Assign):
-                target = node.targets[0].id if isinstance(node.targets[0], ast.Name) else None
-                if target:
-                    value = self.generate(node.value)
-                    self.instructions.append(('assign', target, value))
-                    
-            # Process Python AST function calls
-            elif isinstance(node, ast.Call):
-                func_name = self.generate(node.func)
-                if isinstance(func_name, tuple) and func_name[0] == 'var':
-                    func_name = func_name[1]
-                args = [self.generate(arg) for arg in node.args]
-                
-                if func_name == 'print':
-                    # Special handling for print statements
-                    if args:
-                        self.instructions.append(('print', args[0]))
-                    else:
-                        self.instructions.append(('print', ('const', "")))
-                    return None
-                
-                return ('function_call', func_name, args)
-                
-            # Process Python AST if statements
-            elif isinstance(node, ast.If):
-                condition = self.generate(node.test)
-                true_body = []
-                for stmt in node.body:
-                    result = self.generate(stmt)
-                    if result:
-                        true_body.append(result)
-                        
-                false_body = []
-                if node.orelse:
-                    for stmt in node.orelse:
-                        result = self.generate(stmt)
-                        if result:
-                            false_body.append(result)
-                            
-                self.instructions.append(('if', condition, true_body, false_body if false_body else None))
-                
-            # Process Python AST variable references
-            elif isinstance(node, ast.Name):
-                # Check if this is a variable in an f-string
-                if hasattr(node, '_is_string_format') and node._is_string_format:
-                    # Mark this variable to prevent to_string conversion
-                    return ('var', node.id, True)  # The third parameter indicates it's from an f-string
-                return ('var', node.id)
-                
-            # Process Python AST constants
-            elif isinstance(node, ast.Constant):
-                return ('const', node.value)
-                
-            # Process Python AST binary operations
-            elif isinstance(node, ast.BinOp):
-                left = self.generate(node.left)
-                right = self.generate(node.right)
-                
-                op_map = {
-                    ast.Add: '+',
-                    ast.Sub: '-',
-                    ast.Mult: '*',
-                    ast.Div: '/',
-                    ast.FloorDiv: '//',
-                    ast.Mod: '%',
-                    ast.Pow: '**',
-                }
-                
-                op = op_map.get(type(node.op), str(type(node.op).__name__))
-                return ('binop', op, left, right)
-                
-            # Process Python AST comparison operations
-            elif isinstance(node, ast.Compare):
-                # Handle comparison operations
-                left = self.generate(node.left)
-                
-                # Process the first comparison operator and right operand
-                if len(node.ops) > 0 and len(node.comparators) > 0:
-                    right = self.generate(node.comparators[0])
-                    
-                    op_map = {
-                        ast.Eq: '==',
-                        ast.NotEq: '!=',
-                        ast.Lt: '<',
-                        ast.LtE: '<=',
-                        ast.Gt: '>',
-                        ast.GtE: '>=',
-                    }
-                    
-                    op = op_map.get(type(node.ops[0]), str(type(node.ops[0]).__name__))
-                    return ('compare', op, left, right)
-                
-                raise Exception(f"Invalid comparison operation")
-                
-            # Process Python AST f-strings
-            elif isinstance(node, ast.JoinedStr):
-                parts = []
-                for value in node.values:
-                    if isinstance(value, ast.FormattedValue):
-                        parts.append(self.generate(value))
-                    else:
-                        parts.append(self.generate(value))
-                
-                # Build a string concatenation expression
-                if parts:
-                    result = parts[0]
-                    for part in parts[1:]:
-                        result = ('binop', '+', result, part)
-                    return result
-                return ('const', "")
-
-            # Program node (root)
-            elif isinstance(node, Program):
-                for stmt in node.statements:
-                    self.generate(stmt)
-
-            # Generate assignment IR
-            elif isinstance(node, AssignmentNode):
-                expr = self.generate(node.expression)
-                self.instructions.append(('assign', node.identifier, expr))
-
-            # Generate print statement IR
-            elif isinstance(node, PrintNode):
-                expr = self.generate(node.expression)
-                self.instructions.append(('print', expr))
-
-            # Generate if-statement IR with branches
-            elif isinstance(node, IfNode):
-                condition_ir = self.generate(node.condition)
-
-                true_branch_ir = self._generate_block(node.true_branch)
-                false_branch_ir = self._generate_block(node.false_branch) if node.false_branch else None
-
-                self.instructions.append(('if', condition_ir, true_branch_ir, false_branch_ir))
-
-            # Generate while-loop IR
-            elif isinstance(node, WhileNode):
-                condition_ir = self.generate(node.condition)
-                body_ir = self._generate_block(node.body)
-                self.instructions.append(('while', condition_ir, body_ir))
-
-            # Generate for-loop IR
-            elif isinstance(node, ForNode):
-                iterable_ir = self.generate(node.iterable)
-                body_ir = self._generate_block(node.body)
-                self.instructions.append(('for', node.variable, iterable_ir, body_ir))
-
-            # Generate function call IR
-            elif isinstance(node, FunctionCallNode):
-                args = [self.generate(arg) for arg in node.arguments]
-                return ('function_call', node.function_name, args)
-
-            # Generate function definition IR
-            elif isinstance(node, FunctionDefNode):
-                body_ir = self._generate_block(node.body)
-                self.instructions.append(('function_def', node.name, node.parameters, body_ir))
-
-            # Generate return statement IR
-            elif isinstance(node, ReturnNode):
-                value_ir = self.generate(node.value) if node.value is not None else None
-                self.instructions.append(('return', value_ir))
-
-            # Generate binary operation IR
-            elif isinstance(node, BinaryOpNode):
-                left = self.generate(node.left)
-                right = self.generate(node.right)
-                return ('binop', node.operator, left, right)
-
-            # Generate input operation IR
-            elif isinstance(node, InputNode):
-                prompt_ir = self.generate(node.prompt) if node.prompt else ('const', "")
-                return ('input', prompt_ir)
-
-            # Generate list literal IR
-            elif isinstance(node, ListNode):
-                elements = [self.generate(elem) for elem in node.elements]
-                return ('list', elements)
-
-            # Generate variable reference IR
-            elif isinstance(node, IdentifierNode):
-                return ('var', node.name)
-
-            # Generate constant value IR
-            elif isinstance(node, NumberNode) or isinstance(node, StringNode):
-                return ('const', node.value)
-
-            # Process f-string value expressions
-            elif isinstance(node, ast.FormattedValue):
-                value = self.generate(node.value)
-                return value
-
-            # Process f-strings (formatted strings)
-            elif isinstance(node, ast.JoinedStr):
-                parts = []
-                for value in node.values:
-                    if isinstance(value, ast.FormattedValue):
-                        parts.append(self.generate(value))
-                    else:
-                        parts.append(self.generate(value))
-                
-                # Build a sequence of string concatenations
-                result = parts[0]
-                for part in parts[1:]:
-                    result = ('binop', '+', result, part)
-                
-                return result
+            # Look up the handler for this node type in the dispatch table
+            handler = self._HANDLERS.get(type(node))
+            if handler is None:
+                handler = self._find_handler(type(node))
+            return handler(self, node)
 
-            else:
-                raise Exception(f"Unknown node type: {type(node).__name__}")
-                
+        except IRGenerationError:
+            raise
         except Exception as e:
-            # Add node context to exceptions for better debugging
+            # Add the context of the innermost node once, as the error leaves it
             node_info = f" in node {type(node).__name__}"
-            if hasattr(node, 'line'):
-                node_info += f" at line {node.line}"
-            raise Exception(f"{str(e)}{node_info}")
+            line = getattr(node, 'lineno', None)
+            if line is not None:
+                node_info += f" at line {line}"
+            raise IRGenerationError(f"{str(e)}{node_info}") from e
 
-    def _generate_block(self, statements):
-        # Process a block of statements with independent state
-        sub_generator = IRGenerator()
-        sub_generator.label_count = self.label_count  # Share label counter
-        
-        if statements is None:
-            return []
-            
-        sub_generator.generate(statements)
-        self.label_count = sub_generator.label_count  # Sync label counter
-        return sub_generator.get_instructions()
+    @classmethod
+    def _find_handler(cls, node_type):
+        # Resolve subclasses of handled node types through the MRO and remember the result
+        for base in node_type.__mro__[1:]:
+            handler = cls._HANDLERS.get(base)
+            if handler is not None:
+                cls._HANDLERS[node_type] = handler
+                return handler
+        if issubclass(node_type, ast.AST):
+            raise Exception(f"Unsupported AST node: {node_type.__name__}")
+        raise Exception(f"Unknown node type: {node_type.__name__}")
 
-    def get_instructions(self):
-        # Return the complete list of generated IR instructions
-        return self.instructions
+    def _gen_list(self, node):
+        # Process list of statements
+        for stmt in node:
+            self.generate(stmt)
 
-    def visit_BinOp(self, node):
-        # Process binary operations
-        left = self.generate(node.left)
-        right = self.generate(node.right)
-        
-        # Map Python operators to C++ operators
-        op_map = {
-            ast.Add: '+',
-            ast.Sub: '-',
-            ast.Mult: '*',
-            ast.Div: '/',
-            ast.FloorDiv: '/',  # Note: This needs special handling
-            ast.Mod: '%',
-            ast.Pow: '**',
-        }
-        
-        if isinstance(node.op, ast.FloorDiv):
-            # Special case for floor division
-            return ('function_call', 'floor', [('binop', '/', left, right)])
-        
-        if type(node.op) in op_map:
-            return ('binop', op_map[type(node.op)], left, right)
-        
-        raise Exception(f"Unsupported binary operator: {type(node.op).__name__}")
-
-    def visit_FormattedValue(self, node):
-        # Process f-string value expressions
+    # Python AST nodes are lowered straight to IR, with the same meaning CustomNodeConverter
+    # gives them, so the cpython front end never builds the custom AST
+
+    def _gen_ast_Module(self, node):
+        # Process Python AST Module
+        for stmt in node.body:
+            self.generate(stmt)
+
+    def _gen_ast_Expr(self, node):
+        # print(...) becomes a Print; any other expression statement is evaluated for nothing
+        value = node.value
+        if isinstance(value, ast.Call) and isinstance(value.func, ast.Name) and value.func.id == 'print':
+            if value.args:
+                self.instructions.append(Print(self.generate(value.args[0]), node.lineno))
+            else:
+                self.instructions.append(Print(Const(""), node.lineno))
+            return
+        self.generate(value)
+
+    def _gen_ast_Assign(self, node):
+        # Process Python AST assignments to a single name
+        target = node.targets[0]
+        if not isinstance(target, ast.Name):
+            raise Exception(f"Unsupported assignment target: {type(target).__name__}")
         value = self.generate(node.value)
-        return value
+        self.instructions.append(Assign(target.id, value, node.lineno))
+
+    def _gen_ast_Call(self, node):
+        # Process Python AST function calls
+        func_name = node.func.id if isinstance(node.func, ast.Name) else "<unknown_func>"
+        args = [self.generate(arg) for arg in node.args]
+
+        if func_name == 'input':
+            # input() reads from the user, with its first argument as the prompt
+            return Input(args[0] if args else Const(""))
+
+        return Call(func_name, args)
+
+    def _gen_ast_If(self, node):
+        # Process Python AST if statements; elif arrives as an If in orelse
+        condition = self.generate(node.test)
+        true_body = self._generate_block(node.body)
+        false_body = self._generate_block(node.orelse) if node.orelse else None
+        self.instructions.append(If(condition, true_body, false_body, node.lineno))
+
+    def _gen_ast_While(self, node):
+        # Process Python AST while loops
+        condition = self.generate(node.test)
+        body = self._generate_block(node.body)
+        self.instructions.append(While(condition, body, node.lineno))
+
+    def _gen_ast_For(self, node):
+        # Process Python AST for loops over a single name
+        if not isinstance(node.target, ast.Name):
+            raise Exception(f"Unsupported loop target: {type(node.target).__name__}")
+        iterable = self.generate(node.iter)
+        body = self._generate_block(node.body)
+        self.instructions.append(For(node.target.id, iterable, body, node.lineno))
+
+    def _gen_ast_FunctionDef(self, node):
+        # Process Python AST function definitions
+        params = [arg.arg for arg in node.args.args]
+        body = self._generate_block(node.body)
+        self.instructions.append(FunctionDef(node.name, params, body, node.lineno))
+
+    def _gen_ast_Return(self, node):
+        # Process Python AST return statements
+        value = self.generate(node.value) if node.value is not None else None
+        self.instructions.append(Return(value, node.lineno))
+
+    def _gen_ast_Name(self, node):
+        # Process Python AST variable references
+        # Check if this is a variable in an f-string
+        if hasattr(node, '_is_string_format') and node._is_string_format:
+            # Mark this variable to prevent to_string conversion
+            return Var(node.id, True)
+        return Var(node.id)
+
+    def _gen_ast_Constant(self, node):
+        # Process Python AST constants; None is spelled nullptr
+        value = node.value
+        if isinstance(value, (str, int, float)):
+            return Const(value)
+        if value is None:
+            return Const("nullptr")
+        raise Exception(f"Unsupported constant type: {type(value)}")
+
+    def _gen_ast_List(self, node):
+        # Process Python AST list literals
+        return ListLiteral([self.generate(elt) for elt in node.elts])
+
+    def _gen_ast_Subscript(self, node):
+        # container[index] is lowered to the __list_access__ marker call
+        container = self.generate(node.value)
+        index = self.generate(node.slice)
+        return Call("__list_access__", [container, index])
+
+    def _gen_operators(self, root):
+        # Lower nested operator nodes bottom-up with an explicit stack rather than recursing
+        # through generate, so operator chains thousands of levels deep convert in linear
+        # time without touching the recursion limit
+        values = []
+        stack = [(root, None)]
+        while stack:
+            node, count = stack.pop()
+            lowering = self._OPERATORS.get(type(node))
+            if lowering is None:
+                values.append(self.generate(node))
+            elif count is None:
+                # Come back to the node once the values of all its operands are on top
+                operands = lowering[0](node)
+                stack.append((node, len(operands)))
+                stack.extend((operand, None) for operand in reversed(operands))
+            else:
+                start = len(values) - count
+                values[start:] = [lowering[1](self, node, *values[start:])]
+        return values[0]
+
+    def _build_ast_BinOp(self, node, left, right):
+        # Python AST binary operation from its lowered operands
+        op = _AST_BINARY_OPERATORS.get(type(node.op))
+        if op is None:
+            raise Exception(f"Unsupported binary operator: {type(node.op).__name__}")
+        return BinOp(op, left, right)
+
+    def _build_ast_BoolOp(self, node, *values):
+        # a and b and c folds to the left like the native parser builds it
+        op = _AST_BOOL_OPERATORS[type(node.op)]
+        result = values[0]
+        for value in values[1:]:
+            result = BinOp(op, result, value)
+        return result
 
-    def visit_JoinedStr(self, node):
-        # Process f-strings (formatted strings)
+    def _build_ast_UnaryOp(self, node, operand):
+        # Python AST prefix operation from its lowered operand
+        return UnaryOp(_AST_UNARY_OPERATORS[type(node.op)], operand)
+
+    def _build_ast_Compare(self, node, left, *comparators):
+        # Python AST comparison; like the custom AST paths it becomes a BinOp, and a chain
+        # a < b < c becomes a < b and b < c as the native parser builds it
+        result = None
+        for op, right in zip(node.ops, comparators):
+            op = _AST_COMPARE_OPERATORS.get(type(op))
+            if op is None:
+                raise Exception(f"Unsupported comparison operation")
+            if result is None:
+                result = BinOp(op, left, right)
+            else:
+                if _has_call(left):
+                    raise Exception(CHAINED_CALL_ERROR)
+                result = BinOp('and', result, BinOp(op, left, right))
+            left = right
+        return result
+
+    def _gen_ast_JoinedStr(self, node):
+        # Process Python AST f-strings as a '+' chain of their pieces
         parts = []
         for value in node.values:
             if isinstance(value, ast.FormattedValue):
-                parts.append(self.generate(value))
+                if isinstance(value.value, ast.Name):
+                    # Variables inside f-strings are already meant to be text
+                    parts.append(Var(value.value.id, True))
+                else:
+                    parts.append(self.generate(value.value))
             else:
                 parts.append(self.generate(value))
-        
-        # Build a sequence of string concatenations
-        result = parts[0]
-        for part in parts[1:]:
-            result = ('binop', '+', result, part)
-            
-        return result
+
+        # Build a string concatenation expression
+        if parts:
+            result = parts[0]
+            for part in parts[1:]:
+                result = BinOp('+', result, part)
+            return result
+        return Const("")
+
+    def _gen_ast_FormattedValue(self, node):
+        # Process f-string value expressions
+        value = self.generate(node.value)
+        return value
+
+    def _gen_Program(self, node):
+        # Program node (root)
+        for stmt in node.statements:
+            self.generate(stmt)
+
+    def _gen_AssignmentNode(self, node):
+        # Generate assignment IR
+        expr = self.generate(node.expression)
+        self.instructions.append(Assign(node.identifier, expr, node.lineno))
+
+    def _gen_PrintNode(self, node):
+        # Generate print statement IR
+        expr = self.generate(node.expression)
+        self.instructions.append(Print(expr, node.lineno))
+
+    def _gen_IfNode(self, node):
+        # Generate if-statement IR with branches
+        condition_ir = self.generate(node.condition)
+
+        true_branch_ir = self._generate_block(node.true_branch)
+        false_branch_ir = self._generate_block(node.false_branch) if node.false_branch else None
+
+        self.instructions.append(If(condition_ir, true_branch_ir, false_branch_ir, node.lineno))
+
+    def _gen_WhileNode(self, node):
+        # Generate while-loop IR
+        condition_ir = self.generate(node.condition)
+        body_ir = self._generate_block(node.body)
+        self.instructions.append(While(condition_ir, body_ir, node.lineno))
+
+    def _gen_ForNode(self, node):
+        # Generate for-loop IR
+        iterable_ir = self.generate(node.iterable)
+        body_ir = self._generate_block(node.body)
+        self.instructions.append(For(node.variable, iterable_ir, body_ir, node.lineno))
+
+    def _gen_FunctionCallNode(self, node):
+        # Generate function call IR
+        args = [self.generate(arg) for arg in node.arguments]
+        return Call(node.function_name, args)
+
+    def _gen_FunctionDefNode(self, node):
+        # Generate function definition IR
+        body_ir = self._generate_block(node.body)
+        self.instructions.append(FunctionDef(node.name, node.parameters, body_ir, node.lineno))
+
+    def _gen_ReturnNode(self, node):
+        # Generate return statement IR
+        value_ir = self.generate(node.value) if node.value is not None else None
+        self.instructions.append(Return(value_ir, node.lineno))
+
+    def _build_BinaryOpNode(self, node, left, right):
+        # Generate binary operation IR from the operands' IR
+        return BinOp(node.operator, left, right)
+
+    def _build_UnaryOpNode(self, node, operand):
+        # Generate prefix operation IR from the operand's IR
+        return UnaryOp(node.operator, operand)
+
+    def _gen_InputNode(self, node):
+        # Generate input operation IR
+        prompt_ir = self.generate(node.prompt) if node.prompt else Const("")
+        return Input(prompt_ir)
+
+    def _gen_ListNode(self, node):
+        # Generate list literal IR
+        elements = [self.generate(elem) for elem in node.elements]
+        return ListLiteral(elements)
+
+    def _gen_IdentifierNode(self, node):
+        # Generate variable reference IR
+        return Var(node.name)
+
+    def _gen_constant_node(self, node):
+        # Generate constant value IR
+        return Const(node.value)
+
+    def _generate_block(self, statements):
+        # Lower a block onto the end of the shared instruction list, then cut it off as the body
+        if statements is None:
+            return []
+        start = len(self.instructions)
+        self.generate(statements)
+        body = self.instructions[start:]
+        del self.instructions[start:]
+        return body
+
+    def get_instructions(self):
+        # Return the complete list of generated IR instructions
+        return self.instructions
+
+    # Node type -> handler dispatch table, covering Python AST and custom AST nodes
+    _HANDLERS = {
+        list: _gen_list,
+        ast.Module: _gen_ast_Module,
+        ast.Expr: _gen_ast_Expr,
+        ast.Assign: _gen_ast_Assign,
+        ast.Call: _gen_ast_Call,
+        ast.If: _gen_ast_If,
+        ast.While: _gen_ast_While,
+        ast.For: _gen_ast_For,
+        ast.FunctionDef: _gen_ast_FunctionDef,
+        ast.Return: _gen_ast_Return,
+        ast.Name: _gen_ast_Name,
+        ast.Constant: _gen_ast_Constant,
+        ast.List: _gen_ast_List,
+        ast.Subscript: _gen_ast_Subscript,
+        ast.BinOp: _gen_operators,
+        ast.BoolOp: _gen_operators,
+        ast.UnaryOp: _gen_operators,
+        ast.Compare: _gen_operators,
+        ast.JoinedStr: _gen_ast_JoinedStr,
+        ast.FormattedValue: _gen_ast_FormattedValue,
+        Program: _gen_Program,
+        AssignmentNode: _gen_AssignmentNode,
+        PrintNode: _gen_PrintNode,
+        IfNode: _gen_IfNode,
+        WhileNode: _gen_WhileNode,
+        ForNode: _gen_ForNode,
+        FunctionCallNode: _gen_FunctionCallNode,
+        FunctionDefNode: _gen_FunctionDefNode,
+        ReturnNode: _gen_ReturnNode,
+        BinaryOpNode: _gen_operators,
+        UnaryOpNode: _gen_operators,
+        InputNode: _gen_InputNode,
+        ListNode: _gen_ListNode,
+        IdentifierNode: _gen_IdentifierNode,
+        NumberNode: _gen_constant_node,
+        StringNode: _gen_constant_node,
+    }
+
+    # Operator node type -> (operands, build) for _gen_operators: operands(node) lists the
+    # subexpressions lowered first, build(self, node, *values) makes the IR from their IR
+    _OPERATORS = {
+        ast.BinOp: (lambda node: (node.left, node.right), _build_ast_BinOp),
+        ast.BoolOp: (lambda node: node.values, _build_ast_BoolOp),
+        ast.UnaryOp: (lambda node: (node.operand,), _build_ast_UnaryOp),
+        ast.Compare: (lambda node: (node.left, *node.comparators), _build_ast_Compare),
+        BinaryOpNode: (lambda node: (node.left, node.right), _build_BinaryOpNode),
+        UnaryOpNode: (lambda node: (node.operand,), _build_UnaryOpNode),
+    }
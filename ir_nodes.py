@@ -0,0 +1,208 @@
+# ir_nodes.py
+
+# Integer opcodes identifying each kind of IR node
+ASSIGN = 0
+PRINT = 1
+IF = 2
+WHILE = 3
+FOR = 4
+FUNCTION_DEF = 5
+RETURN = 6
+BINOP = 7
+INPUT = 8
+VAR = 9
+CONST = 10
+LIST = 11
+CALL = 12
+UNARYOP = 13
+
+OPCODE_COUNT = 14
+
+
+class IRNode:
+    # Base class for IR nodes; subclasses list their fields in __slots__ and set an opcode
+    __slots__ = ()
+    opcode = None
+
+    def __repr__(self):
+        fields = ", ".join(repr(getattr(self, name)) for name in self.__slots__ if name != 'lineno')
+        return f"{type(self).__name__}({fields})"
+
+    def __eq__(self, other):
+        # Structural equality, so equal subtrees compare equal like the tuples they replace
+        if type(self) is not type(other):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__ if name != 'lineno')
+
+    # Equal nodes would need equal hashes, and fields hold lists, so nodes are unhashable;
+    # key dicts and sets on id(node) instead
+    __hash__ = None
+
+    def __reduce__(self):
+        # Constructor arguments follow __slots__ order, so pickling only stores the field values
+        return type(self), tuple(getattr(self, name) for name in self.__slots__)
+
+
+# Statements
+
+class Assign(IRNode):
+    __slots__ = ('target', 'value', 'lineno', 'var_type')
+    opcode = ASSIGN
+
+    def __init__(self, target, value, lineno=None, var_type=None):
+        self.target = target
+        self.value = value
+        self.lineno = lineno
+        # C++ type the variable is declared with, filled in by type inference
+        self.var_type = var_type
+
+
+class Print(IRNode):
+    __slots__ = ('value', 'lineno')
+    opcode = PRINT
+
+    def __init__(self, value, lineno=None):
+        self.value = value
+        self.lineno = lineno
+
+
+class If(IRNode):
+    __slots__ = ('condition', 'body', 'orelse', 'lineno')
+    opcode = IF
+
+    def __init__(self, condition, body, orelse=None, lineno=None):
+        # orelse is None when there is no else branch
+        self.condition = condition
+        self.body = body
+        self.orelse = orelse
+        self.lineno = lineno
+
+
+class While(IRNode):
+    __slots__ = ('condition', 'body', 'lineno')
+    opcode = WHILE
+
+    def __init__(self, condition, body, lineno=None):
+        self.condition = condition
+        self.body = body
+        self.lineno = lineno
+
+
+class For(IRNode):
+    __slots__ = ('var', 'iterable', 'body', 'lineno')
+    opcode = FOR
+
+    def __init__(self, var, iterable, body, lineno=None):
+        self.var = var
+        self.iterable = iterable
+        self.body = body
+        self.lineno = lineno
+
+
+class FunctionDef(IRNode):
+    __slots__ = ('name', 'params', 'body', 'lineno', 'param_types', 'return_type')
+    opcode = FUNCTION_DEF
+
+    def __init__(self, name, params, body, lineno=None, param_types=None, return_type=None):
+        self.name = name
+        self.params = params
+        self.body = body
+        self.lineno = lineno
+        # C++ types of the parameters and result, filled in by type inference
+        self.param_types = param_types
+        self.return_type = return_type
+
+
+class Return(IRNode):
+    __slots__ = ('value', 'lineno')
+    opcode = RETURN
+
+    def __init__(self, value, lineno=None):
+        # value is None for a bare return
+        self.value = value
+        self.lineno = lineno
+
+
+# Expressions
+
+class BinOp(IRNode):
+    __slots__ = ('op', 'left', 'right')
+    opcode = BINOP
+
+    def __init__(self, op, left, right):
+        self.op = op
+        self.left = left
+        self.right = right
+
+
+class UnaryOp(IRNode):
+    __slots__ = ('op', 'operand')
+    opcode = UNARYOP
+
+    def __init__(self, op, operand):
+        self.op = op
+        self.operand = operand
+
+
+class Input(IRNode):
+    __slots__ = ('prompt',)
+    opcode = INPUT
+
+    def __init__(self, prompt):
+        self.prompt = prompt
+
+
+class Var(IRNode):
+    __slots__ = ('name', 'from_fstring')
+    opcode = VAR
+
+    def __init__(self, name, from_fstring=False):
+        # from_fstring marks variables interpolated into an f-string
+        self.name = name
+        self.from_fstring = from_fstring
+
+
+class Const(IRNode):
+    __slots__ = ('value',)
+    opcode = CONST
+
+    def __init__(self, value):
+        self.value = value
+
+
+class ListLiteral(IRNode):
+    __slots__ = ('elements', 'element_type')
+    opcode = LIST
+
+    def __init__(self, elements, element_type=None):
+        self.elements = elements
+        self.element_type = element_type  # C++ type of the elements, if inferred
+
+
+class Call(IRNode):
+    __slots__ = ('func', 'args', 'result_type')
+    opcode = CALL
+
+    def __init__(self, func, args, result_type=None):
+        self.func = func
+        self.args = args
+        self.result_type = result_type  # C++ type a user function returns, if inferred
+
+
+def shift_lines(statements, offset):
+    """Copy of a statement list with every line number moved by offset; the list itself if 0."""
+    if not offset:
+        return statements
+    shifted = []
+    for statement in statements:
+        fields = []
+        for name in statement.__slots__:
+            value = getattr(statement, name)
+            if name == 'lineno' and value is not None:
+                value += offset
+            elif (name == 'body' or name == 'orelse') and value is not None:
+                value = shift_lines(value, offset)
+            fields.append(value)
+        # Constructor arguments follow __slots__ order, as in IRNode.__reduce__
+        shifted.append(type(statement)(*fields))
+    return shifted
@@ -1,14 +1,25 @@
 # lexer.py
+import codecs
+import re
+from array import array
+
 
 class Token:
-    def __init__(self, type_, value, line=None):
-        # Store token type, value and line number
+    __slots__ = ('type', 'value', 'line', 'column', 'offset')
+
+    def __init__(self, type_, value, line=None, column=None, offset=None):
+        # Store token type, value and position: line number, column within the line
+        # and character offset from the start of the input
         self.type = type_
         self.value = value
         self.line = line
+        self.column = column
+        self.offset = offset
 
     def __repr__(self):
         line_info = f", line={self.line}" if self.line is not None else ""
+        if self.column is not None:
+            line_info += f", column={self.column}"
         return f"Token({self.type}, {repr(self.value)}{line_info})"
 
 
@@ -189,3 +200,293 @@ def tokenize(code):
         tokens.append(Token('DEDENT', None, line_number))
 
     return tokens
+
+
+# Master pattern for iter_tokens: whitespace before a token is absorbed by the match, and
+# the first alternative that matches decides the token class
+_TOKEN_PATTERN = re.compile(r'[ \t\f\r]*(?:' + '|'.join([
+    r'(?P<NAME>[^\W\d]\w*)',
+    r'(?P<NUMBER>\d+(?:\.\d*)?|\.\d+)',
+    '(?P<OPERATOR>' + '|'.join(re.escape(op) for op in sorted(MULTI_CHAR_OPERATORS | OPERATORS, key=len, reverse=True)) + ')',
+    '(?P<SYMBOL>' + '|'.join(re.escape(symbol) for symbol in sorted(SYMBOLS)) + ')',
+    r'(?P<STRING>"(?:[^"\\]|\\[\s\S])*"|' + r"'(?:[^'\\]|\\[\s\S])*')",
+    r'(?P<COMMENT>#.*)',
+    r'(?P<ERROR>[^ \t\f\r])',
+]) + ')')
+
+_INDENT_PATTERN = re.compile(r'[ \t]*')
+
+# Token type of each reserved word; any other name is an IDENTIFIER
+_WORD_TYPES = dict.fromkeys(DATA_TYPES, 'DATA_TYPE')
+_WORD_TYPES.update(dict.fromkeys(KEYWORDS, 'KEYWORD'))
+
+_OPEN_BRACKETS = {'(', '[', '{'}
+_CLOSE_BRACKETS = {')', ']', '}'}
+
+
+def _read_chunks(source, chunk_size):
+    # Yield the text of source piece by piece: a str as-is, anything with read() (text or
+    # binary files, mmap objects) in chunks of chunk_size, bytes-like objects decoded as UTF-8
+    if isinstance(source, str):
+        yield source
+        return
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        yield str(source, 'utf-8')
+        return
+
+    decoder = None
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            break
+        if not isinstance(chunk, str):
+            if decoder is None:
+                decoder = codecs.getincrementaldecoder('utf-8')()
+            chunk = decoder.decode(chunk)
+        if chunk:
+            yield chunk
+    if decoder is not None:
+        tail = decoder.decode(b'', final=True)
+        if tail:
+            yield tail
+
+
+def _scan(source, chunk_size):
+    # Core of iter_tokens and TokenBuffer: yield (type, value, line, column, offset, length)
+    # for every token, where offset and length locate the token's text in the whole input
+    chunks = _read_chunks(source, chunk_size)
+    text = next(chunks, '')
+    if text.startswith("\ufeff"):  # UTF-8 BOM
+        text = text[1:]
+    more = True  # Whether chunks may still hold unread text
+    pos = 0
+    base = 0  # Offset of text[0] in the whole input
+    line_number = 1
+    line_start = 0  # Position in text where the current physical line starts
+
+    indent_stack = [0]
+    depth = 0  # Open brackets on the current logical line
+    line_has_tokens = False
+    match = _TOKEN_PATTERN.match
+    finditer = _TOKEN_PATTERN.finditer
+
+    while True:
+        # Buffer the whole of the next line, dropping the text already tokenized
+        line_start = pos
+        line_end = text.find('\n', pos)
+        while line_end < 0 and more:
+            chunk = next(chunks, None)
+            if chunk is None:
+                more = False
+            else:
+                base += pos
+                text = text[pos:] + chunk
+                line_start = pos = 0
+                line_end = text.find('\n')
+        if line_end < 0:
+            if pos >= len(text):
+                break
+            line_end = len(text)
+
+        if depth == 0:
+            # Blank and comment-only lines leave the indentation unchanged
+            end = _INDENT_PATTERN.match(text, pos, line_end).end()
+            if end == line_end or text[end] in '#\r':
+                pos = line_end + 1
+                line_number += 1
+                continue
+
+            indent_level = end - pos
+            if indent_level > indent_stack[-1]:
+                indent_stack.append(indent_level)
+                yield 'INDENT', indent_level, line_number, 0, base + pos, indent_level
+            elif indent_level < indent_stack[-1]:
+                while indent_level < indent_stack[-1]:
+                    indent_stack.pop()
+                    yield 'DEDENT', None, line_number, indent_level, base + end, 0
+                if indent_level != indent_stack[-1]:
+                    raise Exception(f"Invalid indentation at line {line_number}")
+            pos = end
+
+        # Scan the tokens of the line; a string that runs on past it makes the line longer
+        # and the scan restart at the string
+        while pos < line_end:
+            for m in finditer(text, pos, line_end):
+                kind = m.lastgroup
+                value = m.group(kind)
+                start = m.start(kind)
+
+                if kind == 'NAME':
+                    yield _WORD_TYPES.get(value, 'IDENTIFIER'), value, line_number, start - line_start, base + start, len(value)
+
+                elif kind == 'OPERATOR':
+                    yield 'OPERATOR', value, line_number, start - line_start, base + start, len(value)
+
+                elif kind == 'SYMBOL':
+                    if value in _OPEN_BRACKETS:
+                        depth += 1
+                    elif value in _CLOSE_BRACKETS and depth > 0:
+                        depth -= 1
+                    yield 'SYMBOL', value, line_number, start - line_start, base + start, 1
+
+                elif kind == 'NUMBER':
+                    number = float(value) if '.' in value else int(value)
+                    yield 'NUMBER', number, line_number, start - line_start, base + start, len(value)
+
+                elif kind == 'STRING':
+                    yield 'STRING', value[1:-1], line_number, start - line_start, base + start, len(value)
+                    newlines = value.count('\n')
+                    if newlines:
+                        line_number += newlines
+                        line_start = start + value.rfind('\n') + 1
+
+                elif kind == 'COMMENT':
+                    continue
+
+                elif value == '"' or value == "'":
+                    pos = start
+                    break
+
+                elif ord(value) < 32 or ord(value) > 127:
+                    # Skip control and non-ASCII characters
+                    continue
+
+                else:
+                    char_repr = repr(value).replace("'", "")
+                    raise Exception(f"Unknown character: {char_repr} (ord={ord(value)}) at line {line_number}, position {base + start}")
+
+                line_has_tokens = True
+            else:
+                # Only trailing whitespace, if anything, is left on the line
+                break
+
+            # Buffer the next line too and match the string again
+            next_end = text.find('\n', line_end + 1)
+            while next_end < 0 and more:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    more = False
+                else:
+                    base += pos
+                    line_end -= pos
+                    line_start -= pos
+                    text = text[pos:] + chunk
+                    pos = 0
+                    next_end = text.find('\n', line_end + 1)
+            if next_end < 0:
+                if match(text, pos).lastgroup != 'STRING':
+                    raise Exception(f"Unterminated string literal at line {line_number}")
+                next_end = len(text)
+            line_end = next_end
+
+        # End of the physical line
+        if depth == 0 and line_has_tokens:
+            yield 'NEWLINE', None, line_number, line_end - line_start, base + line_end, 0
+            line_has_tokens = False
+        pos = line_end + 1
+        line_number += 1
+
+    # Close any blocks still open at the end of the input
+    while len(indent_stack) > 1:
+        indent_stack.pop()
+        yield 'DEDENT', None, line_number, 0, base + len(text), 0
+
+
+def iter_tokens(source, chunk_size=1 << 16):
+    """Yield tokens lazily from a string, a text or binary file object, or an mmap.
+
+    Token types and values match tokenize(). In addition, a NEWLINE token ends every
+    logical line, and INDENT/DEDENT tokens follow the indentation of each line the way
+    Python's own tokenizer does. Newlines inside brackets do not end a line. Input is read
+    chunk_size characters at a time, and only text that has not been tokenized yet is kept.
+    """
+    for type_, value, line, column, offset, _ in _scan(source, chunk_size):
+        yield Token(type_, value, line, column, offset)
+
+
+class TokenBuffer:
+    """Tokens of one source text stored column-wise in parallel arrays.
+
+    Each token costs a type code, an offset, a length, a line and a column, instead of
+    a Token object and its value. Values are recovered from the source text on access.
+    Parser consumes a TokenBuffer through type_at/value_at without creating Tokens.
+    """
+
+    # Token type of each type code
+    TYPES = ('IDENTIFIER', 'KEYWORD', 'DATA_TYPE', 'NUMBER', 'STRING', 'OPERATOR', 'SYMBOL',
+             'NEWLINE', 'INDENT', 'DEDENT')
+    CODES = {name: code for code, name in enumerate(TYPES)}
+
+    def __init__(self, text=''):
+        self.text = text
+        self.type_codes = array('B')
+        self.offsets = array('I')
+        self.lengths = array('I')
+        self.lines = array('I')
+        self.columns = array('I')
+
+    @classmethod
+    def from_source(cls, source, chunk_size=1 << 16):
+        # Tokenize a string, file object or mmap; the buffer keeps the whole text to
+        # recover token values from
+        if isinstance(source, str):
+            text = source
+        else:
+            text = ''.join(_read_chunks(source, chunk_size))
+        if text.startswith("\ufeff"):  # UTF-8 BOM
+            text = text[1:]
+
+        buffer = cls(text)
+        codes = cls.CODES
+        append_code = buffer.type_codes.append
+        append_offset = buffer.offsets.append
+        append_length = buffer.lengths.append
+        append_line = buffer.lines.append
+        append_column = buffer.columns.append
+        for type_, _, line, column, offset, length in _scan(text, chunk_size):
+            append_code(codes[type_])
+            append_offset(offset)
+            append_length(length)
+            append_line(line)
+            append_column(column)
+        return buffer
+
+    def __len__(self):
+        return len(self.type_codes)
+
+    def type_at(self, index):
+        return self.TYPES[self.type_codes[index]]
+
+    def value_at(self, index):
+        # Rebuild the value the lexer gives the token from its source text
+        type_ = self.TYPES[self.type_codes[index]]
+        if type_ == 'NEWLINE' or type_ == 'DEDENT':
+            return None
+        if type_ == 'INDENT':
+            return self.lengths[index]
+        start = self.offsets[index]
+        text = self.text[start:start + self.lengths[index]]
+        if type_ == 'NUMBER':
+            return float(text) if '.' in text else int(text)
+        if type_ == 'STRING':
+            return text[1:-1]
+        return text
+
+    def line_at(self, index):
+        return self.lines[index]
+
+    def column_at(self, index):
+        return self.columns[index]
+
+    def __getitem__(self, index):
+        # Materialize one Token, e.g. for an error message
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("token index out of range")
+        return Token(self.type_at(index), self.value_at(index), self.lines[index],
+                     self.columns[index], self.offsets[index])
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
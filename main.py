@@ -1,9 +1,19 @@
+import argparse
 import tkinter as tk
+from pass_manager import INTERACTIVE_OPT_LEVEL, OPT_LEVELS
+from pipeline import DEFAULT_FRONTEND, FRONTENDS
 from visualizer import VisualizerApp
 
 def main():
+    parser = argparse.ArgumentParser(description="Python to C++ converter GUI.")
+    parser.add_argument('--frontend', choices=FRONTENDS, default=DEFAULT_FRONTEND,
+                        help="Front end selected when the window opens")
+    parser.add_argument('-O', dest='opt_level', type=int, choices=sorted(OPT_LEVELS), default=INTERACTIVE_OPT_LEVEL,
+                        help="IR optimization level selected when the window opens (default: %(default)s)")
+    args = parser.parse_args()
+
     root = tk.Tk()
-    app = VisualizerApp(root)
+    app = VisualizerApp(root, frontend=args.frontend, opt_level=args.opt_level)
     root.mainloop()
 
 if __name__ == "__main__":
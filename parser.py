@@ -1,26 +1,130 @@
-from lexer import Token, tokenize
+import re
+from lexer import KEYWORDS, Token, TokenBuffer, tokenize
 from ast_nodes import *
 
+
+# Binding power of each binary operator, loosest first, following Python's precedence
+_BINARY_PRECEDENCE = {
+    'or': 1,
+    'and': 2,
+    '==': 4, '!=': 4, '<': 4, '>': 4, '<=': 4, '>=': 4,
+    '|': 5,
+    '^': 6,
+    '&': 7,
+    '<<': 8, '>>': 8,
+    '+': 9, '-': 9,
+    '*': 10, '/': 10, '//': 10, '%': 10,
+    '**': 12,
+}
+
+_RIGHT_ASSOCIATIVE = {'**'}
+
+# Comparisons chain like Python's instead of associating: a < b < c is a < b and b < c
+_COMPARISON_POWER = _BINARY_PRECEDENCE['<']
+
+# Prefix operators: 'not' sits below comparisons, while '-x ** y' still means '-(x ** y)'
+_PREFIX_PRECEDENCE = {'not': 3, '-': 11, '+': 11, '~': 11}
+
+# Backslash escapes decoded in string literals; unknown escapes are kept as written, like Python
+_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', '0': '\0', '\\': '\\', "'": "'", '"': '"', '\n': ''}
+_ESCAPE_PATTERN = re.compile(r'\\(.)', re.DOTALL)
+
+# Pieces of an f-string body, and the conversion or format spec ending a replacement field
+_FSTRING_PATTERN = re.compile(r'(?P<open>\{\{)|(?P<close>\}\})|\{(?P<field>[^{}]*)\}|(?P<text>[^{}]+)|(?P<error>[{}])')
+_FIELD_END = re.compile(r'![rsa](?=:|$)|:')
+
+# Prefixes allowed directly in front of a string literal
+_STRING_PREFIXES = {'f', 'r', 'u', 'b', 'rf', 'fr', 'br', 'rb'}
+
+
+def _unescape(value):
+    # Decode the backslash escapes of a string literal's body
+    if '\\' not in value:
+        return value
+    return _ESCAPE_PATTERN.sub(lambda m: _ESCAPES.get(m.group(1), m.group(0)), value)
+
+
+class _TokenList:
+    # Gives a list of Token objects the accessors Parser uses on a TokenBuffer
+    __slots__ = ('tokens',)
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+
+    def __len__(self):
+        return len(self.tokens)
+
+    def __getitem__(self, index):
+        return self.tokens[index]
+
+    def type_at(self, index):
+        return self.tokens[index].type
+
+    def value_at(self, index):
+        return self.tokens[index].value
+
+    def line_at(self, index):
+        return self.tokens[index].line
+
+    def column_at(self, index):
+        return self.tokens[index].column
+
+
 class Parser:
     def __init__(self, tokens):
-        # Initialize parser with token list
+        # Initialize parser with a token list, any iterable of tokens or a TokenBuffer
+        if not isinstance(tokens, (list, TokenBuffer)):
+            tokens = list(tokens)
         self.tokens = tokens
         self.pos = 0
+        # Read token types and values by index, so a TokenBuffer never has to create Tokens
+        source = tokens if isinstance(tokens, TokenBuffer) else _TokenList(tokens)
+        self._count = len(source)
+        self._type_at = source.type_at
+        self._value_at = source.value_at
+        self._line_at = source.line_at
+        self._column_at = source.column_at
 
     def current_token(self):
         # Get the current token or None if at end
-        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
-
-    def eat(self, token_type=None):
-        # Consume current token, optionally validating its type
-        token = self.current_token()
-        if token is None:
-            raise SyntaxError(f"Unexpected end of input")
-        if token_type is not None and token.type != token_type:
-            line_info = f" at line {token.line}" if hasattr(token, 'line') else ""
-            raise SyntaxError(f"Expected {token_type} but found {token.type}{line_info}")
+        return self.tokens[self.pos] if self.pos < self._count else None
+
+    def current_type(self):
+        # Type of the current token, or None if at end
+        return self._type_at(self.pos) if self.pos < self._count else None
+
+    def current_value(self):
+        # Value of the current token, or None if at end
+        return self._value_at(self.pos) if self.pos < self._count else None
+
+    def position(self):
+        # (line, column) of the current token, or of the last one at end of input
+        index = min(self.pos, self._count - 1)
+        if index < 0:
+            return None, None
+        return self._line_at(index), self._column_at(index)
+
+    def syntax_error(self, message):
+        # SyntaxError located at the current token, shaped like the ones ast.parse raises
+        line, column = self.position()
+        if line is None:
+            return SyntaxError(message)
+        return SyntaxError(message, (None, line, column + 1 if column is not None else None, None))
+
+    def eat(self, token_type=None, value=None):
+        # Consume current token, optionally validating its type and value
+        if self.pos >= self._count:
+            raise self.syntax_error("Unexpected end of input")
+        if token_type is not None and self._type_at(self.pos) != token_type:
+            raise self.syntax_error(f"Expected {token_type} but found {self._type_at(self.pos)}")
+        if value is not None and self._value_at(self.pos) != value:
+            raise self.syntax_error(f"Expected '{value}' but found '{self._value_at(self.pos)}'")
         self.pos += 1
-        return token
+
+    def at(self, token_type, value):
+        # Whether the current token has the given type and value
+        return (self.pos < self._count and self._type_at(self.pos) == token_type
+                and self._value_at(self.pos) == value)
 
     def parse(self):
         # Start the parsing process
@@ -29,9 +133,9 @@ class Parser:
     def program(self):
         # Parse the entire program
         statements = []
-        while self.current_token():
+        while self.current_type() is not None:
             # Skip whitespace tokens at program level
-            if self.current_token().type in ['NEWLINE', 'INDENT', 'DEDENT']:
+            if self.current_type() in ['NEWLINE', 'INDENT', 'DEDENT']:
                 self.eat()
                 continue
                 
@@ -43,19 +147,19 @@ class Parser:
         statements = []
         
         # Handle indented blocks
-        if self.current_token() and self.current_token().type == 'INDENT':
+        if self.current_type() == 'INDENT':
             self.eat('INDENT')
             
             # Process statements until DEDENT
-            while self.current_token() and self.current_token().type != 'DEDENT':
-                if self.current_token().type == 'NEWLINE':
+            while self.current_type() not in (None, 'DEDENT'):
+                if self.current_type() == 'NEWLINE':
                     self.eat()
                     continue
                     
                 statements.append(self.statement())
                 
             # End of indented block
-            if self.current_token() and self.current_token().type == 'DEDENT':
+            if self.current_type() == 'DEDENT':
                 self.eat('DEDENT')
         else:
             # Single statement block without indentation
@@ -65,13 +169,16 @@ class Parser:
 
     def statement(self):
         # Parse a single statement
-        token = self.current_token()
+        token_type = self.current_type()
 
-        if token.type == "IDENTIFIER":
-            return self.assignment()
+        if token_type == "IDENTIFIER":
+            # 'name = ...' assigns; any other line starting with a name is an expression
+            next_pos = self.pos + 1
+            if next_pos < self._count and self._type_at(next_pos) == "OPERATOR" and self._value_at(next_pos) == "=":
+                return self.assignment()
 
-        elif token.type == "KEYWORD":
-            keyword = token.value
+        elif token_type == "KEYWORD":
+            keyword = self.current_value()
             if keyword == "if":
                 return self.if_statement()
             elif keyword == "while":
@@ -85,222 +192,350 @@ class Parser:
             elif keyword == "return":
                 return self.return_statement()
 
-        raise SyntaxError(f"Unexpected token: {token}")
+        elif token_type is None:
+            raise self.syntax_error("Unexpected end of input")
+
+        return self.expression_statement()
 
     def assignment(self):
         # Parse variable assignment
-        identifier = self.current_token().value
+        line, column = self.position()
+        identifier = self.current_value()
         self.eat("IDENTIFIER")
-        self.eat("OPERATOR")  # Expect '='
+        self.eat("OPERATOR", "=")
+        expression = self.expression()
+        return AssignmentNode(identifier, expression, lineno=line, col=column)
+
+    def expression_statement(self):
+        # A bare expression, e.g. a call; its value is discarded as in the ast.parse path
         expression = self.expression()
-        return AssignmentNode(identifier, expression)
+        token_type = self.current_type()
+        if token_type == "OPERATOR" and self.current_value().endswith("="):
+            raise self.syntax_error(f"Unsupported assignment: '{self.current_value()}'")
+        if token_type not in (None, "NEWLINE", "DEDENT"):
+            # e.g. 'import sys' or 'pass', which lex as plain names
+            if isinstance(expression, IdentifierNode):
+                raise self.syntax_error(f"Unsupported statement: '{expression.name}'")
+            raise self.syntax_error(f"Unexpected token: {self.current_token()}")
+        return expression
 
     def if_statement(self):
-        # Parse if statement with optional else block
-        self.eat("KEYWORD")  # Consume 'if'
+        # Parse if statement with optional elif/else branches
+        line, column = self.position()
+        self.eat("KEYWORD")  # Consume 'if' or 'elif'
         condition = self.expression()
-        self.eat("SYMBOL")  # Expect ':'
+        self.eat("SYMBOL", ":")
         
         # Skip newlines before block
-        while self.current_token() and self.current_token().type == 'NEWLINE':
+        while self.current_type() == 'NEWLINE':
             self.eat()
             
         true_branch = self.block()
         false_branch = None
         
-        # Check for else clause
-        if self.current_token() and self.current_token().type == "KEYWORD" and self.current_token().value == "else":
+        # A branch written on the if line leaves its NEWLINE before the elif/else
+        pos = self.pos
+        while pos < self._count and self._type_at(pos) == 'NEWLINE':
+            pos += 1
+        if pos < self._count and self._type_at(pos) == "KEYWORD" and self._value_at(pos) in ("elif", "else"):
+            self.pos = pos
+
+        # Check for elif/else clause; elif nests another if in the else branch, as ast.parse does
+        if self.at("KEYWORD", "elif"):
+            false_branch = [self.if_statement()]
+        elif self.at("KEYWORD", "else"):
             self.eat("KEYWORD")
-            self.eat("SYMBOL")  # Expect ':'
+            self.eat("SYMBOL", ":")
             
             # Skip newlines before block
-            while self.current_token() and self.current_token().type == 'NEWLINE':
+            while self.current_type() == 'NEWLINE':
                 self.eat()
                 
             false_branch = self.block()
             
-        return IfNode(condition, true_branch, false_branch)
+        return IfNode(condition, true_branch, false_branch, lineno=line, col=column)
 
     def while_statement(self):
         # Parse while loop
+        line, column = self.position()
         self.eat("KEYWORD")  # Consume 'while'
         condition = self.expression()
-        self.eat("SYMBOL")  # Expect ':'
+        self.eat("SYMBOL", ":")
         
         # Skip newlines before block
-        while self.current_token() and self.current_token().type == 'NEWLINE':
+        while self.current_type() == 'NEWLINE':
             self.eat()
             
         body = self.block()
-        return WhileNode(condition, body)
+        return WhileNode(condition, body, lineno=line, col=column)
 
     def for_statement(self):
         # Parse for loop with iterable
+        line, column = self.position()
         self.eat("KEYWORD")  # Consume 'for'
-        variable = self.current_token().value
+        variable = self.current_value()
         self.eat("IDENTIFIER")
-        self.eat("KEYWORD")  # Expect 'in'
-
-        # Special handling for range expressions
-        if self.current_token().type == "IDENTIFIER" and self.current_token().value == "range":
-            iterable = self.range_expression()
-        else:
-            iterable = self.expression()
-
-        self.eat("SYMBOL")  # Expect ':'
+        self.eat("KEYWORD", "in")
+        iterable = self.expression()
+        self.eat("SYMBOL", ":")
         
         # Skip newlines before block
-        while self.current_token() and self.current_token().type == 'NEWLINE':
+        while self.current_type() == 'NEWLINE':
             self.eat()
             
         body = self.block()
-        return ForNode(variable, iterable, body)
-
-    def range_expression(self):
-        # Parse range function call for loops
-        self.eat("IDENTIFIER")  # Consume 'range'
-        self.eat("SYMBOL")  # Expect '('
-        argument = self.expression()
-        self.eat("SYMBOL")  # Expect ')'
-        return FunctionCallNode("range", [argument])
+        return ForNode(variable, iterable, body, lineno=line, col=column)
 
     def function_definition(self):
         # Parse function definition
+        line, column = self.position()
         self.eat("KEYWORD")  # Consume 'def'
-        name = self.current_token().value
+        name = self.current_value()
         self.eat("IDENTIFIER")
-        self.eat("SYMBOL")  # Expect '('
+        self.eat("SYMBOL", "(")
         
         # Parse parameter list
         parameters = []
-        if self.current_token().type != "SYMBOL" or self.current_token().value != ")":
+        if self.current_type() != "SYMBOL" or self.current_value() != ")":
             while True:
-                if self.current_token().type != "IDENTIFIER":
-                    raise SyntaxError(f"Expected parameter name, got {self.current_token()}")
-                parameters.append(self.current_token().value)
+                if self.current_type() != "IDENTIFIER":
+                    raise self.syntax_error(f"Expected parameter name, got {self.current_token()}")
+                parameters.append(self.current_value())
                 self.eat("IDENTIFIER")
-                if self.current_token().type == "SYMBOL" and self.current_token().value == ",":
+                if self.current_type() == "SYMBOL" and self.current_value() == ",":
                     self.eat("SYMBOL")
-                elif self.current_token().type == "SYMBOL" and self.current_token().value == ")":
+                elif self.current_type() == "SYMBOL" and self.current_value() == ")":
                     break
                 else:
-                    raise SyntaxError(f"Expected ',' or ')', got {self.current_token()}")
-        self.eat("SYMBOL")  # Expect ')'
-        self.eat("SYMBOL")  # Expect ':'
+                    raise self.syntax_error(f"Expected ',' or ')', got {self.current_token()}")
+        self.eat("SYMBOL", ")")
+        self.eat("SYMBOL", ":")
         
         # Skip newlines before block
-        while self.current_token() and self.current_token().type == 'NEWLINE':
+        while self.current_type() == 'NEWLINE':
             self.eat()
             
         body = self.block()
-        return FunctionDefNode(name, parameters, body)
+        return FunctionDefNode(name, parameters, body, lineno=line, col=column)
 
     def return_statement(self):
         # Parse return statement
+        line, column = self.position()
         self.eat("KEYWORD")  # Consume 'return'
         
         # Optional return value
-        if self.current_token() and self.current_token().type != "NEWLINE":
+        if self.current_type() not in (None, "NEWLINE", "DEDENT"):
             value = self.expression()
         else:
             value = None
-        return ReturnNode(value)
+        return ReturnNode(value, lineno=line, col=column)
 
     def print_statement(self):
-        # Parse print statement
+        # Parse print statement; only the first argument is printed, as in the ast.parse path
+        line, column = self.position()
         self.eat("KEYWORD")  # Consume 'print'
-        self.eat("SYMBOL")  # Expect '('
-        expression = self.expression()
-        self.eat("SYMBOL")  # Expect ')'
-        return PrintNode(expression)
-
-    def expression(self):
-        # Parse expressions with lowest precedence operators (comparison, addition/subtraction)
-        left = self.term()
-        while self.current_token() and self.current_token().type == "OPERATOR" and self.current_token().value in ('+', '-', '<', '>', '==', '!=', '<=', '>='):
-            operator = self.current_token().value
-            self.eat("OPERATOR")
-            right = self.term()
-            left = BinaryOpNode(left, operator, right)
-        return left
+        self.eat("SYMBOL", "(")
+        arguments = self.arguments()
+        self.eat("SYMBOL", ")")
+        expression = arguments[0] if arguments else StringNode("")
+        return PrintNode(expression, lineno=line, col=column)
+
+    def arguments(self):
+        # Parse call arguments up to the closing ')'; keyword arguments are skipped
+        args = []
+        while not self.at("SYMBOL", ")"):
+            next_pos = self.pos + 1
+            if (self.current_type() == "IDENTIFIER" and next_pos < self._count
+                    and self._type_at(next_pos) == "OPERATOR" and self._value_at(next_pos) == "="):
+                self.pos = next_pos + 1
+                self.expression()
+            else:
+                args.append(self.expression())
+            if not self.at("SYMBOL", ","):
+                break
+            self.eat("SYMBOL")
+        return args
 
-    def term(self):
-        # Parse terms with medium precedence operators (multiplication/division)
-        left = self.factor()
-        while self.current_token() and self.current_token().type == "OPERATOR" and self.current_token().value in ('*', '/'):
-            operator = self.current_token().value
-            self.eat("OPERATOR")
-            right = self.factor()
-            left = BinaryOpNode(left, operator, right)
+    def expression(self, min_power=0):
+        # Pratt loop: operators binding tighter than min_power fold into the left operand
+        left = self.unary()
+        type_at = self._type_at
+        value_at = self._value_at
+        count = self._count
+        compared = None  # right operand of the comparison just folded into left, if any
+        while self.pos < count:
+            # Cache the current token so each step reads the buffer once
+            pos = self.pos
+            token_type = type_at(pos)
+            if token_type != "OPERATOR" and token_type != "KEYWORD":
+                break
+            operator = value_at(pos)
+            power = _BINARY_PRECEDENCE.get(operator)
+            if power is None or power <= min_power:
+                break
+            self.pos = pos + 1
+            # Right-associative operators accept an operand of their own power on the right
+            right = self.expression(power - 1 if operator in _RIGHT_ASSOCIATIVE else power)
+            if power == _COMPARISON_POWER and compared is not None:
+                try:
+                    left = chain_comparison(left, compared, operator, right)
+                except ValueError as e:
+                    raise self.syntax_error(str(e)) from None
+            else:
+                left = BinaryOpNode(left, operator, right)
+            compared = right if power == _COMPARISON_POWER else None
         return left
 
+    def unary(self):
+        # Parse prefix operators ('not', '-', '+', '~') before falling back to an atom
+        pos = self.pos
+        if pos < self._count:
+            token_type = self._type_at(pos)
+            if token_type == "OPERATOR" or token_type == "KEYWORD":
+                operator = self._value_at(pos)
+                power = _PREFIX_PRECEDENCE.get(operator)
+                if power is not None:
+                    self.pos = pos + 1
+                    return UnaryOpNode(operator, self.expression(power))
+
+        # An atom followed by any number of subscripts
+        node = self.factor()
+        while self.pos < self._count and self._type_at(self.pos) == "SYMBOL" and self._value_at(self.pos) == "[":
+            self.pos += 1
+            index = self.expression()
+            self.eat("SYMBOL", "]")
+            # Same marker call CustomNodeConverter uses for list indexing
+            node = FunctionCallNode("__list_access__", [node, index])
+        return node
+
     def factor(self):
         # Parse factors (highest precedence elements)
-        token = self.current_token()
+        token_type = self.current_type()
         
         # Numeric literals
-        if token.type == "NUMBER":
-            value = token.value 
+        if token_type == "NUMBER":
+            value = self.current_value() 
             self.eat("NUMBER")
             return NumberNode(value)
             
-        # String literals
-        elif token.type == "STRING":
-            value = token.value
+        # String literals; adjacent literals are joined as in Python
+        elif token_type == "STRING":
+            value = _unescape(self.current_value())
             self.eat("STRING")
+            while self.current_type() == "STRING":
+                value += _unescape(self.current_value())
+                self.eat("STRING")
             return StringNode(value)
             
-        # Variables and function calls
-        elif token.type == "IDENTIFIER":
-            name = token.value
-            self.eat("IDENTIFIER")
+        # True, False and None, with the values CustomNodeConverter gives them
+        elif token_type == "KEYWORD" and self.current_value() in ("True", "False", "None"):
+            keyword = self.current_value()
+            self.eat("KEYWORD")
+            if keyword == "None":
+                return StringNode("nullptr")
+            return NumberNode(keyword == "True")
+
+        # Variables and function calls; conversion functions like int() lex as DATA_TYPE
+        elif token_type == "IDENTIFIER" or token_type == "DATA_TYPE":
+            name = self.current_value()
+            self.eat(token_type)
+
+            # String prefixes such as f"..." and r"..."
+            if self.current_type() == "STRING" and name.lower() in _STRING_PREFIXES:
+                return self.prefixed_string(name.lower())
             
             # Handle function calls
-            if self.current_token() and self.current_token().type == "SYMBOL" and self.current_token().value == "(":
-                self.eat("SYMBOL")  # Expect '('
-                args = []
-                
-                # Parse arguments if any
-                if self.current_token().type != "SYMBOL" or self.current_token().value != ")":
-                    args.append(self.expression())
-                    
-                    while self.current_token().type == "SYMBOL" and self.current_token().value == ",":
-                        self.eat("SYMBOL")  # Expect ','
-                        args.append(self.expression())
-                        
-                self.eat("SYMBOL")  # Expect ')'
+            if self.current_type() == "SYMBOL" and self.current_value() == "(":
+                self.eat("SYMBOL")
+                args = self.arguments()
+                self.eat("SYMBOL", ")")
+                if name == "input":
+                    # input() gets its own node, as in CustomNodeConverter
+                    return InputNode(args[0] if args else StringNode(""))
                 return FunctionCallNode(name, args)
             
             # Simple variable reference
             return IdentifierNode(name)
             
         # Parenthesized expressions
-        elif token.type == "SYMBOL" and token.value == "(":
+        elif token_type == "SYMBOL" and self.current_value() == "(":
             self.eat("SYMBOL")
             expr = self.expression()
-            self.eat("SYMBOL")  # Expect ')'
+            self.eat("SYMBOL", ")")
             return expr
             
         # List literals
-        elif token.type == "SYMBOL" and token.value == "[":
+        elif token_type == "SYMBOL" and self.current_value() == "[":
             self.eat("SYMBOL")  # Expect '['
             elements = []
             
             # Parse elements if any
-            if self.current_token().type != "SYMBOL" or self.current_token().value != "]":
+            if self.current_type() != "SYMBOL" or self.current_value() != "]":
                 elements.append(self.expression())
                 
-                while self.current_token().type == "SYMBOL" and self.current_token().value == ",":
+                while self.current_type() == "SYMBOL" and self.current_value() == ",":
                     self.eat("SYMBOL")  # Expect ','
                     
                     # Handle trailing comma
-                    if self.current_token().type == "SYMBOL" and self.current_token().value == "]":
+                    if self.current_type() == "SYMBOL" and self.current_value() == "]":
                         break
                         
                     elements.append(self.expression())
                     
-            self.eat("SYMBOL")  # Expect ']'
+            self.eat("SYMBOL", "]")
             return ListNode(elements)
             
+        elif token_type is None:
+            raise self.syntax_error("Unexpected end of input")
+
         else:
-            raise SyntaxError(f"Unexpected token: {token}")
+            raise self.syntax_error(f"Unexpected token: {self.current_token()}")
+
+    def prefixed_string(self, prefix):
+        # Parse a string literal written with a prefix; bytes are not supported
+        if 'b' in prefix:
+            raise self.syntax_error("Bytes literals are not supported")
+        value = self.current_value()
+        self.eat("STRING")
+        if 'f' in prefix:
+            return self.fstring(value, raw='r' in prefix)
+        return StringNode(value if 'r' in prefix else _unescape(value))
+
+    def fstring(self, body, raw=False):
+        # Join the literal text and replacement fields of an f-string with '+', the way
+        # CustomNodeConverter lowers JoinedStr; conversions and format specs are ignored
+        parts = []
+        text = []
+        for match in _FSTRING_PATTERN.finditer(body):
+            kind = match.lastgroup
+            if kind == 'open':
+                text.append('{')
+            elif kind == 'close':
+                text.append('}')
+            elif kind == 'text':
+                text.append(match.group(kind))
+            elif kind == 'error':
+                raise self.syntax_error(f"f-string: single '{match.group(kind)}' is not allowed")
+            else:
+                if text:
+                    literal = ''.join(text)
+                    parts.append(StringNode(literal if raw else _unescape(literal)))
+                    text = []
+                source = _FIELD_END.split(match.group(kind), 1)[0].strip()
+                if not source:
+                    raise self.syntax_error("f-string: empty expression not allowed")
+                if source.isidentifier() and source not in KEYWORDS:
+                    # Plain names are the common case and need no tokenizing
+                    parts.append(IdentifierNode(source))
+                else:
+                    parts.append(Parser(TokenBuffer.from_source(source)).expression())
+        if text:
+            literal = ''.join(text)
+            parts.append(StringNode(literal if raw else _unescape(literal)))
+
+        if not parts:
+            return StringNode("")
+        result = parts[0]
+        for part in parts[1:]:
+            result = BinaryOpNode(result, '+', part)
+        return result
@@ -0,0 +1,316 @@
+import time
+from constant_folding import ConstantFolder, constants_key, same_constants
+from control_flow import build_cfg, check_ssa, from_ssa, raise_cfg, to_ssa
+from dead_code import DeadCodeEliminator, scope_summary
+from ir_nodes import IRNode
+from type_inference import TypeInference
+
+# Passes run at each -O level, in order
+OPT_LEVELS = {
+    0: (),
+    1: ('fold', 'types'),
+    2: ('constprop', 'dce', 'types'),
+}
+DEFAULT_OPT_LEVEL = 2
+# Level of conversions that rerun on every edit: the GUI and --watch. dce and types look at
+# the whole program each time, which would cost more than the rest of an incremental edit
+INTERACTIVE_OPT_LEVEL = 0
+
+
+def count_nodes(instructions):
+    """Number of IR nodes in an instruction list, statements and expressions alike."""
+    count = 0
+    stack = list(instructions)
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(node)
+        elif isinstance(node, IRNode):
+            count += 1
+            for name in node.__slots__:
+                if name != 'lineno':
+                    stack.append(getattr(node, name))
+    return count
+
+
+class IRPass:
+    """An optimization over the IR instruction list.
+
+    run() returns the transformed list without modifying its input, which may be shared
+    with a cache, and records what it did in stats.counts and stats.notes. A program can
+    also be optimized one top-level statement at a time. Then state, a dict the pass keeps
+    per conversion, carries what the pass learned from the statements before, and
+    state_key() must identify everything in it that can change the result. context is what
+    segment_contexts() worked out about the rest of the program for this statement, or
+    None when instructions is the whole program.
+    """
+    name = None
+    stage = None  # progress stage shown while the pass runs
+    line_offset = 0  # added to the IR's line numbers in notes, when it is part of a file
+
+    def run(self, instructions, state, stats, context=None):
+        raise NotImplementedError
+
+    def state_key(self, state):
+        return None
+
+    def segment_contexts(self, segments, memo):
+        # One hashable context per top-level statement's instruction list, before any run.
+        # memo is what the previous call returned next to its contexts, for reusing work on
+        # unchanged statements; returns (contexts, memo)
+        return [None] * len(segments), {}
+
+
+class ConstantFoldingPass(IRPass):
+    """Folds constant expressions, and with propagate substitutes variables bound to constants."""
+    name = 'fold'
+    stage = "Folding constants"
+
+    def __init__(self, propagate=False):
+        self.propagate = propagate
+
+    def run(self, instructions, state, stats, context=None):
+        counts = stats.counts
+        constants = state.get('constants', {})
+        folder = ConstantFolder(constants, self.propagate)
+        instructions = folder.fold(instructions)
+        if self.propagate and not same_constants(folder.constants, constants):
+            state['constants'] = folder.constants
+            state['key'] = constants_key(folder.constants)
+        counts['folded'] = counts.get('folded', 0) + folder.folded
+        if self.propagate:
+            counts['propagated'] = counts.get('propagated', 0) + folder.propagated
+        return instructions
+
+    def state_key(self, state):
+        return state.get('key')
+
+
+class ConstantPropagationPass(ConstantFoldingPass):
+    name = 'constprop'
+    stage = "Propagating constants"
+
+    def __init__(self):
+        super().__init__(propagate=True)
+
+
+class DeadCodePass(IRPass):
+    """Removes unreachable statements, constant branches and unused assignments."""
+    name = 'dce'
+    stage = "Eliminating dead code"
+
+    def run(self, instructions, state, stats, context=None):
+        eliminator = DeadCodeEliminator()
+        if context is None:
+            instructions = eliminator.eliminate(instructions)
+        else:
+            instructions = eliminator.eliminate_scope(instructions, *context)[0]
+        for reason, count in eliminator.counts.items():
+            stats.counts[reason] = stats.counts.get(reason, 0) + count
+        stats.notes.extend(eliminator.notes(self.line_offset))
+        return instructions
+
+    def segment_contexts(self, segments, memo):
+        # Liveness at the top level crosses statements. What is removed from one only depends
+        # on which of the variables it assigns are live after it, assigned before it, read
+        # anywhere or read by a function, so that is its context. A statement never stops
+        # other variables being live, so the variables live before it are those live after
+        # it that it does not assign plus what it makes live itself given its context, which
+        # memo keeps per statement and context.
+        new_memo = {}
+        entries = []
+        for segment in segments:
+            entry = memo.get(id(segment))
+            if entry is None or entry[0] is not segment:
+                # (statement, scope_summary, context -> variables it makes live)
+                entry = (segment, scope_summary(segment), {})
+            new_memo[id(segment)] = entry
+            entries.append(entry)
+
+        reads, function_reads = set(), set()
+        for _, (segment_reads, _, segment_function_reads), _ in entries:
+            reads |= segment_reads
+            function_reads |= segment_function_reads
+        reads |= function_reads
+
+        assigned_before = []
+        assigned = set()
+        for _, (_, names, _), _ in entries:
+            assigned_before.append(frozenset(names & assigned))
+            assigned |= names
+
+        contexts = [None] * len(segments)
+        live = set()
+        eliminator = DeadCodeEliminator()
+        for index in range(len(segments) - 1, -1, -1):
+            segment, (_, names, _), live_in = entries[index]
+            context = (frozenset(live & names), assigned_before[index],
+                       frozenset(reads & names), frozenset(function_reads & names))
+            contexts[index] = context
+            made_live = live_in.get(context)
+            if made_live is None:
+                made_live = live_in[context] = frozenset(eliminator.eliminate_scope(segment, *context)[1])
+            live -= names
+            live |= made_live
+        return contexts, new_memo
+
+
+class TypeInferencePass(IRPass):
+    """Infers concrete C++ types for function signatures, call results and list literals."""
+    name = 'types'
+    stage = "Inferring types"
+
+    def run(self, instructions, state, stats, context=None):
+        if context is None:
+            inference = TypeInference()
+            inference.infer([instructions])
+            stats.counts['rounds'] = stats.counts.get('rounds', 0) + inference.rounds
+        else:
+            inference = TypeInference(dict(context))
+        return inference.annotate(instructions)
+
+    def segment_contexts(self, segments, memo):
+        # Types cross statements both ways, through call sites and return values, so the
+        # whole program is inferred again, replaying the scans of unchanged statements from
+        # memo; a statement's context is the facts it depends on
+        inference = TypeInference()
+        touched = inference.infer(segments, memo)
+        facts = inference.facts
+        contexts = [frozenset((key, facts[key]) for key in keys if key in facts) for keys in touched]
+        return contexts, inference.memo
+
+
+class SSAPass(IRPass):
+    """Lowers the IR to a control-flow graph in SSA form and raises it back unchanged.
+
+    No -O level runs it; it checks the lowering and is where passes over the SSA form go.
+    """
+    name = 'ssa'
+    stage = "Converting to SSA form"
+
+    def run(self, instructions, state, stats, context=None):
+        graph = to_ssa(build_cfg(instructions))
+        problems = check_ssa(graph)
+        if problems:
+            raise ValueError("Invalid SSA form: " + "; ".join(problems))
+        counts = stats.counts
+        blocks, phis = _graph_size(graph)
+        counts['blocks'] = counts.get('blocks', 0) + blocks
+        counts['phis'] = counts.get('phis', 0) + phis
+        return raise_cfg(from_ssa(graph))
+
+
+def _graph_size(graph):
+    # (blocks, phis) of a graph and the graphs of the functions in it
+    blocks, phis = len(graph.blocks), 0
+    for block in graph.blocks:
+        phis += len(block.phis)
+        for statement in block.statements:
+            nested = getattr(statement, 'graph', None)
+            if nested is not None:
+                nested_blocks, nested_phis = _graph_size(nested)
+                blocks += nested_blocks
+                phis += nested_phis
+    return blocks, phis
+
+
+# Pass name -> factory of a fresh pass object
+PASSES = {
+    'fold': ConstantFoldingPass,
+    'constprop': ConstantPropagationPass,
+    'dce': DeadCodePass,
+    'types': TypeInferencePass,
+    'ssa': SSAPass,
+}
+
+
+def register_pass(pass_class):
+    """Make an IRPass subclass selectable by its name."""
+    PASSES[pass_class.name] = pass_class
+    return pass_class
+
+
+def parse_passes(text):
+    """Pass names from a comma-separated list such as "fold,constprop"; raises ValueError on unknown names."""
+    names = tuple(name.strip() for name in text.split(',') if name.strip())
+    unknown = [name for name in names if name not in PASSES]
+    if unknown:
+        raise ValueError(f"Unknown pass: {', '.join(unknown)} (available: {', '.join(PASSES)})")
+    return names
+
+
+class PassStats:
+    """Time and IR size change of one pass, summed over the runs of one conversion."""
+    __slots__ = ('name', 'seconds', 'nodes_before', 'nodes_after', 'counts', 'notes')
+
+    def __init__(self, name):
+        self.name = name
+        self.seconds = 0.0
+        self.nodes_before = 0
+        self.nodes_after = 0
+        self.counts = {}  # the pass's own counters, e.g. folded expressions
+        self.notes = []  # what the pass changed, e.g. "line 3: unused assignment to x"
+
+    @property
+    def node_delta(self):
+        return self.nodes_after - self.nodes_before
+
+    def to_dict(self):
+        result = {name: getattr(self, name) for name in self.__slots__}
+        result['node_delta'] = self.node_delta
+        return result
+
+
+class PassManager:
+    """Runs an ordered list of IR passes and records the time and node-count delta of each."""
+
+    def __init__(self, names=()):
+        self.names = tuple(names)
+        self.passes = [PASSES[name]() for name in self.names]
+        self.stats = [PassStats(name) for name in self.names]
+
+    @classmethod
+    def for_level(cls, level):
+        return cls(OPT_LEVELS[level])
+
+    def reset_stats(self):
+        self.stats = [PassStats(name) for name in self.names]
+
+    def run(self, instructions, progress=None):
+        """Run every pass over the whole program's instructions in order and return the result.
+
+        progress, if given, is called with each pass's stage name.
+        """
+        nodes = None
+        for index, ir_pass in enumerate(self.passes):
+            if progress is not None:
+                progress(ir_pass.stage)
+            instructions, nodes = self.run_pass(index, instructions, {}, nodes=nodes)
+        return instructions
+
+    def run_pass(self, index, instructions, state, context=None, nodes=None, line_offset=0):
+        # Run one pass and add its time and node-count change to its stats; nodes is the
+        # node count of instructions if already known, line_offset what to add to their line
+        # numbers to get the file's. Returns (instructions, node count)
+        stats = self.stats[index]
+        if nodes is None:
+            nodes = count_nodes(instructions)
+        ir_pass = self.passes[index]
+        ir_pass.line_offset = line_offset
+        start = time.perf_counter()
+        instructions = ir_pass.run(instructions, state, stats, context)
+        stats.seconds += time.perf_counter() - start
+        after = count_nodes(instructions)
+        stats.nodes_before += nodes
+        stats.nodes_after += after
+        return instructions, after
+
+    def summary(self):
+        # One line for a status bar, e.g. "constprop -120 nodes (folded 40, propagated 12)"
+        parts = []
+        for stats in self.stats:
+            text = f"{stats.name} {stats.node_delta:+d} nodes"
+            if stats.counts:
+                text += " (" + ", ".join(f"{name} {value}" for name, value in stats.counts.items()) + ")"
+            parts.append(text)
+        return ", ".join(parts)
@@ -0,0 +1,152 @@
+import ast
+from ir_generator import IRGenerator
+from code_generator import CodeGenerator
+from lexer import TokenBuffer
+from parser import Parser
+from pass_manager import DEFAULT_OPT_LEVEL, PassManager
+from semantic_analyzer import SemanticAnalyzer
+
+# Bump whenever the generated C++ for a given input can change, so cached results are invalidated
+CONVERTER_VERSION = "11"
+
+# Front ends that parse Python source for IRGenerator: CPython's ast.parse, whose tree is
+# lowered to IR directly, or the hand-written lexer, parser and semantic analyzer, which
+# build the custom AST
+FRONTENDS = ('cpython', 'native')
+DEFAULT_FRONTEND = 'cpython'
+
+
+class ConversionCancelled(Exception):
+    # Raised from a progress callback to abandon a conversion that is no longer wanted
+    pass
+
+
+def _report(progress, stage):
+    # Tell the caller which stage is starting; the callback may raise ConversionCancelled
+    if progress is not None:
+        progress(stage)
+
+
+def parse_source(code, progress=None, frontend=DEFAULT_FRONTEND):
+    """Parse Python source with the chosen front end into a tree IRGenerator can lower."""
+    if frontend == 'native':
+        # Step 1: Tokenize and parse straight to the custom AST, then check it
+        _report(progress, "Tokenizing")
+        tokens = TokenBuffer.from_source(code)
+        _report(progress, "Parsing")
+        custom_ast = Parser(tokens).parse()
+        _report(progress, "Checking semantics")
+        SemanticAnalyzer().analyze(custom_ast)
+        return custom_ast
+    if frontend != 'cpython':
+        raise ValueError(f"Unknown front end: {frontend}")
+
+    # Step 1: Parse to Python AST
+    _report(progress, "Parsing Python")
+    return ast.parse(code)
+
+
+def generate_ir(code, progress=None, frontend=DEFAULT_FRONTEND):
+    """Parse Python source and lower it to the IR instruction list."""
+    tree = parse_source(code, progress, frontend)
+
+    # Step 2: Generate IR, straight from the Python AST for the cpython front end
+    _report(progress, "Generating IR")
+    ir_generator = IRGenerator()
+    ir_generator.generate(tree)
+    return ir_generator.get_instructions()
+
+
+def _optimizer_or_default(optimizer):
+    return PassManager.for_level(DEFAULT_OPT_LEVEL) if optimizer is None else optimizer
+
+
+def optimize_ir(ir, progress=None, optimizer=None):
+    """Run the IR passes of a PassManager, by default those of DEFAULT_OPT_LEVEL."""
+    # Step 3: Optimize the IR; the input list is left untouched
+    return _optimizer_or_default(optimizer).run(ir, progress)
+
+
+def generate_cpp(ir, progress=None):
+    """Turn an IR instruction list into a complete C++ program."""
+    # Step 4: Generate C++ code
+    _report(progress, "Generating C++")
+    code_generator = CodeGenerator()
+    code_generator.generate(ir)
+    _report(progress, "Assembling C++")
+    return code_generator.get_cpp_code()
+
+
+def write_cpp(ir, out, progress=None):
+    """Turn an IR instruction list into a complete C++ program written to the text stream out."""
+    # Step 4: Generate C++ code, one top-level statement at a time
+    _report(progress, "Generating C++")
+    CodeGenerator().write_cpp(ir, out)
+
+
+class _Tee:
+    # Text stream that writes everything to several others
+    def __init__(self, *streams):
+        self.streams = streams
+
+    def write(self, text):
+        for stream in self.streams:
+            stream.write(text)
+        return len(text)
+
+
+def convert_to_stream(code, out, cache=None, progress=None, frontend=DEFAULT_FRONTEND, optimizer=None):
+    """Convert a source string and write the C++ program to the text stream out.
+
+    Unlike convert_source the program is never held in memory as a whole: it is generated
+    one top-level statement at a time, and a cached result is copied from disk. Returns
+    whether the result came from the cache.
+    """
+    optimizer = _optimizer_or_default(optimizer)
+    if cache is None:
+        write_cpp(optimize_ir(generate_ir(code, progress, frontend), progress, optimizer), out, progress)
+        return False
+
+    _report(progress, "Checking cache")
+    key = cache.key(code, frontend=frontend, passes=optimizer.names)
+    if cache.copy_to(key, out):
+        return True
+    ir = optimize_ir(generate_ir(code, progress, frontend), progress, optimizer)
+    with cache.open_entry(key, ir) as entry:
+        write_cpp(ir, _Tee(out, entry), progress)
+    return False
+
+
+def convert_with_cache(code, cache, incremental=None, progress=None, frontend=DEFAULT_FRONTEND, optimizer=None):
+    """Convert code through a ConversionCache, returning (cpp_code, cache_hit)."""
+    optimizer = _optimizer_or_default(optimizer)
+    _report(progress, "Checking cache")
+    key = cache.key(code, frontend=frontend, passes=optimizer.names)
+    cpp_code = cache.get(key)
+    if cpp_code is not None:
+        return cpp_code, True
+
+    if incremental is not None and frontend == 'cpython':
+        cpp_code = incremental.convert(code, progress, optimizer)
+        ir = incremental.instructions
+    else:
+        ir = optimize_ir(generate_ir(code, progress, frontend), progress, optimizer)
+        cpp_code = generate_cpp(ir, progress)
+    cache.put(key, cpp_code, ir)
+    return cpp_code, False
+
+
+def convert_source(code, cache=None, incremental=None, progress=None, frontend=DEFAULT_FRONTEND, optimizer=None):
+    """Run the full Python -> C++ pipeline on a source string and return the C++ program.
+
+    With an IncrementalConverter only the top-level statements that changed since its
+    previous conversion are regenerated; it splits statements with ast.parse, so the
+    native front end always converts the whole source. progress, if given, is called with
+    the name of each stage as it starts. optimizer is the PassManager whose passes run over
+    the IR, by default the DEFAULT_OPT_LEVEL ones; its stats tell what each pass did.
+    """
+    if cache is not None:
+        return convert_with_cache(code, cache, incremental, progress, frontend, optimizer)[0]
+    if incremental is not None and frontend == 'cpython':
+        return incremental.convert(code, progress, optimizer)
+    return generate_cpp(optimize_ir(generate_ir(code, progress, frontend), progress, optimizer), progress)
@@ -1,9 +1,29 @@
 from ast_nodes import (
     Program, AssignmentNode, IfNode, WhileNode, ForNode, PrintNode,
-    BinaryOpNode, IdentifierNode, NumberNode, StringNode, FunctionCallNode,
-    FunctionDefNode, ReturnNode, ListNode
+    BinaryOpNode, UnaryOpNode, IdentifierNode, NumberNode, StringNode, FunctionCallNode,
+    FunctionDefNode, ReturnNode, ListNode, InputNode
 )
 
+# Types of the value of each built-in function the code generator translates
+BUILTIN_TYPES = {
+    'range': 'iterable',
+    'len': 'int',
+    'int': 'int',
+    'float': 'float',
+    'str': 'string',
+    'bool': 'bool',
+    'type': 'string',
+    'abs': 'unknown',
+    'min': 'unknown',
+    'max': 'unknown',
+    'sum': 'unknown',
+    'round': 'unknown',
+}
+
+NUMERIC_TYPES = {'int', 'float', 'bool'}
+
+COMPARISON_OPERATORS = {'==', '!=', '<', '>', '<=', '>='}
+
 class SemanticError(Exception):
     # Custom exception for semantic analysis errors
     pass
@@ -36,112 +56,256 @@ class SemanticAnalyzer:
     def __init__(self):
         # Initialize the symbol table for tracking variables
         self.symbol_table = ScopedSymbolTable()
+        # Line of the statement being analyzed, for error messages
+        self.line = None
+        # Top-level functions whose bodies are checked after the rest of the program
+        self._deferred = None
 
     def analyze(self, node):
+        try:
+            return self._analyze(node)
+        except SemanticError as e:
+            # Report the innermost statement line once, where the error surfaces
+            if self.line is not None and not getattr(e, 'lineno', None):
+                e.lineno = self.line
+                e.args = (f"{e} at line {self.line}",)
+            raise
+
+    def _analyze(self, node):
+        # Look up the check for this node type in the dispatch table
+        handler = self._HANDLERS.get(type(node))
+        if handler is None:
+            raise SemanticError(f"No semantic analysis defined for {type(node).__name__}")
+        return handler(self, node)
+
+    def _check_list(self, node):
         # Process lists of nodes
-        if isinstance(node, list):
-            for n in node:
-                self.analyze(n)
+        for n in node:
+            self._analyze(n)
 
-        # Program node contains statements
-        elif isinstance(node, Program):
-            self.analyze(node.statements)
+    def _check_program(self, node):
+        # Program node contains statements; bodies of top-level functions are checked last,
+        # since they may use globals and functions assigned further down
+        self._deferred = []
+        self._analyze(node.statements)
+        for function in self._deferred:
+            self.line = function.lineno
+            self._analyze_function_body(function)
 
+    def _check_assignment(self, node):
         # Variable assignment - record the variable type
-        elif isinstance(node, AssignmentNode):
-            expr_type = self.analyze(node.expression)
-            self.symbol_table.declare(node.identifier, expr_type)
-
-        # If statement - verify condition and analyze branches
-        elif isinstance(node, IfNode):
-            cond_type = self.analyze(node.condition)
-            if cond_type != 'int':
-                raise SemanticError(f"Condition in if must be an integer (0 or 1), got {cond_type}.")
-            self.symbol_table.enter_scope()
-            self.analyze(node.true_branch)
-            self.symbol_table.exit_scope()
-            if node.false_branch:
-                self.symbol_table.enter_scope()
-                self.analyze(node.false_branch)
-                self.symbol_table.exit_scope()
+        self.line = node.lineno
+        expr_type = self._analyze(node.expression)
+        self.symbol_table.declare(node.identifier, expr_type)
+
+    def _check_if(self, node):
+        # If statement - verify condition and analyze branches; like Python, blocks do not
+        # open a scope, so names assigned in a branch stay visible after it
+        self.line = node.lineno
+        cond_type = self._analyze(node.condition)
+        if not self._is_condition(cond_type):
+            raise SemanticError(f"Condition in if must be a number or a boolean, got {cond_type}.")
+        self._analyze(node.true_branch)
+        if node.false_branch:
+            self._analyze(node.false_branch)
 
+    def _check_while(self, node):
         # While loop - verify condition and analyze body
-        elif isinstance(node, WhileNode):
-            cond_type = self.analyze(node.condition)
-            if cond_type != 'int':
-                raise SemanticError(f"Condition in while must be an integer (0 or 1), got {cond_type}.")
-            self.symbol_table.enter_scope()
-            self.analyze(node.body)
-            self.symbol_table.exit_scope()
+        self.line = node.lineno
+        cond_type = self._analyze(node.condition)
+        if not self._is_condition(cond_type):
+            raise SemanticError(f"Condition in while must be a number or a boolean, got {cond_type}.")
+        self._analyze(node.body)
 
+    def _check_for(self, node):
         # For loop - verify iterable and analyze body
-        elif isinstance(node, ForNode):
-            iterable_type = self.analyze(node.iterable)
-            if iterable_type not in ['int', 'iterable']:
-                raise SemanticError(f"For loops expect a valid iterable, got {iterable_type}.")
-            self.symbol_table.enter_scope()
-            self.symbol_table.declare(node.variable, 'int')
-            self.analyze(node.body)
-            self.symbol_table.exit_scope()
+        self.line = node.lineno
+        iterable_type = self._analyze(node.iterable)
+        if iterable_type in ('iterable', 'int'):
+            element_type = 'int'
+        elif iterable_type.startswith('list<'):
+            element_type = iterable_type[5:-1]
+        elif iterable_type in ('string', 'unknown'):
+            element_type = iterable_type
+        else:
+            raise SemanticError(f"For loops expect a valid iterable, got {iterable_type}.")
+        self.symbol_table.declare(node.variable, element_type)
+        self._analyze(node.body)
 
+    def _check_print(self, node):
         # Print statement - just analyze the expression
-        elif isinstance(node, PrintNode):
-            self.analyze(node.expression)
-
-        # Binary operation - verify operands have matching types
-        elif isinstance(node, BinaryOpNode):
-            left_type = self.analyze(node.left)
-            right_type = self.analyze(node.right)
-            if left_type != right_type:
-                raise SemanticError(f"Type mismatch: {left_type} vs {right_type}")
-            return left_type
+        self.line = node.lineno
+        self._analyze(node.expression)
 
+    def _check_operators(self, root):
+        # Binary and prefix operations - typed bottom-up with an explicit stack, so operator
+        # chains thousands of levels deep are checked without recursion
+        types = []
+        stack = [(root, False)]
+        while stack:
+            node, operands_done = stack.pop()
+            node_type = type(node)
+            if node_type is BinaryOpNode:
+                if operands_done:
+                    right_type = types.pop()
+                    types[-1] = self._binary_type(node.operator, types[-1], right_type)
+                else:
+                    stack.append((node, True))
+                    stack.append((node.right, False))
+                    stack.append((node.left, False))
+            elif node_type is UnaryOpNode:
+                if operands_done:
+                    types[-1] = self._unary_type(node.operator, types[-1])
+                else:
+                    stack.append((node, True))
+                    stack.append((node.operand, False))
+            else:
+                types.append(self._analyze(node))
+        return types[0]
+
+    def _unary_type(self, operator, operand_type):
+        # 'not' gives a boolean, the other prefix operators need a number
+        if operator == 'not':
+            return 'bool'
+        if operand_type not in NUMERIC_TYPES and operand_type != 'unknown':
+            raise SemanticError(f"Bad operand type for unary {operator}: {operand_type}")
+        return 'int' if operand_type == 'bool' else operand_type
+
+    def _check_identifier(self, node):
         # Variable reference - lookup in symbol table
-        elif isinstance(node, IdentifierNode):
-            return self.symbol_table.lookup(node.name)
+        return self.symbol_table.lookup(node.name)
 
-        # Numeric literal
-        elif isinstance(node, NumberNode):
-            return 'int'
+    def _check_number(self, node):
+        # Numeric literal (True and False are numbers too)
+        if isinstance(node.value, bool):
+            return 'bool'
+        return 'float' if isinstance(node.value, float) else 'int'
 
+    def _check_string(self, node):
         # String literal
-        elif isinstance(node, StringNode):
-            return 'string'
+        return 'string'
+
+    def _check_input(self, node):
+        # input() always reads a string
+        if node.prompt is not None:
+            self._analyze(node.prompt)
+        return 'string'
 
+    def _check_list_literal(self, node):
         # List literal - determine element type
-        elif isinstance(node, ListNode):
-            if node.elements:
-                # Assume all list elements have same type as first
-                first_elem_type = self.analyze(node.elements[0])
-                return f'list<{first_elem_type}>'
-            return 'list<unknown>'
-
-        # Function call - handle built-ins like range()
-        elif isinstance(node, FunctionCallNode):
-            if node.function_name == "range":
-                if len(node.arguments) not in [1, 2]:
-                    raise SemanticError(f"Invalid number of arguments for range(), expected 1 or 2 arguments.")
-                for arg in node.arguments:
-                    arg_type = self.analyze(arg)
-                    if arg_type != 'int':
-                        raise SemanticError(f"Argument to range() must be an integer, got {arg_type}")
-                return 'iterable'
-            else:
-                raise SemanticError(f"Unknown function call: {node.function_name}")
+        if node.elements:
+            # Assume all list elements have same type as first
+            first_elem_type = self._analyze(node.elements[0])
+            for element in node.elements[1:]:
+                self._analyze(element)
+            return f'list<{first_elem_type}>'
+        return 'list<unknown>'
 
+    def _check_function_def(self, node):
         # Function definition - create scope for parameters
-        elif isinstance(node, FunctionDefNode):
-            self.symbol_table.declare(node.name, 'function')
-            self.symbol_table.enter_scope()
-            for param in node.parameters:
-                self.symbol_table.declare(param, 'int')  # Assume all params are int
-            self.analyze(node.body)
-            self.symbol_table.exit_scope()
+        self.line = node.lineno
+        self.symbol_table.declare(node.name, 'function')
+        if len(self.symbol_table.scopes) == 1 and self._deferred is not None:
+            self._deferred.append(node)
+        else:
+            self._analyze_function_body(node)
 
+    def _check_return(self, node):
         # Return statement - analyze the return value
-        elif isinstance(node, ReturnNode):
-            if node.value:
-                self.analyze(node.value)
+        self.line = node.lineno
+        if node.value:
+            self._analyze(node.value)
 
-        else:
-            raise SemanticError(f"No semantic analysis defined for {type(node).__name__}")
+    def _analyze_function_body(self, node):
+        # Check a function body in its own scope
+        self.symbol_table.enter_scope()
+        for param in node.parameters:
+            self.symbol_table.declare(param, 'unknown')  # Parameter types come from the callers
+        self._analyze(node.body)
+        self.symbol_table.exit_scope()
+
+    def _is_condition(self, type_):
+        # Types a C++ condition accepts directly
+        return type_ in NUMERIC_TYPES or type_ == 'unknown'
+
+    def _binary_type(self, operator, left_type, right_type):
+        # Result type of a binary operation, or a SemanticError for operands it cannot take
+        if operator in COMPARISON_OPERATORS or operator in ('and', 'or'):
+            if operator in COMPARISON_OPERATORS and not self._compatible(left_type, right_type):
+                raise SemanticError(f"Type mismatch: {left_type} vs {right_type}")
+            return 'bool'
+        if left_type == 'unknown' or right_type == 'unknown':
+            # Operands of unknown type (e.g. parameters) take the type of the other side
+            return right_type if left_type == 'unknown' else left_type
+        if left_type in NUMERIC_TYPES and right_type in NUMERIC_TYPES:
+            if operator == '/' or 'float' in (left_type, right_type):
+                return 'float'
+            return 'int'
+        if operator == '+' and left_type == right_type and left_type != 'function':
+            return left_type  # string and list concatenation
+        if operator == '+' and 'string' in (left_type, right_type) and 'function' not in (left_type, right_type):
+            # f-string fields are joined with '+'; the code generator converts the other side
+            return 'string'
+        if operator == '*' and {left_type, right_type} in ({'string', 'int'}, {'string', 'bool'}):
+            return 'string'
+        if operator == '%' and left_type == 'string':
+            return 'string'
+        raise SemanticError(f"Type mismatch: {left_type} vs {right_type}")
+
+    def _compatible(self, left_type, right_type):
+        # Whether values of the two types can be compared
+        if left_type == right_type or 'unknown' in (left_type, right_type):
+            return True
+        return left_type in NUMERIC_TYPES and right_type in NUMERIC_TYPES
+
+    def _check_function_call(self, node):
+        # Function call - built-ins, list indexing and functions defined in the program
+        name = node.function_name
+        arg_types = [self._analyze(arg) for arg in node.arguments]
+
+        if name == "range":
+            if len(arg_types) not in [1, 2, 3]:
+                raise SemanticError(f"Invalid number of arguments for range(), expected 1 to 3 arguments.")
+            for arg_type in arg_types:
+                if arg_type not in ('int', 'bool', 'unknown'):
+                    raise SemanticError(f"Argument to range() must be an integer, got {arg_type}")
+            return 'iterable'
+
+        if name == "__list_access__":
+            # Marker call for container[index]
+            container_type = arg_types[0]
+            if container_type.startswith('list<'):
+                return container_type[5:-1]
+            return 'string' if container_type == 'string' else 'unknown'
+
+        if name in BUILTIN_TYPES:
+            return BUILTIN_TYPES[name]
+
+        try:
+            kind = self.symbol_table.lookup(name)
+        except SemanticError:
+            raise SemanticError(f"Unknown function call: {name}")
+        if kind not in ('function', 'unknown'):
+            raise SemanticError(f"'{name}' is not callable, it is {kind}")
+        return 'unknown'
+
+    # Node type -> check dispatch table
+    _HANDLERS = {
+        list: _check_list,
+        Program: _check_program,
+        AssignmentNode: _check_assignment,
+        IfNode: _check_if,
+        WhileNode: _check_while,
+        ForNode: _check_for,
+        PrintNode: _check_print,
+        BinaryOpNode: _check_operators,
+        UnaryOpNode: _check_operators,
+        IdentifierNode: _check_identifier,
+        NumberNode: _check_number,
+        StringNode: _check_string,
+        InputNode: _check_input,
+        ListNode: _check_list_literal,
+        FunctionCallNode: _check_function_call,
+        FunctionDefNode: _check_function_def,
+        ReturnNode: _check_return,
+    }
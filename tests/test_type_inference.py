@@ -0,0 +1,48 @@
+"""Regression cases for the whole-program type inference.
+
+Run from the repository root:
+    python -m unittest discover tests
+"""
+import os
+import sys
+import unittest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from pipeline import generate_ir
+from type_inference import _MAX_NESTING, TypeInference
+
+
+def call_chain(depth):
+    # g1 returns its argument and every g_i calls g_{i-1} with an int and with its own
+    # argument, so the double passed to the last one takes one round per function to reach g1
+    lines = ["def g1(x):", "    return x"]
+    for index in range(2, depth + 1):
+        lines += [f"def g{index}(x):", f"    g{index - 1}(1)", f"    return g{index - 1}(x)"]
+    lines.append(f"print(g{depth}(0.5))")
+    return "\n".join(lines) + "\n"
+
+
+def infer(source):
+    inference = TypeInference()
+    inference.infer([generate_ir(source)])
+    return inference
+
+
+class TypeInferenceTest(unittest.TestCase):
+    def test_long_call_chain_settles_on_double(self):
+        inference = infer(call_chain(30))
+        for index in range(1, 31):
+            self.assertEqual(inference.facts[('var', f'g{index}', 'x')], 'double')
+            self.assertEqual(inference.facts[('return', f'g{index}')], 'double')
+        self.assertGreater(inference.rounds, 30)
+
+    def test_list_nested_in_itself_settles_on_auto(self):
+        inference = infer("x = []\nfor i in range(3):\n    x = [x]\n")
+        self.assertEqual(inference.facts[('var', None, 'x')], 'auto')
+        self.assertLessEqual(inference.rounds, _MAX_NESTING + 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,491 @@
+from control_flow import operands, with_operands
+from constant_folding import assigned_names
+from ir_nodes import *
+
+# Types are C++ type names as CodeGenerator.declared_vars holds them: 'int', 'double',
+# 'string', 'bool', 'void' and 'vector<T>'. None is not known (yet), 'auto' is conflicting
+# and 'vector<>' is a list whose elements are not known.
+
+# Lists nested deeper than this are given 'auto'. With no bound a list nested in itself
+# would grow a vector<> every round; with it there are finitely many types a fact can
+# take, and as facts only ever widen the fixpoint is always reached
+_MAX_NESTING = 8
+
+_BUILTIN_RESULTS = {
+    'int': 'int',
+    'len': 'int',
+    'float': 'double',
+    'str': 'string',
+    'input': 'string',
+    'bool': 'bool',
+    'range': 'vector<int>',
+}
+
+_SCALARS = ('int', 'double', 'bool', 'string')
+_BOOLEAN_OPERATORS = ('and', 'or')
+_COMPARISON_OPERATORS = ('==', '!=', '<', '<=', '>', '>=')
+_INT_OPERATORS = ('&', '|', '^', '<<', '>>')
+
+
+def vector_of(element):
+    return f"vector<{element or ''}>"
+
+
+def element_of(vector):
+    """Element type of a vector type, None for other types or unknown elements."""
+    if vector is None or not vector.startswith('vector<'):
+        return None
+    return vector[7:-1] or None
+
+
+def join_types(first, second):
+    """The type that holds values of both types: int and double make double, bool and int make int."""
+    if first is None or first == second:
+        return second
+    if second is None:
+        return first
+    pair = {first, second}
+    if pair == {'int', 'double'} or pair == {'bool', 'double'}:
+        return 'double'
+    if pair == {'bool', 'int'}:
+        return 'int'
+    if first.startswith('vector<') and second.startswith('vector<'):
+        element = join_types(element_of(first), element_of(second))
+        return 'auto' if element == 'auto' else vector_of(element)
+    return 'auto'
+
+
+def join_elements(types):
+    # Element type of a list literal; numbers mixed with strings are stored as strings
+    result = None
+    for element_type in types:
+        result = join_types(result, element_type)
+    if result == 'auto' and all(element_type in _SCALARS for element_type in types if element_type is not None):
+        return 'string'
+    return result
+
+
+def cpp_type(inferred):
+    """C++ spelling of an inferred type, or None when there is no single concrete type."""
+    if inferred is None or 'auto' in inferred:
+        return None
+    return inferred.replace('<>', '<int>')
+
+
+def _returns_value(statements):
+    # Whether a function body returns a value anywhere, nested functions aside
+    stack = list(statements)
+    while stack:
+        statement = stack.pop()
+        opcode = statement.opcode
+        if opcode == RETURN and statement.value is not None:
+            return True
+        if opcode == IF:
+            stack.extend(statement.body)
+            stack.extend(statement.orelse or ())
+        elif opcode == WHILE or opcode == FOR:
+            stack.extend(statement.body)
+    return False
+
+
+class TypeInference:
+    """Whole-program inference of the C++ types of variables, parameters and return values.
+
+    Types flow from constants through expressions into the variables they are assigned to,
+    from call sites into the parameters of the called function, and from return statements
+    into the result of every call. Each variable gets one type for its whole scope, the join
+    of everything assigned to it, and the program is scanned until nothing changes, so
+    recursive and mutually recursive functions settle too. Facts are kept in one dict:
+    ('var', scope, name) -> type, with scope None at the top level and the function name in
+    a function; ('return', function) -> type; ('params', function) -> parameter names.
+
+    annotate() copies the IR with the C++ types filled into Assign.var_type,
+    FunctionDef.param_types and return_type, Call.result_type and ListLiteral.element_type.
+    Parameters no call site types stay 'auto', and so does anything given conflicting types.
+    """
+
+    def __init__(self, facts=None):
+        self.facts = dict(facts) if facts else {}
+        self.rounds = 0  # passes over the units still changing the last infer() took
+        self.scanned = 0  # units the last infer() scanned rather than replayed from its memo
+        self._unit = None  # index of the unit being scanned, None outside infer()
+        self._reads = []  # per unit, the fact keys it read or wrote
+        self._readers = {}  # fact key -> set of the units that read it
+        self._dirty = set()
+        self._start = {}  # fact key -> its value when the current scan started
+        self._read = set()
+        self._written = set()
+
+    def infer(self, segments, memo=None):
+        """Infer the types of a program given as a list of instruction lists.
+
+        Returns one set per instruction list of the fact keys its annotation depends on.
+        memo is what the previous call left in self.memo, for reusing the scans of
+        unchanged statements.
+        """
+        # Every top-level statement and every function body is a unit, scanned on its own
+        # and again only when a fact it read has changed since
+        units = []  # (segment index, identity for the memo, statements, scope)
+        for index, segment in enumerate(segments):
+            for statement in segment:
+                units.append((index, statement, [statement], None))
+                stack = [statement]
+                while stack:
+                    nested = stack.pop()
+                    if nested.opcode == FUNCTION_DEF:
+                        self.facts[('params', nested.name)] = tuple(nested.params)
+                        units.append((index, nested.body, nested.body, nested.name))
+                    stack.extend(_nested_statements(nested))
+
+        # A scan only depends on the values its facts had when it started, so the memo keeps
+        # those with what the scan read and wrote, per unit
+        memo = memo or {}
+        self.memo = {}
+        self._reads = [set() for _ in units]
+        self._readers = {}
+        self._dirty = set(range(len(units)))
+        self.rounds = 0
+        self.scanned = 0
+        facts = self.facts
+        while self._dirty:
+            self.rounds += 1
+            pending = sorted(self._dirty)
+            self._dirty = set()
+            for self._unit in pending:
+                _, node, statements, scope = units[self._unit]
+                entry = memo.get(id(node))
+                recorded = entry[1] if entry is not None and entry[0] is node else ()
+                kept = self.memo.get(id(node))
+                if kept is None:
+                    kept = self.memo[id(node)] = (node, [])
+                for scan in recorded:
+                    start = scan[0]
+                    for key, value in start:
+                        if facts.get(key) != value:
+                            break
+                    else:
+                        self._replay(scan)
+                        kept[1].append(scan)
+                        break
+                else:
+                    self._start = {}
+                    self._read = set()
+                    self._written = set()
+                    self._scan(statements, scope)
+                    self.scanned += 1
+                    kept[1].append((tuple(self._start.items()), tuple(self._read),
+                                    tuple((key, facts[key]) for key in self._written)))
+        self._unit = None
+
+        touched = [set() for _ in segments]
+        for (index, _, _, _), reads in zip(units, self._reads):
+            touched[index] |= reads
+        return touched
+
+    def _replay(self, scan):
+        # What a recorded scan of the current unit did, given the same starting facts
+        start, reads, writes = scan
+        unit = self._unit
+        self._reads[unit].update(key for key, _ in start)
+        readers = self._readers
+        for key in reads:
+            units = readers.get(key)
+            if units is None:
+                readers[key] = {unit}
+            else:
+                units.add(unit)
+        for key, value in writes:
+            self._join(key, value)
+
+    def _add_reader(self, key):
+        readers = self._readers.get(key)
+        if readers is None:
+            readers = self._readers[key] = set()
+        readers.add(self._unit)
+
+    def _get(self, key):
+        value = self.facts.get(key)
+        if self._unit is not None:
+            self._reads[self._unit].add(key)
+            self._add_reader(key)
+            self._read.add(key)
+            if key not in self._start:
+                self._start[key] = value
+        return value
+
+    def _join(self, key, new_type):
+        # Writing a fact does not make a unit depend on it, but its annotation reads it
+        old = self.facts.get(key)
+        if self._unit is not None:
+            self._reads[self._unit].add(key)
+            if key not in self._start:
+                self._start[key] = old
+        joined = join_types(old, new_type)
+        if joined is not None and joined.count('vector<') > _MAX_NESTING:
+            joined = 'auto'
+        if joined != old:
+            self.facts[key] = joined
+            self._written.add(key)
+            self._dirty.update(self._readers.get(key, ()))
+
+    def variable_type(self, scope, name):
+        # A function reads a variable it never assigns from the top level
+        found = self._get(('var', scope, name))
+        if found is None and scope is not None:
+            found = self._get(('var', None, name))
+        return found
+
+    def _scan(self, statements, scope):
+        stack = list(reversed(statements))
+        while stack:
+            statement = stack.pop()
+            opcode = statement.opcode
+            if opcode == ASSIGN:
+                self._join(('var', scope, statement.target), self.expression_type(statement.value, scope, True))
+            elif opcode == PRINT:
+                self.expression_type(statement.value, scope, True)
+            elif opcode == IF or opcode == WHILE:
+                self.expression_type(statement.condition, scope, True)
+            elif opcode == FOR:
+                iterable = self.expression_type(statement.iterable, scope, True)
+                self._join(('var', scope, statement.var), element_of(iterable))
+            elif opcode == FUNCTION_DEF:
+                # The body is a unit of its own; annotating the definition reads its signature
+                name = statement.name
+                self._get(('params', name))
+                self._get(('return', name))
+                for param in statement.params:
+                    self._get(('var', name, param))
+                continue
+            elif opcode == RETURN and scope is not None:
+                value = statement.value
+                self._join(('return', scope), 'void' if value is None else self.expression_type(value, scope, True))
+            stack.extend(reversed(_nested_statements(statement)))
+
+    def expression_type(self, root, scope, record=False):
+        """Inferred type of an expression; with record, the types of its call arguments are
+        joined into the parameters of the functions called."""
+        opcode = getattr(root, 'opcode', None)
+        if opcode == VAR:
+            return self.variable_type(scope, root.name)
+        if opcode == CONST:
+            return _CONSTANT_TYPES.get(type(root.value))
+        values = []
+        stack = [(root, False)]
+        while stack:
+            node, operands_done = stack.pop()
+            opcode = getattr(node, 'opcode', None)
+            if opcode == VAR:
+                values.append(self.variable_type(scope, node.name))
+            elif opcode == CONST:
+                values.append(_CONSTANT_TYPES.get(type(node.value)))
+            elif opcode == BINOP:
+                if not operands_done:
+                    stack.append((node, True))
+                    stack.append((node.right, False))
+                    stack.append((node.left, False))
+                    continue
+                right = values.pop()
+                values[-1] = _binop_type(node.op, values[-1], right)
+            elif opcode in _COMPOUND:
+                children = _present(operands(node))
+                if not operands_done:
+                    stack.append((node, True))
+                    stack.extend((child, False) for child in reversed(children))
+                    continue
+                count = len(children)
+                child_types = values[len(values) - count:]
+                del values[len(values) - count:]
+                values.append(self._compound_type(node, opcode, child_types, scope, record))
+            else:
+                values.append(None)
+        return values[0]
+
+    def _compound_type(self, node, opcode, child_types, scope, record):
+        if opcode == LIST:
+            return vector_of(join_elements(child_types))
+        if opcode == INPUT:
+            return 'string'
+        if opcode == UNARYOP:
+            if node.op == 'not':
+                return 'bool'
+            return 'int' if node.op == '~' else child_types[0]
+        func = node.func
+        params = self._get(('params', func))
+        if params is not None:
+            if record:
+                for param, arg_type in zip(params, child_types):
+                    self._join(('var', func, param), arg_type)
+            return self._get(('return', func))
+        if func == '__list_access__':
+            container = child_types[0]
+            return 'string' if container == 'string' else element_of(container)
+        if func in ('abs', 'min', 'max') and child_types:
+            result = None
+            for arg_type in child_types:
+                result = join_types(result, arg_type)
+            return result
+        return _BUILTIN_RESULTS.get(func)
+
+    def annotate(self, instructions):
+        """Return a copy of the instruction list with the inferred C++ types filled in."""
+        return self._annotate_block(instructions, None)
+
+    def _annotate_block(self, statements, scope):
+        # The same list when nothing in it changed
+        if statements is None:
+            return None
+        annotated = [self._annotate_statement(statement, scope) for statement in statements]
+        if all(new is old for new, old in zip(annotated, statements)):
+            return statements
+        return annotated
+
+    def _annotate_statement(self, statement, scope):
+        opcode = statement.opcode
+        if opcode == ASSIGN:
+            expected = self.facts.get(('var', scope, statement.target))
+            value = self._annotate_expression(statement.value, scope, expected)
+            var_type = cpp_type(expected)
+            if value is statement.value and var_type == statement.var_type:
+                return statement
+            return Assign(statement.target, value, statement.lineno, var_type)
+        if opcode == PRINT:
+            value = self._annotate_expression(statement.value, scope)
+            return statement if value is statement.value else Print(value, statement.lineno)
+        if opcode == IF:
+            condition = self._annotate_expression(statement.condition, scope)
+            body = self._annotate_block(statement.body, scope)
+            orelse = self._annotate_block(statement.orelse, scope)
+            if condition is statement.condition and body is statement.body and orelse is statement.orelse:
+                return statement
+            return If(condition, body, orelse, statement.lineno)
+        if opcode == WHILE:
+            condition = self._annotate_expression(statement.condition, scope)
+            body = self._annotate_block(statement.body, scope)
+            if condition is statement.condition and body is statement.body:
+                return statement
+            return While(condition, body, statement.lineno)
+        if opcode == FOR:
+            iterable = self._annotate_expression(statement.iterable, scope)
+            body = self._annotate_block(statement.body, scope)
+            if iterable is statement.iterable and body is statement.body:
+                return statement
+            return For(statement.var, iterable, body, statement.lineno)
+        if opcode == FUNCTION_DEF:
+            name = statement.name
+            param_types = [cpp_type(self.facts.get(('var', name, param))) or 'auto'
+                           for param in statement.params]
+            result = self.facts.get(('return', name))
+            if result is None:
+                return_type = 'auto' if _returns_value(statement.body) else 'void'
+            else:
+                return_type = cpp_type(result) or 'auto'
+            return FunctionDef(name, statement.params, self._annotate_block(statement.body, name),
+                               statement.lineno, param_types, return_type)
+        if opcode == RETURN and statement.value is not None:
+            expected = self.facts.get(('return', scope)) if scope is not None else None
+            value = self._annotate_expression(statement.value, scope, expected)
+            return statement if value is statement.value else Return(value, statement.lineno)
+        return statement
+
+    def _annotate_expression(self, root, scope, expected=None):
+        # Bottom-up copy with explicit stacks; expected is the type the value is stored as,
+        # which decides the element type of list literals
+        if getattr(root, 'opcode', None) not in _COMPOUND:
+            return root
+        values = []
+        stack = [(root, expected, False)]
+        while stack:
+            node, expected, operands_done = stack.pop()
+            opcode = getattr(node, 'opcode', None)
+            if opcode not in _COMPOUND:
+                values.append(node)
+                continue
+            children = operands(node)
+            if not operands_done:
+                stack.append((node, expected, True))
+                for child, child_expected in reversed(list(zip(children, self._expected_operands(node, expected)))):
+                    stack.append((child, child_expected, False))
+                continue
+            count = len(children)
+            new = values[len(values) - count:] if count else []
+            del values[len(values) - count:]
+            values.append(self._annotated(node, opcode, new, children, expected, scope))
+        return values[0]
+
+    def _expected_operands(self, node, expected):
+        # Types the operands of a node are stored as, where that is known
+        opcode = node.opcode
+        if opcode == LIST:
+            return [element_of(expected)] * len(node.elements)
+        if opcode == CALL:
+            params = self.facts.get(('params', node.func))
+            if params is not None:
+                types = [self.facts.get(('var', node.func, param)) for param in params]
+                return types + [None] * (len(node.args) - len(types))
+        return [None] * len(operands(node))
+
+    def _annotated(self, node, opcode, new, children, expected, scope):
+        changed = any(a is not b for a, b in zip(new, children))
+        if opcode == LIST:
+            own = vector_of(join_elements([self.expression_type(element, scope) for element in new]))
+            stored = join_types(own, expected) if element_of(expected) is not None else own
+            if cpp_type(stored) is None:
+                stored = own
+            element = element_of(stored)
+            element_type = cpp_type(element) if element is not None else 'int'
+            if changed or element_type != node.element_type:
+                return ListLiteral(new, element_type)
+            return node
+        if opcode == CALL and ('params', node.func) in self.facts:
+            result = cpp_type(self.facts.get(('return', node.func)))
+            if result == 'void':
+                result = None
+            if changed or result != node.result_type:
+                return Call(node.func, new, result)
+            return node
+        return with_operands(node, new) if changed else node
+
+
+_COMPOUND = frozenset((BINOP, UNARYOP, CALL, LIST, INPUT))
+
+
+def _present(children):
+    # An input without a prompt has None as its operand
+    return [child for child in children if child is not None]
+
+
+def _nested_statements(statement):
+    opcode = statement.opcode
+    if opcode == IF:
+        return statement.body + (statement.orelse or [])
+    if opcode == WHILE or opcode == FOR or opcode == FUNCTION_DEF:
+        return statement.body
+    return []
+
+
+# Python type of a constant -> its C++ type; exact types, since bool is also an int
+_CONSTANT_TYPES = {bool: 'bool', int: 'int', float: 'double', str: 'string'}
+
+
+def _binop_type(op, left, right):
+    # Result type of a binary operation in the generated C++; int / int stays int there
+    if op in _BOOLEAN_OPERATORS or op in _COMPARISON_OPERATORS:
+        return 'bool'
+    if left is None or right is None:
+        return None
+    if op in _INT_OPERATORS:
+        return 'int'
+    if op == '+' and (left == 'string' or right == 'string'):
+        return 'string'
+    if op == '+' and left.startswith('vector<') and right.startswith('vector<'):
+        return join_types(left, right)
+    if left in ('int', 'double', 'bool') and right in ('int', 'double', 'bool'):
+        result = join_types(left, right)
+        return 'int' if result == 'bool' else result
+    return 'auto'
+
+
+def param_is_read_only(function, param):
+    """Whether a function body never assigns a parameter, so it can be taken by const reference."""
+    return param not in assigned_names(function.body)
@@ -1,31 +1,41 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
 from tkinter.font import Font
-import ast
 from ir_generator import IRGenerator
 from code_generator import CodeGenerator
-from custom_node_converter import CustomNodeConverter
+from conversion_cache import ConversionCache
+from incremental import IncrementalConverter
+from pass_manager import INTERACTIVE_OPT_LEVEL, OPT_LEVELS, PassManager
+from pipeline import CONVERTER_VERSION, DEFAULT_FRONTEND, FRONTENDS, ConversionCancelled, convert_source
+from stage_stats import ConversionStats
 import pyperclip
 import os
+import queue
+import threading
 
 class LineNumberedText(tk.Frame):
     def __init__(self, parent, **kwargs):
         super().__init__(parent)
         
         # Create a frame for line numbers
-        self.line_numbers = tk.Text(self, width=4, padx=4, takefocus=0, border=0,background='lightgray', state='disabled')
+        self.line_numbers = tk.Text(self, width=4, padx=4, takefocus=0, border=0,background='lightgray', state='disabled',
+                                    font=kwargs.get('font'))
         self.line_numbers.pack(side=tk.LEFT, fill=tk.Y)
         
         # Create the main text widget
         self.text = scrolledtext.ScrolledText(self, **kwargs)
         self.text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         
-        # Link scrollbars between text and line numbers
+        # Link scrollbars between text and line numbers: every scroll of the text
+        # also moves the gutter, so scrolling never has to rebuild the numbers
         self.text.vbar = self.text.vbar  # Get the scrollbar from ScrolledText
+        self.text.configure(yscrollcommand=self._on_text_scroll)
+        
+        # Number of lines currently shown in the gutter
+        self._line_count = 0
         
         # Bind events
         self.text.bind('<KeyRelease>', self._on_key_release)
-        self.text.bind('<MouseWheel>', self._on_mousewheel)
         
         # Initial line numbers
         self.update_line_numbers()
@@ -33,25 +43,35 @@ class LineNumberedText(tk.Frame):
     def _on_key_release(self, event=None):
         self.update_line_numbers()
         
-    def _on_mousewheel(self, event=None):
-        self.update_line_numbers()
+    def _on_text_scroll(self, first, last):
+        self.text.vbar.set(first, last)
+        self.line_numbers.yview_moveto(first)
         
     def update_line_numbers(self):
         try:
-            # Get the text content safely
-            text_content = self.text.get('1.0', tk.END)
-            lines = text_content.count('\n') + 1
+            # Read the line count from the end index instead of the whole buffer
+            lines = int(self.text.index('end-1c').split('.')[0])
             if lines < 3:
                 lines = 3
+            if lines == self._line_count:
+                return
                 
-            # Create the line numbers text
-            numbers = '\n'.join(str(i) for i in range(1, lines + 1))
-            
-            # Update line numbers text widget
+            # Only add or remove the numbers that changed
             self.line_numbers.config(state='normal')
-            self.line_numbers.delete('1.0', tk.END)
-            self.line_numbers.insert('1.0', numbers)
+            if self._line_count == 0:
+                self.line_numbers.insert('1.0', '\n'.join(str(i) for i in range(1, lines + 1)))
+            elif lines > self._line_count:
+                numbers = ''.join(f"\n{i}" for i in range(self._line_count + 1, lines + 1))
+                self.line_numbers.insert('end-1c', numbers)
+            else:
+                self.line_numbers.delete(f"{lines}.end", 'end-1c')
             self.line_numbers.config(state='disabled')
+            
+            # Widen the gutter when the numbers gain a digit
+            if len(str(lines)) != len(str(self._line_count)):
+                self.line_numbers.config(width=max(4, len(str(lines)) + 1))
+            self._line_count = lines
+            self.line_numbers.yview_moveto(self.text.yview()[0])
         except Exception as e:
             print(f"Error updating line numbers: {e}")
         
@@ -125,7 +145,12 @@ class LineNumberedText(tk.Frame):
             raise AttributeError(f"'{self.__class__.__name__}' object has no attribute '{name}'")
 
 class VisualizerApp:
-    def __init__(self, root):
+    # How often the Tk thread checks for results from conversion workers
+    POLL_INTERVAL_MS = 30
+    # Default idle time after the last keystroke before a live conversion starts
+    LIVE_DEBOUNCE_MS = 400
+
+    def __init__(self, root, live_debounce_ms=None, frontend=None, opt_level=None):
         self.root = root
         self.root.title("Python to C++ Converter")
         self.root.geometry("1200x800")
@@ -159,6 +184,36 @@ class VisualizerApp:
         self.clear_button = ttk.Button(button_frame, text="Clear All", command=self.clear_all)
         self.clear_button.pack(side=tk.LEFT, padx=5)
         
+        # Live preview controls: convert automatically once typing pauses
+        self.live_var = tk.BooleanVar(value=False)
+        self.live_check = ttk.Checkbutton(button_frame, text="Live Preview", variable=self.live_var,
+                                          command=self._on_live_toggled)
+        self.live_check.pack(side=tk.LEFT, padx=(15, 5))
+        
+        ttk.Label(button_frame, text="Delay (ms):").pack(side=tk.LEFT)
+        self.live_delay_var = tk.IntVar(value=live_debounce_ms or self.LIVE_DEBOUNCE_MS)
+        self.live_delay_spinbox = ttk.Spinbox(button_frame, from_=50, to=5000, increment=50, width=6,
+                                              textvariable=self.live_delay_var)
+        self.live_delay_spinbox.pack(side=tk.LEFT, padx=5)
+        
+        # Front end that parses the Python source: CPython's ast module or the built-in parser
+        ttk.Label(button_frame, text="Front end:").pack(side=tk.LEFT, padx=(15, 0))
+        self.frontend_var = tk.StringVar(value=frontend or DEFAULT_FRONTEND)
+        self.frontend_combo = ttk.Combobox(button_frame, textvariable=self.frontend_var, values=FRONTENDS,
+                                           state='readonly', width=8)
+        self.frontend_combo.pack(side=tk.LEFT, padx=5)
+        self.frontend_combo.bind('<<ComboboxSelected>>', self._on_options_changed)
+        
+        # IR optimization level: more passes give tighter C++ at the cost of conversion time
+        ttk.Label(button_frame, text="Optimization:").pack(side=tk.LEFT, padx=(15, 0))
+        level = INTERACTIVE_OPT_LEVEL if opt_level is None else opt_level
+        self.opt_level_var = tk.StringVar(value=f"-O{level}")
+        self.opt_level_combo = ttk.Combobox(button_frame, textvariable=self.opt_level_var,
+                                            values=[f"-O{level}" for level in sorted(OPT_LEVELS)],
+                                            state='readonly', width=4)
+        self.opt_level_combo.pack(side=tk.LEFT, padx=5)
+        self.opt_level_combo.bind('<<ComboboxSelected>>', self._on_options_changed)
+        
         # Create code container with Panedwindow
         code_container = ttk.PanedWindow(main_container, orient=tk.HORIZONTAL)
         code_container.pack(fill=tk.BOTH, expand=True)
@@ -174,6 +229,7 @@ class VisualizerApp:
         # Create text widgets with line numbers
         self.code_input = LineNumberedText(input_frame, wrap=tk.NONE, font=('Consolas', 10))
         self.code_input.pack(fill=tk.BOTH, expand=True)
+        self.code_input.bind('<KeyRelease>', self._on_input_changed, add='+')
         
         self.output_text = LineNumberedText(output_frame, wrap=tk.NONE, font=('Consolas', 10))
         self.output_text.pack(fill=tk.BOTH, expand=True)
@@ -188,6 +244,25 @@ class VisualizerApp:
         self.ir_generator = IRGenerator()
         self.code_generator = CodeGenerator()
         self.last_cpp_code = ""
+        self.last_stats = None  # ConversionStats of the last conversion
+        self.last_pass_stats = None  # PassStats of each IR pass of the last conversion
+        
+        # Reuses the output of unchanged top-level statements between conversions
+        self.incremental_converter = IncrementalConverter()
+        
+        # On-disk cache so unchanged sources skip the conversion pipeline
+        try:
+            self.conversion_cache = ConversionCache('.conversion_cache', version=CONVERTER_VERSION)
+        except OSError:
+            self.conversion_cache = None
+        
+        # Background conversion state
+        self._conversion_queue = queue.Queue()
+        self._conversion_lock = threading.Lock()
+        self._conversion_generation = 0
+        self._pending_conversions = 0
+        self._live_after_id = None
+        self._live_source = None
         
         # Recent files list
         self.recent_files = []
@@ -235,56 +310,139 @@ class VisualizerApp:
             messagebox.showerror("Error", f"File not found: {filepath}")
 
     def convert_code(self):
-        """Convert Python code to C++ and display the result."""
+        """Convert Python code to C++ in the background and display the result when ready."""
         code = self.code_input.get('1.0', tk.END).strip()
         if not code:
             messagebox.showerror("Error", "Please enter or load Python code first.")
             return
+        self._start_conversion(code, live=False)
 
-        try:
-            self.status_var.set("Converting...")
-            self.root.update()
-            
-            # Clear the output text area before converting
-            self.output_text.delete('1.0', tk.END)
-            self.output_text.update_line_numbers()
-            self.root.update()
+    def _on_live_toggled(self):
+        if self.live_var.get():
+            self._schedule_live_conversion()
+        elif self._live_after_id is not None:
+            self.root.after_cancel(self._live_after_id)
+            self._live_after_id = None
 
-            # Step 1: Parse to Python AST
-            python_ast = ast.parse(code)
+    def _on_input_changed(self, event=None):
+        if self.live_var.get():
+            self._schedule_live_conversion()
 
-            # Step 2: Convert to custom AST
-            custom_ast = CustomNodeConverter().visit(python_ast)
+    def _on_options_changed(self, event=None):
+        # The same source converts again with the other front end or optimization level
+        self._live_source = None
+        if self.live_var.get():
+            self._schedule_live_conversion()
 
-            # Step 3: Generate IR
-            self.ir_generator = IRGenerator()  # Reset the IR generator for each conversion
-            self.ir_generator.generate(custom_ast)
-            ir = self.ir_generator.get_instructions()
+    def _schedule_live_conversion(self):
+        # Restart the idle timer on every change so conversion only runs once typing pauses
+        if self._live_after_id is not None:
+            self.root.after_cancel(self._live_after_id)
+        try:
+            delay = max(0, int(self.live_delay_var.get()))
+        except (tk.TclError, ValueError):
+            delay = self.LIVE_DEBOUNCE_MS
+        self._live_after_id = self.root.after(delay, self._live_convert)
 
-            # Step 4: Generate C++ code
-            self.code_generator = CodeGenerator()  # Reset the code generator for each conversion
-            cplusplus_code = self.code_generator.generate(ir)
-            
-            # Ensure we got a valid string
-            if cplusplus_code is None:
-                cplusplus_code = "// Error: Code generation returned None"
-            self.last_cpp_code = self.code_generator.get_cpp_code()
-            if self.last_cpp_code is None:
-                self.last_cpp_code = "// Error: No C++ code generated"
+    def _live_convert(self):
+        self._live_after_id = None
+        code = self.code_input.get('1.0', tk.END).strip()
+        # Skip empty input and key presses that did not change the text (e.g. arrow keys)
+        if not code or code == self._live_source:
+            return
+        self._start_conversion(code, live=True)
+
+    def _start_conversion(self, code, live):
+        # Every request gets a new generation; results of older ones are discarded
+        self._conversion_generation += 1
+        generation = self._conversion_generation
+        self._live_source = code
+        self.status_var.set("Converting...")
 
-            # Step 5: Display with syntax highlighting
-            self.display_cpp_code(self.last_cpp_code)
+        frontend = self.frontend_var.get()
+        opt_level = int(self.opt_level_var.get().lstrip('-O'))
+        worker = threading.Thread(target=self._run_conversion, args=(code, generation, live, frontend, opt_level),
+                                  daemon=True)
+        self._pending_conversions += 1
+        worker.start()
+        if self._pending_conversions == 1:
+            self.root.after(self.POLL_INTERVAL_MS, self._poll_conversions)
 
-            self.status_var.set("Conversion completed successfully")
+    def _run_conversion(self, code, generation, live=False, frontend=DEFAULT_FRONTEND, opt_level=INTERACTIVE_OPT_LEVEL):
+        # Runs on a worker thread: never touch Tk here, only post messages to the queue
+        def progress(stage):
+            if generation != self._conversion_generation:
+                raise ConversionCancelled()
+            self._conversion_queue.put(('progress', generation, stage))
 
+        try:
+            # The incremental converter keeps state, so conversions run one at a time
+            with self._conversion_lock:
+                progress("Starting")
+                # Tracing memory would slow down every live conversion, so the GUI only times stages
+                stats = ConversionStats(trace_memory=False)
+                optimizer = PassManager.for_level(opt_level)
+                try:
+                    cpp_code = convert_source(code, cache=self.conversion_cache,
+                                              incremental=self.incremental_converter,
+                                              progress=stats.track(progress), frontend=frontend,
+                                              optimizer=optimizer)
+                finally:
+                    stats.finish()
+            self._conversion_queue.put(('done', generation, (cpp_code, stats, optimizer)))
+        except ConversionCancelled:
+            self._conversion_queue.put(('cancelled', generation, None))
         except SyntaxError as e:
+            self._conversion_queue.put(('error', generation, (e, live)))
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            self._conversion_queue.put(('error', generation, (e, live)))
+
+    def _poll_conversions(self):
+        # Runs on the Tk thread: apply messages posted by conversion workers
+        while True:
+            try:
+                kind, generation, payload = self._conversion_queue.get_nowait()
+            except queue.Empty:
+                break
+
+            if kind != 'progress':
+                self._pending_conversions -= 1
+            if generation != self._conversion_generation:
+                continue  # Stale job, a newer conversion has been started
+
+            if kind == 'progress':
+                self.status_var.set(f"Converting: {payload}...")
+            elif kind == 'done':
+                self.last_cpp_code, self.last_stats, optimizer = payload
+                self.last_pass_stats = optimizer.stats
+                if self.last_cpp_code is None:
+                    self.last_cpp_code = "// Error: No C++ code generated"
+                self.display_cpp_code(self.last_cpp_code)
+                status = f"Conversion completed successfully: {self.last_stats.summary()}"
+                if any(pass_stats.nodes_before for pass_stats in optimizer.stats):
+                    # Left out for cache hits, where no pass ran
+                    status += f" | {optimizer.summary()}"
+                self.status_var.set(status)
+            elif kind == 'error':
+                self._show_conversion_error(*payload)
+
+        if self._pending_conversions > 0:
+            self.root.after(self.POLL_INTERVAL_MS, self._poll_conversions)
+
+    def _show_conversion_error(self, e, live=False):
+        # Live conversions run while the user is still typing, so they only report in the status bar
+        if isinstance(e, SyntaxError):
             self.status_var.set(f"Syntax Error: {str(e)}")
+            if live:
+                return
             messagebox.showerror("Syntax Error", f"Line {e.lineno if hasattr(e, 'lineno') else '?'}: {e.msg if hasattr(e, 'msg') else str(e)}")
-        except Exception as e:
+        else:
             self.status_var.set(f"Error: {str(e)}")
+            if live:
+                return
             messagebox.showerror("Error", f"An error occurred: {e}")
-            import traceback
-            traceback.print_exc()
 
     def display_cpp_code(self, cplusplus_code):
         """Display the generated C++ code with syntax highlighting."""
@@ -338,11 +496,16 @@ class VisualizerApp:
 
     def clear_all(self):
         """Clear both input and output text areas."""
+        self._conversion_generation += 1  # Drop any conversion still in flight
+        self._live_source = None
         self.code_input.delete('1.0', tk.END)
         self.output_text.delete('1.0', tk.END)
+        self.code_input.update_line_numbers()
+        self.output_text.update_line_numbers()
         # Reinitialize code generators to clear any stored state
         self.ir_generator = IRGenerator()
         self.code_generator = CodeGenerator()
+        self.incremental_converter = IncrementalConverter()
         self.last_cpp_code = ""
         self.status_var.set("Cleared all text areas")
 